@@ -1,5 +1,9 @@
 import sys
 import os
+import argparse
+import socket
+import threading
+import time
 from pathlib import Path
 
 # プロジェクトルートをPythonパスに追加
@@ -8,52 +12,257 @@ sys.path.insert(0, str(project_root))
 
 from src.utils.environment import EnvironmentUtils as env
 from src.modules.bdash_api_sync import BDashAPISync
+from src.modules.api_recorder import create_transport
+from src.modules.job_queue import JobQueue, FAIL_FINAL
+from src.modules.reconcile import reconcile_due
+from src.utils.notifications import create_dispatcher
+from src.utils.run_report import JobReport, RunReport
+from src.utils.profiler import StageProfiler
+from src.utils.logging_config import get_logger
 
-def process_bdash_api():
+logger = get_logger(__name__)
+
+def get_datafile_ids() -> list:
+    """
+    同期対象のデータファイルIDを設定ファイルから取得（カンマ区切りで複数指定可能）
+    
+    Returns:
+        list: データファイルIDのリスト
+    """
+    value = str(env.get_config_value('BDASH', 'datafile_id', '503'))
+    return [datafile_id.strip() for datafile_id in value.split(',') if datafile_id.strip()]
+
+def parse_args(argv: list = None) -> argparse.Namespace:
+    """
+    コマンドライン引数を解析（未知の引数は無視）
+    
+    Args:
+        argv (list): 解析する引数（Noneの場合は sys.argv）
+        
+    Returns:
+        argparse.Namespace: 解析結果
+    """
+    parser = argparse.ArgumentParser(description="b→dash APIデータ同期")
+    parser.add_argument('--silent', '--no-wait', '--batch', dest='silent', action='store_true',
+                        help="完了時に入力を待たない")
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--record', action='store_true',
+                           help="APIレスポンスを data/recordings に記録する")
+    recording.add_argument('--replay', nargs='?', const='latest', metavar='DIR',
+                           help="記録したレスポンスを再生する（DIR省略時は最新の記録）")
+    parser.add_argument('--replay-speed', type=float, default=0.0, metavar='FACTOR',
+                        help="再生時の応答時間の再現倍率（1.0=記録時と同じ、0=待たない）")
+    parser.add_argument('--profile', action='store_true',
+                        help="工程ごとのCPU・メモリ使用状況を計測し、logs/profile に保存する")
+    parser.add_argument('--reconcile', action='store_true',
+                        help="実行時刻（MISSING_RECORDS_SYNC_HOUR）に関係なく、同期で取得したデータとシートの突き合わせを行う")
+    queue_mode = parser.add_mutually_exclusive_group()
+    queue_mode.add_argument('--enqueue', action='store_true',
+                            help="データファイルごとの同期ジョブをジョブキューに登録して終了する")
+    queue_mode.add_argument('--worker', action='store_true',
+                            help="ジョブキューからジョブを取り出して同期する（複数プロセス・複数ホストで実行可能）")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def sync_datafile(datafile_id: str, job: JobReport, args: argparse.Namespace) -> bool:
+    """
+    データファイル1件を同期（設定に応じてパイプライン方式・ストリーミング方式を選択）
+    
+    突き合わせの実行時刻になっている（または --reconcile 指定の）場合は、同期で取得したデータと
+    シートを突き合わせ、欠落・余分な行を修復します（転記した場合は全件を書き直しているため不要）。
+    
+    Args:
+        datafile_id (str): データファイルID
+        job (JobReport): 処理結果の記録先
+        args (argparse.Namespace): コマンドライン引数
+        
+    Returns:
+        bool: 同期成功時はTrue、失敗時はFalse
+    """
+    try:
+        # BDashAPISyncクラスのインスタンスを作成（--record / --replay 指定時は記録・再生用のトランスポート）
+        transport = create_transport(datafile_id, args.record, args.replay, args.replay_speed)
+        bdash_sync = BDashAPISync(datafile_id=datafile_id, report=job, transport=transport)
+        # 実行時刻になったら、転記をスキップした同期でシートの欠落・余分な行を突き合わせて修復
+        bdash_sync.reconcile_requested = args.reconcile or reconcile_due(datafile_id)
+        limit = int(env.get_datafile_config_value(datafile_id, 'PAGE_SIZE', 'SYNC_SETTINGS', 5000))
+        
+        if env.get_config_value('SYNC_SETTINGS', 'PIPELINE_MODE', False):
+            result = bdash_sync.sync_data_pipelined(limit=limit)
+        elif (
+            env.get_config_value('SYNC_SETTINGS', 'STREAMING_MODE', False)
+            or env.get_config_value('SYNC_SETTINGS', 'CHECKPOINT_ENABLED', False)
+        ):
+            result = bdash_sync.sync_data_streaming(limit=limit)
+        else:
+            result = bdash_sync.sync_data_to_spreadsheet(limit=limit)
+        job.finish(result, job.error)
+        return result
+    except Exception as e:
+        job.finish(False, str(e))
+        raise
+
+def process_bdash_api(args: argparse.Namespace = None):
     """b→dash APIからデータを取得してスプレッドシートに転記"""
-    print("=" * 60)
-    print("🚀 b→dash APIデータ同期開始")
-    print("=" * 60)
+    if args is None:
+        args = parse_args([])
+    
+    logger.info("=" * 60)
+    logger.info("🚀 b→dash APIデータ同期開始")
+    logger.info("=" * 60)
+    
+    # 通知はバックグラウンドで送信し、同期処理を待たせない
+    dispatcher = create_dispatcher()
+    report = RunReport()
+    profiler = StageProfiler() if args.profile else None
+    if profiler is not None:
+        profiler.start()
     
     try:
-        # BDashAPISyncクラスのインスタンスを作成
-        bdash_sync = BDashAPISync()
+        for datafile_id in get_datafile_ids():
+            job = report.new_job(datafile_id)
+            if profiler is not None:
+                profiler.attach(job)
+            sync_datafile(datafile_id, job, args)
         
-        # データ同期を実行
-        result = bdash_sync.sync_data_to_spreadsheet(limit=5000)
+        logger.info("=" * 60)
+        logger.info(report.summary_text())
         
-        if result:
-            print("=" * 60)
-            print("🎉 b→dash APIデータ同期完了")
+        if report.success:
+            logger.info("=" * 60)
+            logger.info("🎉 b→dash APIデータ同期完了")
             return True
         else:
-            print("=" * 60)
-            print("❌ b→dash APIデータ同期失敗")
+            logger.info("=" * 60)
+            logger.error("❌ b→dash APIデータ同期失敗")
             return False
             
     except Exception as e:
-        print(f"❌ b→dash APIデータ同期エラー: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"❌ b→dash APIデータ同期エラー: {e}", exc_info=True)
         return False
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        # 複数データファイルの結果を1件のサマリーとして通知
+        if dispatcher is not None:
+            dispatcher.post(report.summary_text())
+            dispatcher.close(timeout=env.get_config_value('NOTIFICATION', 'flush_timeout_sec', 10))
+
+def enqueue_jobs() -> bool:
+    """設定ファイルのデータファイルごとに同期ジョブをジョブキューに登録"""
+    queue = JobQueue()
+    max_attempts = env.get_config_value('JOB_QUEUE', 'max_attempts', 3)
+    for datafile_id in get_datafile_ids():
+        queue.enqueue(datafile_id, max_attempts)
+    logger.info(f"📋 ジョブキューの状態: {queue.stats()}")
+    return True
+
+def run_worker(args: argparse.Namespace) -> bool:
+    """
+    ジョブキューからジョブをリースして同期するワーカー
+    
+    実行中はハートビートでリースを延長し、待機中のジョブがなくなってから
+    idle_exit_sec 秒が経過したら終了します（0の場合はキューが空になった時点で終了）。
+    
+    Args:
+        args (argparse.Namespace): コマンドライン引数
+        
+    Returns:
+        bool: 再試行の上限に達して失敗したジョブがない場合はTrue
+    """
+    queue = JobQueue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    lease_sec = env.get_config_value('JOB_QUEUE', 'lease_sec', 300)
+    heartbeat_sec = env.get_config_value('JOB_QUEUE', 'heartbeat_sec', 60)
+    retry_delay_sec = env.get_config_value('JOB_QUEUE', 'retry_delay_sec', 60)
+    poll_interval_sec = env.get_config_value('JOB_QUEUE', 'poll_interval_sec', 5)
+    idle_exit_sec = env.get_config_value('JOB_QUEUE', 'idle_exit_sec', 0)
+    
+    logger.info(f"👷 ワーカー開始: {worker_id}（キュー: {queue.db_path}）")
+    dispatcher = create_dispatcher()
+    report = RunReport()
+    profiler = StageProfiler() if args.profile else None
+    if profiler is not None:
+        profiler.start()
+    idle_since = time.monotonic()
+    final_failures = 0
+    
+    try:
+        while True:
+            leased = queue.lease(worker_id, lease_sec)
+            if leased is None:
+                # 再試行待ちのジョブがなく、待機時間を過ぎたら終了
+                if queue.pending_count() == 0 and time.monotonic() - idle_since >= idle_exit_sec:
+                    break
+                time.sleep(poll_interval_sec)
+                continue
+            
+            logger.info(f"▶️ job={leased.id} データファイル {leased.datafile_id} を実行します（{leased.attempts}/{leased.max_attempts}回目）")
+            job = report.new_job(leased.datafile_id)
+            if profiler is not None:
+                profiler.attach(job)
+            
+            # 同期の実行中はハートビートでリースを延長する
+            stop = threading.Event()
+            def heartbeat() -> None:
+                while not stop.wait(heartbeat_sec):
+                    if not queue.heartbeat(leased.id, worker_id, lease_sec):
+                        logger.warning(f"⚠️ job={leased.id} のリースを失いました（別のワーカーが引き継いだ可能性があります）")
+                        return
+            thread = threading.Thread(target=heartbeat, name=f"heartbeat-{leased.id}", daemon=True)
+            thread.start()
+            try:
+                sync_datafile(leased.datafile_id, job, args)
+            except Exception as e:
+                logger.error(f"❌ job={leased.id} でエラーが発生しました: {e}", exc_info=True)
+            finally:
+                stop.set()
+                thread.join()
+            
+            if job.success:
+                queue.complete(leased.id, worker_id, job.to_dict())
+            else:
+                # リースを失ったジョブは別のワーカーが引き継いでいるため、最終的な失敗に数えない
+                if queue.fail(leased.id, worker_id, job.error or "同期に失敗しました", retry_delay_sec) == FAIL_FINAL:
+                    final_failures += 1
+            idle_since = time.monotonic()
+        
+        logger.info("=" * 60)
+        logger.info(f"👷 ワーカー終了: {len(report.jobs)}件のジョブを実行（キュー: {queue.stats()}）")
+        if report.jobs:
+            logger.info(report.summary_text())
+        return final_failures == 0
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if dispatcher is not None:
+            if report.jobs:
+                dispatcher.post(report.summary_text())
+            dispatcher.close(timeout=env.get_config_value('NOTIFICATION', 'flush_timeout_sec', 10))
 
 def main():
     """メイン処理"""
+    args = parse_args()
     # サイレントモード判定
-    is_silent = len(sys.argv) > 1 and any(arg in ['--silent', '--no-wait', '--batch'] for arg in sys.argv)
+    is_silent = args.silent
     
     if not is_silent:
-        print("🚀 b→dash APIデータ同期システム開始")
-        print("🌐 b→dash APIからデータを取得してスプレッドシートに転記します...")
+        logger.info("🚀 b→dash APIデータ同期システム開始")
+        logger.info("🌐 b→dash APIからデータを取得してスプレッドシートに転記します...")
     
-    success = process_bdash_api()
+    if args.enqueue:
+        success = enqueue_jobs()
+    elif args.worker:
+        success = run_worker(args)
+    else:
+        success = process_bdash_api(args)
     
     if success:
         if not is_silent:
-            print("✅ b→dash APIデータ同期完了")
+            logger.info("✅ b→dash APIデータ同期完了")
     else:
         if not is_silent:
-            print("❌ b→dash APIデータ同期失敗")
+            logger.error("❌ b→dash APIデータ同期失敗")
     
     if not is_silent:
         print("\n" + "=" * 60)
@@ -0,0 +1,167 @@
+"""
+b→dash APIのレスポンスを記録・再生するモジュール
+
+RecordingTransport は実際のAPIにリクエストしつつ、ページごとのレスポンス
+（ステータス・ヘッダー・本文・応答時間）を gzip 圧縮したJSONとして保存します。
+ReplayTransport は保存したレスポンスを BDashAPISync に返し、ネットワークやAPIキーなしで
+変換・転記処理を繰り返し実行できるようにします。
+
+制限事項:
+    - リクエストヘッダー（APIキーを含む）は記録しません
+    - 再生時は (limit, offset) が一致するレスポンスを返します。記録範囲外のoffsetには416を返し、
+      ページサイズが記録時と異なる場合は記録順に返します
+"""
+
+import gzip
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_recordings_root(datafile_id: str) -> Path:
+    """
+    データファイルの記録の保存先ディレクトリを返します。
+
+    Args:
+        datafile_id (str): データファイルID
+
+    Returns:
+        Path: 記録の保存先ディレクトリ
+    """
+    recordings_dir = env.get_config_value('SYNC_SETTINGS', 'RECORDINGS_DIR', 'data/recordings')
+    return env.get_project_root() / recordings_dir / str(datafile_id)
+
+
+def _page_key(params: Optional[Dict[str, Any]]) -> str:
+    params = params or {}
+    return f"{params.get('limit', '')}:{params.get('offset', 0)}"
+
+
+class RecordingTransport:
+    """実際のAPIにリクエストし、レスポンスを記録するトランスポート"""
+
+    offline = False
+
+    def __init__(self, recording_dir: Path):
+        """
+        Args:
+            recording_dir (Path): レスポンスの保存先ディレクトリ
+        """
+        self.recording_dir = Path(recording_dir)
+        self.recording_dir.mkdir(parents=True, exist_ok=True)
+        self.entries: List[Dict[str, Any]] = []
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None, **kwargs) -> requests.Response:
+        started = time.perf_counter()
+        response = requests.get(url, headers=headers, params=params, **kwargs)
+        elapsed = time.perf_counter() - started
+
+        file_name = f"page_{len(self.entries) + 1:05d}.json.gz"
+        payload = {
+            'url': url,
+            'params': params or {},
+            'status_code': response.status_code,
+            'headers': dict(response.headers),
+            'elapsed_sec': elapsed,
+            'body': response.content.decode('utf-8', errors='replace'),
+        }
+        with gzip.open(self.recording_dir / file_name, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+        self.entries.append({'key': _page_key(params), 'file': file_name, 'status_code': response.status_code})
+        with open(self.recording_dir / 'index.json', 'w', encoding='utf-8') as f:
+            json.dump({'recorded_at': datetime.now().isoformat(), 'entries': self.entries}, f, indent=2)
+
+        return response
+
+
+class ReplayResponse:
+    """記録したレスポンスを requests.Response と同じ形で返すクラス"""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.status_code = payload['status_code']
+        self.headers = CaseInsensitiveDict(payload.get('headers', {}))
+        self.content = payload['body'].encode('utf-8')
+        self.text = payload['body']
+        self.url = payload.get('url', '')
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class ReplayTransport:
+    """記録したレスポンスを返すトランスポート（ネットワークに接続しません）"""
+
+    offline = True
+
+    def __init__(self, recording_dir: Path, speed: float = 0.0):
+        """
+        Args:
+            recording_dir (Path): 記録のディレクトリ
+            speed (float): 応答時間の再現倍率（1.0=記録時と同じ、2.0=2倍速、0=待たない）
+        """
+        self.recording_dir = Path(recording_dir)
+        self.speed = speed
+        with open(self.recording_dir / 'index.json', 'r', encoding='utf-8') as f:
+            self.entries: List[Dict[str, Any]] = json.load(f)['entries']
+        self._position = 0
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict[str, Any]] = None, **kwargs) -> ReplayResponse:
+        key = _page_key(params)
+        entry = next((e for e in self.entries if e['key'] == key), None)
+        if entry is None and any(e['key'].split(':')[0] == key.split(':')[0] for e in self.entries):
+            # 同じページサイズで記録範囲外のoffset（並列取得の先読みなど）はデータの終端として扱う
+            return ReplayResponse({'status_code': 416, 'headers': {}, 'body': '', 'url': url})
+        if entry is None:
+            if self._position >= len(self.entries):
+                raise RuntimeError(f"再生できるレスポンスがありません: {key}")
+            entry = self.entries[self._position]
+            logger.warning(f"⚠️ {key} に一致する記録がないため、記録順のレスポンスを返します: {entry['file']}")
+        self._position = self.entries.index(entry) + 1
+
+        with gzip.open(self.recording_dir / entry['file'], 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+
+        if self.speed > 0:
+            time.sleep(payload.get('elapsed_sec', 0) / self.speed)
+        return ReplayResponse(payload)
+
+
+def create_transport(datafile_id: str, record: bool = False, replay: Optional[str] = None, speed: float = 0.0) -> Any:
+    """
+    コマンドライン引数に応じたトランスポートを作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+        record (bool): レスポンスを記録するかどうか
+        replay (Optional[str]): 再生する記録のディレクトリ（"latest" の場合は最新の記録）
+        speed (float): 再生時の応答時間の再現倍率
+
+    Returns:
+        Any: get(url, headers, params) を持つトランスポート（通常時は requests モジュール）
+    """
+    if replay:
+        if replay == 'latest':
+            recordings = sorted(p for p in get_recordings_root(datafile_id).glob('*') if p.is_dir())
+            if not recordings:
+                raise FileNotFoundError(f"データファイル {datafile_id} の記録が見つかりません")
+            recording_dir = recordings[-1]
+        else:
+            recording_dir = Path(replay)
+        logger.info(f"▶️ 記録したレスポンスを再生します: {recording_dir} (速度: {speed or '待機なし'})")
+        return ReplayTransport(recording_dir, speed)
+
+    if record:
+        recording_dir = get_recordings_root(datafile_id) / datetime.now().strftime('%Y%m%d_%H%M%S')
+        logger.info(f"⏺️ APIレスポンスを記録します: {recording_dir}")
+        return RecordingTransport(recording_dir)
+
+    return requests
@@ -2,24 +2,70 @@
 b→dash APIからデータを取得してスプレッドシートに転記するモジュール
 """
 
+import json
 import requests
 import pandas as pd
-import os
-from datetime import datetime
-from pathlib import Path
-from typing import Dict, Any, Optional
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Iterator, List, Tuple
 from src.utils.environment import EnvironmentUtils as env
-from src.modules.csv_to_sheet import upload_csv_to_sheet
+from src.modules.csv_to_sheet import upload_chunks_to_sheet, SheetAppender
 from src.modules.spreadsheet import SpreadSheet
+from src.modules.sheet_sharding import create_shard_writer
+from src.modules.sheet_swap import create_shadow_worksheet
+from src.modules.sheet_serializer import header_values
+from src.modules.checkpoint import SyncCheckpoint
+from src.modules.chunk_store import ChunkStore, find_date_column
+from src.modules.page_sizer import AdaptivePageSizer, THROTTLE_STATUS_CODES, create_page_sizer
+from src.modules.page_decoder import records_to_dataframe, select_record_keys, decode_page, decode_response, ipc_to_dataframe
+from src.modules.data_profile import DataProfileError, DataProfileStage, create_profile_stage
+from src.modules.key_index import KeyIndex, create_key_index
+from src.modules.reconcile import create_reconciler, mark_reconciled
+from src.modules.sinks import Dataset, SinkFanout, SinkResult, create_sink_fanout
+from src.modules.sync_state import SyncStateStore, ContentHasher, schema_fingerprint
+from src.modules.schema_registry import SchemaRegistry, SchemaPlan, format_drift
+from src.modules.row_filter import RowFilter, parse_predicates
+from src.utils.run_report import JobReport
+from src.utils.pipeline import background, map_stage
+from src.utils.logging_config import apply_log_level, get_logger
+
+logger = get_logger(__name__)
 
 class BDashAPISync:
     """b→dash APIとの連携を管理するクラス"""
     
-    def __init__(self):
-        """初期化"""
+    def __init__(self, datafile_id: Optional[str] = None, report: Optional[JobReport] = None, transport: Any = None):
+        """
+        初期化
+        
+        Args:
+            datafile_id (Optional[str]): データファイルID（Noneの場合は設定ファイルの値）
+            report (Optional[JobReport]): 処理結果の記録先
+            transport (Any): APIリクエストに使用するトランスポート（Noneの場合は requests、記録・再生は api_recorder を参照）
+        """
         self.base_url = "https://api.smart-bdash.com/api/v1"
         self.api_key = None
-        self.datafile_id = None
+        self.datafile_id = datafile_id
+        self.report = report
+        self.transport = transport if transport is not None else requests
+        # 記録したレスポンスを再生する場合はネットワーク・APIキーを使用しない
+        self.offline = bool(getattr(self.transport, 'offline', False))
+        # 条件付きリクエストで「変更なし(304)」が返されたかどうか
+        self.not_modified = False
+        # 直近のレスポンスの ETag / Last-Modified
+        self.response_validators: Dict[str, str] = {}
+        # スキーマレジストリの変換プラン
+        self.schema_plan: Optional[SchemaPlan] = None
+        # スキーマドリフトなどで差分処理を行わず全件を書き直す必要があるかどうか
+        self.force_full_rewrite = False
+        # 取得・転記するカラムの許可リスト（Noneの場合はすべてのカラム）
+        self.columns: Optional[List[str]] = None
+        # 行の絞り込み条件（Noneの場合はすべての行）
+        self.row_filter: Optional[RowFilter] = None
+        # スキーマレジストリに登録済みのヘッダー情報（API側の絞り込みに使用。同期ごとに1回だけ読み込む）
+        self._registered_header_info: Optional[List[Dict[str, Any]]] = None
+        # この同期でシートとの突き合わせ（reconcile_sheet）を行うかどうか（条件付きリクエストは使用しない）
+        self.reconcile_requested = False
         
     def setup_api_credentials(self) -> bool:
         """
@@ -29,271 +75,1158 @@ class BDashAPISync:
             bool: 設定成功時はTrue、失敗時はFalse
         """
         try:
-            # 環境変数をロード
+            if self.offline:
+                if self.datafile_id is None:
+                    self.datafile_id = env.get_config_value("BDASH", "datafile_id", "503")
+                self.columns = self._load_column_allow_list()
+                self.row_filter = self._load_row_filter()
+                self._registered_header_info = None
+                logger.info(f"✅ API設定完了（再生モード）: データファイルID={self.datafile_id}")
+                return True
+            
+            # 環境変数をロード（secrets.env の APP_ENV に応じたログレベルを反映）
             env.load_env()
+            apply_log_level()
             
             # APIキーを取得
             self.api_key = env.get_env_var("BDASH_API_KEY")
             if not self.api_key:
-                print("❌ b→dash APIキーが設定されていません")
+                logger.error("❌ b→dash APIキーが設定されていません")
                 return False
                 
-            # データファイルIDを取得
-            self.datafile_id = env.get_config_value("BDASH", "datafile_id", "503")
+            # データファイルIDを取得（指定がない場合は設定ファイルの値）
+            if self.datafile_id is None:
+                self.datafile_id = env.get_config_value("BDASH", "datafile_id", "503")
             
-            print(f"✅ API設定完了: データファイルID={self.datafile_id}")
+            self.columns = self._load_column_allow_list()
+            self.row_filter = self._load_row_filter()
+            self._registered_header_info = None
+            logger.info(f"✅ API設定完了: データファイルID={self.datafile_id}")
             return True
             
         except Exception as e:
-            print(f"❌ API設定エラー: {e}")
+            logger.error(f"❌ API設定エラー: {e}")
             return False
     
-    def fetch_data(self, limit: int = 5000) -> Optional[Dict[str, Any]]:
+    def _load_column_allow_list(self) -> Optional[List[str]]:
+        """設定ファイルからカラムの許可リストを取得（[DATAFILE_<id>] columns、未設定の場合はNone）"""
+        value = env.get_datafile_config_value(self.datafile_id, 'columns', 'BDASH', '')
+        columns = [column.strip() for column in str(value or '').split(',') if column.strip()]
+        if not columns:
+            return None
+        logger.info(f"📋 カラムの許可リスト: {len(columns)}列 ({', '.join(columns)})")
+        return columns
+    
+    def _load_row_filter(self) -> Optional[RowFilter]:
+        """
+        設定ファイルから行の絞り込み条件を取得（[DATAFILE_<id>] filters / recent_months、未設定の場合はNone）
+        
+        Raises:
+            ValueError: 条件の書式が不正な場合
+        """
+        predicates = parse_predicates(env.get_datafile_config_value(self.datafile_id, 'filters', 'BDASH', ''))
+        recent_months = int(env.get_datafile_config_value(self.datafile_id, 'recent_months', 'BDASH', 0) or 0)
+        row_filter = RowFilter(predicates, recent_months)
+        if not row_filter:
+            return None
+        conditions = [f"{p.column} {p.op} {', '.join(p.values)}" for p in predicates]
+        if row_filter.cutoff_month:
+            conditions.append(f"配信年月 >= {row_filter.cutoff_month}（直近{recent_months}か月）")
+        logger.info(f"🔎 行の絞り込み条件: {' / '.join(conditions)}")
+        return row_filter
+    
+    def _load_registered_header_info(self) -> List[Dict[str, Any]]:
+        """スキーマレジストリに登録済みのヘッダー情報を返す（同期中は最初に読み込んだものを使い続ける）"""
+        if self._registered_header_info is None:
+            self._registered_header_info = SchemaRegistry().get_header_info(self.datafile_id)
+        return self._registered_header_info
+    
+    def _selected_field_ids(self, header_info: List[Dict[str, Any]]) -> List[str]:
         """
-        b→dash APIからデータを取得
+        field_selection_param でAPIに要求するカラムIDを求める
+        
+        許可リストのカラムに加えて、取得後の絞り込みで参照するカラム（records_to_dataframe と同じ）も要求します。
         
         Args:
-            limit (int): 取得するレコード数の上限
+            header_info (List[Dict[str, Any]]): スキーマレジストリに登録済みのヘッダー情報
             
         Returns:
-            Optional[Dict[str, Any]]: 取得したデータ、エラー時はNone
+            List[str]: カラムID（フィールド指定を行わない場合は空のリスト）
+        """
+        if not (self.columns and env.get_config_value('BDASH', 'field_selection_param', '')):
+            return []
+        wanted = list(self.columns)
+        if self.row_filter:
+            wanted += [column for column in self.row_filter.required_columns(header_info) if column not in wanted]
+        keys = [col.get('column_id', '') for col in header_info]
+        return select_record_keys(keys, header_info, wanted)
+    
+    def _build_params(self, limit: int, offset: Optional[int] = None) -> Dict[str, Any]:
+        """
+        リクエストパラメータを作成
+        
+        カラムの許可リスト・行の絞り込み条件があり、APIのパラメータ名（[BDASH] field_selection_param /
+        filter_param）が設定されている場合は、前回のヘッダー情報からカラムIDを求めてAPI側で絞り込ませます
+        （前回のヘッダー情報は同期ごとに1回だけ読み込みます）。
+        API側で絞り込んだ場合も、取得後の絞り込みは同じ結果になるためそのまま適用します。
+        """
+        params: Dict[str, Any] = {'limit': limit}
+        if offset is not None:
+            params['offset'] = offset
+        
+        field_param = env.get_config_value('BDASH', 'field_selection_param', '')
+        filter_param = env.get_config_value('BDASH', 'filter_param', '')
+        if (self.columns and field_param) or (self.row_filter and filter_param):
+            header_info = self._load_registered_header_info()
+            column_ids = self._selected_field_ids(header_info)
+            if column_ids:
+                params[field_param] = ','.join(column_ids)
+            if self.row_filter and filter_param:
+                filters = self.row_filter.to_api_filters(header_info)
+                if filters:
+                    params[filter_param] = json.dumps(filters, ensure_ascii=False)
+        return params
+    
+    def _begin_stage(self, name: str) -> None:
+        """処理結果の記録先があれば工程を切り替える"""
+        if self.report is not None:
+            self.report.begin_stage(name)
+    
+    def _record_result(self, rows: int, columns: int, skipped: bool = False) -> None:
+        """処理結果の記録先があれば件数を記録する"""
+        if self.report is not None:
+            self.report.rows = rows
+            self.report.columns = columns
+            self.report.skipped = skipped
+    
+    def _record_sinks(self, results: List[SinkResult]) -> None:
+        """処理結果の記録先があればシンクごとの出力結果を記録する"""
+        if self.report is None:
+            return
+        self.report.extra['sinks'] = [result.to_dict() for result in results]
+        for result in results:
+            note = f"シンク {result.name} への出力に失敗: {result.error}"
+            if result.status == 'failed' and not result.primary and note not in self.report.notes:
+                self.report.notes.append(note)
+    
+    def deliver(self, dataset: Dataset, checkpoint: Optional[SyncCheckpoint] = None) -> SinkFanout:
         """
+        データセットを設定されたシンク（スプレッドシート・CSV・Parquet・オブジェクトストレージ）へ並行して出力
+        
+        主シンクの完了までを待ち、任意シンクはバックグラウンドで出力を続けます。
+        
+        Args:
+            dataset (Dataset): 出力するデータセット
+            checkpoint (Optional[SyncCheckpoint]): スプレッドシートへの書き込み済みの行数を記録するチェックポイント
+            
+        Returns:
+            SinkFanout: 出力先（primary_succeeded で主シンクの成否を確認、close() で全シンクの完了を待機）
+        """
+        fanout = create_sink_fanout(self.datafile_id, checkpoint=checkpoint)
+        self._record_sinks(fanout.run(dataset))
+        return fanout
+    
+    
+    def _record_error(self, error: Exception) -> None:
+        """処理結果の記録先があればエラー内容を記録する"""
+        if self.report is not None:
+            self.report.error = str(error)
+    
+    def _save_key_index(self, key_index: Optional[KeyIndex]) -> None:
+        """キーインデックスを前回の同期と比較して処理結果に記録し、次回の比較の基準として保存する"""
+        if key_index is None:
+            return
+        diff = key_index.diff()
+        if 'added' in diff:
+            logger.info(
+                f"🔑 前回の同期との比較: 追加 {diff['added']}行 / 削除 {diff['removed']}行 / "
+                f"変更 {diff['changed']}行 / 変更なし {diff['unchanged']}行"
+            )
+        if self.report is not None:
+            self.report.extra['key_index'] = diff
+            if diff['duplicates_dropped']:
+                self.report.notes.append(f"主キーが重複する{diff['duplicates_dropped']}行を除きました")
+        key_index.save()
+    
+    def profile_dataset(self, dataset: Dataset) -> Optional[DataProfileStage]:
+        """
+        データセットの品質（欠損率・異なる値の数・最小値・最大値・前回からの行数の増減）を集計して検査
+        
+        集計結果は処理結果の data_profile に、しきい値を超えた項目は補足事項に記録します。
+        
+        Args:
+            dataset (Dataset): 集計するデータセット
+            
+        Returns:
+            Optional[DataProfileStage]: 集計した工程（同期の成功後に save() で次回の基準として保存）。無効な場合はNone
+            
+        Raises:
+            DataProfileError: しきい値を超え、fail_on_violation が有効な場合
+        """
+        stage = create_profile_stage(self.datafile_id)
+        if stage is None:
+            return None
+        self._begin_stage('profile')
         try:
-            # エンドポイントURL
-            endpoint = f"{self.base_url}/datafiles/{self.datafile_id}/records"
+            stage.run(dataset.iter_chunks())
+        finally:
+            if self.report is not None and stage.profile:
+                self.report.extra['data_profile'] = stage.profile
+                self.report.notes.extend(f"データ品質: {violation}" for violation in stage.violations)
+        return stage
+    
+    def resolve_schema(self, header_info: List[Dict[str, Any]]) -> SchemaPlan:
+        """
+        スキーマレジストリから変換プランを取得し、スキーマドリフトがあれば報告
+        
+        ドリフトを検出した場合は force_full_rewrite をTrueにし、
+        変更なしのスキップや差分書き込みを行わずに全件を書き直させます。
+        field_selection_param でカラムを絞り込んで取得した場合は、レジストリの登録・ドリフトの検出を行いません。
+        
+        Args:
+            header_info (List[Dict[str, Any]]): 今回のヘッダー情報
             
-            # ヘッダー設定
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json; charset=UTF-8'
-            }
+        Returns:
+            SchemaPlan: 変換プラン
+        """
+        if self._selected_field_ids(self._load_registered_header_info()):
+            # API側でカラムを絞り込んだヘッダー情報は一部のカラムしか含まないため、
+            # レジストリに登録せず（全カラムとの比較で誤ったドリフトになるため）、変換プランのみを作成
+            self.schema_plan, drift = SchemaPlan.compile(header_info), None
+        else:
+            self.schema_plan, drift = SchemaRegistry().resolve(self.datafile_id, header_info)
+        if self.columns:
+            known = {col.get('column_id', '').lower() for col in header_info} | {col.get('column_name') for col in header_info}
+            missing = [column for column in self.columns if column not in known and column.lower() not in known]
+            if missing:
+                logger.warning(f"⚠️ 許可リストのカラムがデータファイルに存在しません: {', '.join(missing)}")
+        if drift:
+            message = f"スキーマドリフトを検出: {format_drift(drift)}（全件を書き直します）"
+            logger.warning(f"⚠️ データファイル {self.datafile_id} の{message}")
+            self.force_full_rewrite = True
+            if self.report is not None:
+                self.report.notes.append(message)
+                self.report.extra['schema_drift'] = drift
+        return self.schema_plan
+    
+    def _build_headers(self) -> Dict[str, str]:
+        """
+        APIリクエスト用のヘッダーを作成
+        
+        Returns:
+            Dict[str, str]: リクエストヘッダー
+        """
+        return {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json; charset=UTF-8'
+        }
+    
+    @staticmethod
+    def build_conditional_headers(state: Dict[str, Any]) -> Dict[str, str]:
+        """
+        前回の同期状態から条件付きリクエスト用のヘッダーを作成
+        
+        Args:
+            state (Dict[str, Any]): 前回の同期状態
             
-            # パラメータ設定
-            params = {'limit': limit}
+        Returns:
+            Dict[str, str]: If-None-Match / If-Modified-Since ヘッダー
+        """
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
+    
+    def _record_validators(self, response: requests.Response) -> None:
+        """レスポンスの ETag / Last-Modified を保持"""
+        self.response_validators = {}
+        if response.headers.get('ETag'):
+            self.response_validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            self.response_validators['last_modified'] = response.headers['Last-Modified']
+    
+    def _request_page(self, limit: int, offset: int, conditional_headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        レコードを1ページ分リクエスト
+        
+        Args:
+            limit (int): 1ページあたりの取得件数
+            offset (int): 取得開始位置
+            conditional_headers (Optional[Dict[str, str]]): 条件付きリクエスト用のヘッダー
             
-            print(f"🚀 b→dash APIからデータを取得中...")
-            print(f"📡 リクエストURL: {endpoint}")
-            print(f"📊 取得予定件数: {limit}件")
+        Returns:
+            requests.Response: レスポンス
+        """
+        endpoint = f"{self.base_url}/datafiles/{self.datafile_id}/records"
+        headers = {**self._build_headers(), **(conditional_headers or {})}
+        params = self._build_params(limit, offset)
+        return self.transport.get(endpoint, headers=headers, params=params)
+    
+    def iter_pages(
+        self,
+        limit: int = 5000,
+        conditional_headers: Optional[Dict[str, str]] = None,
+        start_offset: int = 0,
+        start_page: int = 1
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        b→dash APIからページ単位でデータを取得（offsetで全件を順に取得）
+        
+        最初のページのみ条件付きリクエストとし、変更なし(304)の場合は
+        not_modified をTrueにして何も返さずに終了します。
+        ADAPTIVE_PAGE_SIZE が有効な場合は、ページごとの応答時間・大きさからページサイズを調整し、
+        スロットリング・サーバーエラーの場合はページサイズを減らして同じ位置から再試行します。
+        
+        Args:
+            limit (int): 1ページあたりの取得件数（ADAPTIVE_PAGE_SIZE の場合は学習済みの値がないときの初期値）
+            conditional_headers (Optional[Dict[str, str]]): 条件付きリクエスト用のヘッダー
+            start_offset (int): 取得を開始する位置（チェックポイントから再開する場合）
+            start_page (int): start_offset のページ番号（1の場合のみ条件付きリクエスト・ETag等の記録を行う）
             
-            # APIリクエスト
-            response = requests.get(endpoint, headers=headers, params=params)
+        Yields:
+            Dict[str, Any]: ページごとのレスポンスの result 部分
             
-            if response.status_code == 206:  # Partial Content
-                data = response.json()
-                print(f"✅ データ取得成功: {len(data.get('result', {}).get('records', []))}件")
-                return data
-            else:
-                print(f"❌ データ取得失敗: {response.status_code}")
-                print(f"エラーレスポンス: {response.text}")
-                return None
+        Raises:
+            RuntimeError: APIがエラーレスポンスを返した場合
+        """
+        offset = start_offset
+        page_no = start_page
+        self.not_modified = False
+        sizer = self._create_page_sizer(limit)
+        throttle_retries = int(env.get_config_value('SYNC_SETTINGS', 'PAGE_THROTTLE_RETRIES', 3))
+        # サーバーが全件を返したことのある最大のページサイズ
+        served = (sizer.server_max or 0) if sizer is not None else 0
+        # 件数がページサイズ未満だったページの件数（次のページで最終ページかどうかを確認する）
+        short_page: Optional[int] = None
+        # 取得中のページで再試行した回数（ページの取得に成功したら数え直す）
+        page_retries = 0
+        
+        logger.info(f"🚀 b→dash APIからページ単位でデータを取得中...")
+        logger.info(f"📡 リクエストURL: {self.base_url}/datafiles/{self.datafile_id}/records")
+        
+        try:
+            while True:
+                page_limit = sizer.size if sizer is not None else limit
+                started = time.perf_counter()
+                try:
+                    response = self._request_page(page_limit, offset, conditional_headers if page_no == 1 else None)
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    if sizer is None or page_retries >= throttle_retries:
+                        raise
+                    page_retries += 1
+                    time.sleep(sizer.throttled())
+                    continue
+                elapsed = time.perf_counter() - started
                 
-        except Exception as e:
-            print(f"❌ データ取得エラー: {e}")
+                if response.status_code == 304 and page_no == 1:
+                    self.not_modified = True
+                    logger.info("✅ 前回の同期からデータに変更はありません (304 Not Modified)")
+                    return
+                
+                if (
+                    sizer is not None and response.status_code in THROTTLE_STATUS_CODES
+                    and page_retries < throttle_retries
+                ):
+                    # ページサイズを小さくして同じ位置から再試行
+                    page_retries += 1
+                    time.sleep(sizer.throttled(response.status_code, response.headers.get('Retry-After')))
+                    continue
+                
+                if response.status_code == 416 and short_page is not None:
+                    # 直前の件数がページサイズ未満のページが最終ページだった
+                    break
+                
+                if response.status_code not in (200, 206):
+                    raise RuntimeError(
+                        f"データ取得失敗: {response.status_code} (offset={offset}) {response.text}"
+                    )
+                
+                page_retries = 0
+                if page_no == 1:
+                    self._record_validators(response)
+                
+                result = decode_response(response.content).get('result', {})
+                records = result.get('records', [])
+                if not records and short_page is not None:
+                    break
+                if short_page is not None:
+                    # 件数がページサイズ未満のページの後にも続きがある場合は、サーバー側の上限で切り詰められている
+                    logger.warning(f"⚠️ サーバーが1ページあたり {short_page}件までしか返さないため、ページサイズを制限します")
+                    sizer.cap(short_page)
+                    short_page = None
+                logger.info(f"   → ページ{page_no}: {len(records)}件 (offset={offset})")
+                if sizer is not None and len(records) == page_limit:
+                    # 最終ページは件数に対してリクエストの固定の時間が大きく見えるため、推定に使用しない
+                    sizer.observe(len(records), elapsed, len(response.content))
+                    served = max(served, page_limit)
+                yield result
+                
+                # 取得件数がページサイズ未満なら最終ページ
+                # （ページサイズを調整している場合は、そのサイズを返したことがなければサーバー側の上限の
+                #   可能性があるため、空のページか範囲外（416）になるまで次のページを確認する）
+                if len(records) < page_limit:
+                    if sizer is None or not records or page_limit <= served:
+                        break
+                    short_page = len(records)
+                offset += len(records)
+                page_no += 1
+        finally:
+            if sizer is not None:
+                sizer.save()
+                if self.report is not None:
+                    self.report.extra['page_size'] = sizer.summary()
+    
+    def _create_page_sizer(self, limit: int) -> Optional[AdaptivePageSizer]:
+        """ページサイズの自動調整を作成（記録したレスポンスの再生時は記録時のページサイズを使うため作成しない）"""
+        if self.offline:
             return None
+        return create_page_sizer(self.datafile_id, limit)
     
-    def convert_to_dataframe(self, data: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    def fetch_dataframe(
+        self,
+        limit: int = 5000,
+        conditional_headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[pd.DataFrame], List[Dict[str, Any]]]:
         """
-        APIレスポンスをPandasのDataFrameに変換
+        全ページを順に取得してDataFrameに変換（DECODE_WORKERS=0 の場合）
+        
+        取得するページは並列変換（fetch_dataframe_parallel）と同じです。
+        ページごとに変換してから結合し、配信年月で並べ替えます。
         
         Args:
-            data (Dict[str, Any]): APIレスポンスデータ
+            limit (int): 1ページあたりの取得件数
+            conditional_headers (Optional[Dict[str, str]]): 条件付きリクエスト用のヘッダー（最初のページのみ）
             
         Returns:
-            Optional[pd.DataFrame]: 変換後のDataFrame、エラー時はNone
+            Tuple[Optional[pd.DataFrame], List[Dict[str, Any]]]:
+                (変換後のDataFrame（304・レコードなしの場合はNone）, ヘッダー情報)
+                
+        Raises:
+            RuntimeError: APIがエラーレスポンスを返した場合
         """
-        try:
-            if 'result' not in data:
-                print("❌ データの構造が不正です")
-                return None
-            
-            result = data['result']
-            header_info = result.get('header_info', [])
+        header_info: List[Dict[str, Any]] = []
+        partitions: List[pd.DataFrame] = []
+        fetched = 0
+        for result in self.iter_pages(limit, conditional_headers):
+            if not header_info:
+                header_info = result.get('header_info', [])
+                self.resolve_schema(header_info)
             records = result.get('records', [])
+            fetched += len(records)
+            if len(records):
+                partitions.append(self.convert_page(result, header_info))
+        if self.not_modified:
+            return None, []
+        
+        if not header_info or not partitions:
+            logger.error("❌ ヘッダー情報またはレコードが見つかりません")
+            return None, header_info
+        
+        df = pd.concat(partitions, ignore_index=True) if len(partitions) > 1 else partitions[0]
+        if self.row_filter:
+            logger.info(f"🔎 絞り込み後: {len(df)}行 / 取得 {fetched}行")
+        logger.info(f"📊 DataFrame作成完了: {len(df)}行 × {len(df.columns)}列")
+        return self.sort_by_delivery_month(df), header_info
+    
+    def fetch_dataframe_parallel(
+        self,
+        limit: int = 5000,
+        workers: int = 4,
+        conditional_headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[pd.DataFrame], List[Dict[str, Any]]]:
+        """
+        全ページを取得し、JSONのデコードとDataFrame構築をプロセスプールで並列に実行
+        
+        ワーカーがデコードしている間に次のページを先読みします（最大 workers ページ）。
+        最終ページ（件数がページサイズ未満）が判明した時点で先読みを止め、
+        パーティションをページ順に結合してから配信年月で並べ替えます。
+        ADAPTIVE_PAGE_SIZE が有効な場合は最終ページの続きを確認し、サーバー側の上限で
+        切り詰められていたときはその件数にページサイズを制限して取得し直します。
+        
+        Args:
+            limit (int): 1ページあたりの取得件数
+            workers (int): ワーカープロセス数
+            conditional_headers (Optional[Dict[str, str]]): 条件付きリクエスト用のヘッダー（最初のページのみ）
             
-            if not header_info or not records:
-                print("❌ ヘッダー情報またはレコードが見つかりません")
-                return None
-            
-            # DataFrameを作成
-            df = pd.DataFrame(records)
-            
-            # カラム名のマッピングを作成（内部ID → 日本語名）
-            column_mapping = {}
-            for col in header_info:
-                # 内部的なカラムIDを小文字に変換
-                internal_id = col.get('column_id', '').lower()
-                # 実際のレコードで使用されている形式に合わせる
-                for record in records:
-                    for key in record.keys():
-                        if key.lower() == internal_id:
-                            column_mapping[key] = col.get('column_name', key)
-                            break
-            
-            # カラム名を日本語名に変換
-            original_columns = df.columns.tolist()
-            new_columns = []
-            for col in original_columns:
-                japanese_name = column_mapping.get(col, col)
-                new_columns.append(japanese_name)
-            
-            df.columns = new_columns
-            
-            # 配信年月で並べ替え（昇順）
-            date_column = None
-            for col in df.columns:
-                if '配信年月' in col or '年月' in col:
-                    date_column = col
+        Returns:
+            Tuple[Optional[pd.DataFrame], List[Dict[str, Any]]]:
+                (変換後のDataFrame（304・レコードなしの場合はNone）, ヘッダー情報)
+                
+        Raises:
+            RuntimeError: APIがエラーレスポンスを返した場合
+        """
+        self.not_modified = False
+        # 先読みするページの位置を固定するため、実行中はページサイズを変えない
+        sizer = self._create_page_sizer(limit)
+        if sizer is not None:
+            limit = sizer.size
+        futures: Dict[int, Future] = {}
+        last_page: Optional[int] = None
+        page_no = 0
+        
+        logger.info(f"🚀 b→dash APIからページ単位でデータを取得中（並列変換: {workers}プロセス）...")
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while last_page is None:
+                # 完了したページから最終ページを判定
+                for done_page, future in futures.items():
+                    if future.done() and future.result()[0] < limit:
+                        last_page = done_page if last_page is None else min(last_page, done_page)
+                if last_page is not None:
+                    break
+                
+                # 先読みは workers ページまでに抑える
+                pending = [future for future in futures.values() if not future.done()]
+                if len(pending) >= workers:
+                    wait(pending, return_when=FIRST_COMPLETED)
+                    continue
+                
+                response = self._request_page(limit, page_no * limit, conditional_headers if page_no == 0 else None)
+                if response.status_code == 304 and page_no == 0:
+                    self.not_modified = True
+                    logger.info("✅ 前回の同期からデータに変更はありません (304 Not Modified)")
+                    return None, []
+                if response.status_code == 416 and page_no > 0:
+                    # 先読みが範囲外に達した（直前のページが最終ページ）
+                    last_page = page_no - 1
                     break
+                if response.status_code not in (200, 206):
+                    raise RuntimeError(
+                        f"データ取得失敗: {response.status_code} (offset={page_no * limit}) {response.text}"
+                    )
+                if page_no == 0:
+                    self._record_validators(response)
+                
+                futures[page_no] = executor.submit(decode_page, response.content, None, self.columns, self.row_filter)
+                page_no += 1
             
-            if date_column:
-                print(f"📅 配信年月カラム '{date_column}' で昇順に並べ替えます")
-                try:
-                    # YYYY/MM形式をYYYY-MM-01形式に変換してソート
-                    df['_sort_date'] = pd.to_datetime(df[date_column] + '/01', format='%Y/%m/%d', errors='coerce')
-                    df_sorted = df.sort_values('_sort_date', ascending=True)
-                    df_sorted = df_sorted.drop('_sort_date', axis=1)  # ソート用カラムを削除
-                    df = df_sorted
-                    print(f"✅ 配信年月で昇順に並べ替えました")
-                except Exception as e:
-                    print(f"⚠️ 配信年月の並べ替えに失敗: {e}")
-                    print("📋 元の順序でデータを処理します")
-            
-            print(f"📊 DataFrame作成完了: {len(df)}行 × {len(df.columns)}列")
-            return df
+            results = [futures[n].result() for n in sorted(futures) if n <= last_page]
+        
+        last_count = results[-1][0] if results else 0
+        if sizer is not None and 0 < last_count < limit and not sizer.server_max:
+            # 最終ページの続きがある場合は、サーバー側の上限で切り詰められている（上限に合わせて取得し直す）
+            probe = self._request_page(limit, last_page * limit + last_count)
+            if probe.status_code in (200, 206) and decode_response(probe.content).get('result', {}).get('records'):
+                logger.warning(f"⚠️ サーバーが1ページあたり {last_count}件までしか返さないため、ページサイズを制限して取得し直します")
+                sizer.cap(last_count)
+                sizer.save()
+                return self.fetch_dataframe_parallel(limit, workers, conditional_headers)
+        
+        header_info = results[0][2] if results else []
+        partitions = [ipc_to_dataframe(ipc) for _, ipc, _ in results if ipc is not None]
+        logger.info(f"✅ データ取得・変換完了: {sum(count for count, _, _ in results)}件 ({len(results)}ページ)")
+        
+        if not partitions:
+            logger.error("❌ ヘッダー情報またはレコードが見つかりません")
+            return None, header_info
+        
+        df = pd.concat(partitions, ignore_index=True)
+        return self.sort_by_delivery_month(df), header_info
+    
+    def convert_page(self, result: Dict[str, Any], header_info: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        1ページ分のレコードを日本語カラム名のDataFrameに変換（並べ替えは行わない）
+        
+        Args:
+            result (Dict[str, Any]): ページのレスポンスの result 部分
+            header_info (List[Dict[str, Any]]): ヘッダー情報（最初のページのもの）
             
-        except Exception as e:
-            print(f"❌ DataFrame変換エラー: {e}")
-            return None
+        Returns:
+            pd.DataFrame: 変換後のDataFrame
+        """
+        return records_to_dataframe(result.get('records', []), header_info, self.schema_plan, self.columns, self.row_filter)
     
-    def save_to_csv(self, df: pd.DataFrame, filename: Optional[str] = None) -> Optional[str]:
+    def sort_by_delivery_month(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        DataFrameをCSVファイルとして保存
+        配信年月カラムで昇順に並べ替え（配信年月カラムがない・変換できない場合は元の順序）
         
         Args:
-            df (pd.DataFrame): 保存するDataFrame
-            filename (Optional[str]): ファイル名（Noneの場合は自動生成）
+            df (pd.DataFrame): 並べ替えるDataFrame
             
         Returns:
-            Optional[str]: 保存したファイルのパス、エラー時はNone
+            pd.DataFrame: 並べ替え後のDataFrame
         """
+        date_column = find_date_column(df.columns.tolist())
+
+        if date_column:
+            logger.info(f"📅 配信年月カラム '{date_column}' で昇順に並べ替えます")
+            try:
+                # YYYY/MM形式をYYYY-MM-01形式に変換してソート
+                df['_sort_date'] = pd.to_datetime(df[date_column] + '/01', format='%Y/%m/%d', errors='coerce')
+                df_sorted = df.sort_values('_sort_date', ascending=True)
+                df_sorted = df_sorted.drop('_sort_date', axis=1)  # ソート用カラムを削除
+                df = df_sorted
+                logger.info(f"✅ 配信年月で昇順に並べ替えました")
+            except Exception as e:
+                logger.warning(f"⚠️ 配信年月の並べ替えに失敗: {e}")
+                logger.info("📋 元の順序でデータを処理します")
+        
+        return df
+    
+    @staticmethod
+    def _skip_unchanged_enabled() -> bool:
+        """変更がない場合のスキップが有効かどうか（FORCE_FULL_CHECK が優先）"""
+        if env.get_config_value('SYNC_SETTINGS', 'FORCE_FULL_CHECK', False):
+            return False
+        return bool(env.get_config_value('SYNC_SETTINGS', 'SKIP_UNCHANGED', True))
+    
+    @staticmethod
+    def _is_unchanged(previous_state: Dict[str, Any], fingerprint: Dict[str, Any]) -> bool:
+        """前回アップロード時とスキーマ・内容が一致するかどうか"""
+        return bool(previous_state) and all(
+            previous_state.get(key) == value for key, value in fingerprint.items()
+        )
+    
+    def sync_data_to_spreadsheet(self, limit: int = 5000) -> bool:
+        """
+        b→dash APIから全ページを取得してスプレッドシートに同期
+        
+        Args:
+            limit (int): 1ページあたりの取得件数
+            
+        Returns:
+            bool: 同期成功時はTrue、失敗時はFalse
+        """
+        fanout = None
         try:
-            # dataフォルダを作成
-            os.makedirs('data', exist_ok=True)
+            logger.info("🚀 b→dash APIデータ同期開始")
+            logger.info("=" * 60)
             
-            # ファイル名を生成
-            if filename is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"bdash_datafile_{self.datafile_id}_{timestamp}.csv"
+            # 1. API認証情報の設定
+            if not self.setup_api_credentials():
+                return False
             
-            filepath = f'data/{filename}'
+            # 2. データ取得（前回の同期状態を使った条件付きリクエスト）
+            state_store = SyncStateStore()
+            previous_state = state_store.get(self.datafile_id)
+            skip_unchanged = self._skip_unchanged_enabled() and not self.offline
+            # 突き合わせる場合は、変更がなくても比較するデータを取得する
+            use_conditional = skip_unchanged and not self.reconcile_requested
+            conditional_headers = self.build_conditional_headers(previous_state) if use_conditional else None
             
-            # CSVファイルとして保存（UTF-8 BOM付きで保存してExcelでも正しく表示）
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            # 2-3. 全ページを取得してDataFrameに変換（DECODE_WORKERS の場合はプロセスプールで並列に変換）
+            decode_workers = env.get_config_value('SYNC_SETTINGS', 'DECODE_WORKERS', 0)
+            self._begin_stage('fetch')
+            if decode_workers:
+                df, header_info = self.fetch_dataframe_parallel(limit, decode_workers, conditional_headers)
+                if df is not None:
+                    df = self.resolve_schema(header_info).apply_dtypes(df)
+            else:
+                df, header_info = self.fetch_dataframe(limit, conditional_headers)
             
-            print(f"✅ CSVファイルを保存しました: {filepath}")
-            print(f"📊 保存データ: {len(df)}行 × {len(df.columns)}列")
+            if self.not_modified:
+                logger.info("⏭️ 変更がないため、変換・保存・転記をスキップします")
+                self._record_result(previous_state.get('row_count', 0), 0, skipped=True)
+                return True
+            if df is None:
+                return False
+            
+            # 3-0. 主キーが設定されていれば重複する行を除く
+            key_index = create_key_index(self.datafile_id)
+            if key_index is not None:
+                df = key_index.filter(df)
+            
+            # 3-1. データ品質を集計・検査（しきい値を超えた場合は転記せずに失敗）
+            profile_stage = self.profile_dataset(Dataset.from_frame(df))
+            
+            # 3-2. フィンガープリントを前回アップロード時と比較
+            hasher = ContentHasher()
+            hasher.update(df)
+            fingerprint = {
+                'schema_hash': schema_fingerprint(header_info),
+                'content_hash': hasher.hexdigest(),
+                'row_count': len(df),
+            }
+            if skip_unchanged and not self.force_full_rewrite and self._is_unchanged(previous_state, fingerprint):
+                state_store.save(self.datafile_id, {**fingerprint, **self.response_validators})
+                logger.info("⏭️ データ内容に変更がないため、保存・転記をスキップします")
+                self._record_result(len(df), len(df.columns), skipped=True)
+                if profile_stage is not None:
+                    profile_stage.save()
+                self._save_key_index(key_index)
+                self.reconcile_sheet(Dataset.from_frame(df))
+                return True
+            
+            # 4-5. スプレッドシート・CSVなどのシンクへ並行して出力（主シンクの完了を待つ）
+            self._begin_stage('deliver')
+            fanout = self.deliver(Dataset.from_frame(df))
+            if not fanout.primary_succeeded:
+                logger.error("❌ スプレッドシートへの転記に失敗しました")
+                return False
+            
+            # 6. アップロードに成功したフィンガープリント・データプロファイルを保存
+            state_store.save(self.datafile_id, {**fingerprint, **self.response_validators})
+            self._record_result(len(df), len(df.columns))
+            if profile_stage is not None:
+                profile_stage.save()
+            self._save_key_index(key_index)
+            self.reconcile_sheet(None)
+            
+            logger.info("=" * 60)
+            logger.info("🎉 b→dash APIデータ同期完了")
+            logger.info(f"📊 処理データ: {len(df)}行 × {len(df.columns)}列")
+            
+            # 配信年月の範囲を表示
+            date_column = find_date_column(df.columns.tolist())
             
-            return filepath
+            if date_column and date_column in df.columns:
+                date_values = df[date_column].dropna().unique()
+                if len(date_values) > 0:
+                    logger.info(f"📅 配信年月の範囲: {min(date_values)} ～ {max(date_values)}")
+                    logger.info(f"📊 配信年月の種類: {len(date_values)}種類")
+            
+            return True
             
         except Exception as e:
-            print(f"❌ CSV保存エラー: {e}")
-            return None
+            logger.error(f"❌ データ同期エラー: {e}", exc_info=True)
+            self._record_error(e)
+            return False
+        finally:
+            if fanout is not None:
+                # 任意シンク（CSVなど）の完了を待ち、失敗を処理結果に記録する
+                fanout.close()
+                self._record_sinks(fanout.results)
+    
+    @staticmethod
+    def _checkpoint_enabled() -> bool:
+        """チェックポイントによる途中からの再開が有効かどうか"""
+        return bool(env.get_config_value('SYNC_SETTINGS', 'CHECKPOINT_ENABLED', False))
+    
+    def _checkpoint_key(self, limit: int) -> str:
+        """取得条件（ページサイズ・カラムの許可リスト・絞り込み条件・主キー）のキー。変わった場合は再開しない"""
+        conditions = {
+            'limit': limit,
+            'columns': self.columns,
+            'filters': [
+                [predicate.column, predicate.op, predicate.values] for predicate in self.row_filter.predicates
+            ] if self.row_filter else None,
+            'cutoff_month': self.row_filter.cutoff_month if self.row_filter else None,
+            'primary_key': env.get_datafile_config_value(self.datafile_id, 'primary_key', 'BDASH', ''),
+        }
+        return schema_fingerprint([conditions])
+    
+    def sync_data_streaming(self, limit: int = 5000) -> bool:
+        """
+        アウトオブコア方式でb→dash APIからデータを取得してスプレッドシートに同期
+        
+        取得したページは即座にDataFrameへ変換してディスク上のチャンクに退避し、
+        CSV保存・スプレッドシート転記もチャンク単位で行うため、
+        データファイルの行数に関わらずメモリ使用量が一定に保たれます。
+        
+        CHECKPOINT_ENABLED の場合は退避したページ・書き込んだ行数をチェックポイントに記録し、
+        失敗した同期を次回の実行（または CHECKPOINT_RETRIES 回までの自動再試行）で途中から再開します。
+        
+        Args:
+            limit (int): 1ページあたりの取得件数
+            
+        Returns:
+            bool: 同期成功時はTrue、失敗時はFalse
+        """
+        checkpoint = None
+        retries = 0
+        if self._checkpoint_enabled():
+            checkpoint = SyncCheckpoint(
+                self.datafile_id,
+                max_age_hours=env.get_config_value('SYNC_SETTINGS', 'CHECKPOINT_MAX_AGE_HOURS', 24)
+            )
+            retries = env.get_config_value('SYNC_SETTINGS', 'CHECKPOINT_RETRIES', 0)
+        
+        for attempt in range(retries + 1):
+            if self._sync_streaming_once(limit, checkpoint):
+                return True
+            # チェックポイントが残っていない失敗（設定・データの不備など）は再試行しても同じ結果になる
+            if checkpoint is None or not checkpoint.active or attempt == retries:
+                break
+            wait_sec = env.get_config_value('SYNC_SETTINGS', 'CHECKPOINT_RETRY_WAIT_SEC', 30)
+            logger.info(f"🔁 {wait_sec}秒後にチェックポイントから再試行します（{attempt + 1}/{retries}回目）")
+            if self.report is not None and self.report.error:
+                self.report.notes.append(f"再試行前のエラー: {self.report.error}")
+                self.report.error = None
+            time.sleep(wait_sec)
+        return False
     
-    def upload_to_spreadsheet(self, csv_path: str) -> bool:
+    def _sync_streaming_once(self, limit: int, checkpoint: Optional[SyncCheckpoint] = None) -> bool:
         """
-        CSVファイルをGoogleスプレッドシートにアップロード
+        ストリーミング方式の同期を1回実行（チェックポイントがあれば記録した位置から再開）
         
         Args:
-            csv_path (str): アップロードするCSVファイルのパス
+            limit (int): 1ページあたりの取得件数
+            checkpoint (Optional[SyncCheckpoint]): 進捗を記録するチェックポイント
             
         Returns:
-            bool: アップロード成功時はTrue、失敗時はFalse
+            bool: 同期成功時はTrue、失敗時はFalse
         """
+        store = None
+        fanout = None
         try:
-            # サービスアカウントファイルのパスを取得
-            credentials_path = env.get_service_account_file()
+            logger.info("🚀 b→dash APIデータ同期開始（ストリーミングモード）")
+            logger.info("=" * 60)
             
-            # スプレッドシートIDを取得
-            spreadsheet_id = env.get_config_value('SPREADSHEET', 'ssid', '')
-            if not spreadsheet_id:
-                print("❌ スプレッドシートIDが設定されていません")
+            # 1. API認証情報の設定
+            if not self.setup_api_credentials():
                 return False
             
-            print(f"📋 スプレッドシートID: {spreadsheet_id}")
-            print(f"🔐 認証ファイル: {credentials_path}")
+            # 2. ページ単位で取得し、ディスク上のチャンクに退避（チェックポイントがあれば続きから）
+            spill_dir = env.get_project_root() / env.get_config_value(
+                'SYNC_SETTINGS', 'SPILL_DIR', 'data/spill'
+            ) / str(self.datafile_id)
+            config_key = self._checkpoint_key(limit)
+            resumed = checkpoint is not None and checkpoint.load(config_key)
+            if resumed and checkpoint.state.get('chunk_count', 0) and not spill_dir.exists():
+                logger.warning("⚠️ 退避したチャンクが見つからないため、チェックポイントを破棄して最初から取得します")
+                checkpoint.clear()
+                resumed = False
+            
+            # 書き込みを始めた後のチェックポイントの場合、シートは書きかけのため変更なしでもスキップしない
+            write_resumed = resumed and checkpoint.state.get('phase') == 'write'
+            store = ChunkStore(spill_dir, resume=resumed)
+            key_index = create_key_index(self.datafile_id)
+            header_info = None
+            page_hashes: List[str] = []
+            offset, page_no = 0, 0
+            if resumed:
+                state = checkpoint.state
+                store.restore(state.get('columns', []), state.get('row_count', 0), state.get('chunk_count', 0))
+                header_info = state.get('header_info')
+                if header_info is not None:
+                    self.resolve_schema(header_info)
+                self.response_validators = state.get('validators', {})
+                page_hashes = list(state.get('page_hashes', []))
+                offset, page_no = state.get('next_offset', 0), state.get('page_no', 0)
+                if key_index is not None:
+                    # 退避済みのチャンクから主キーのインデックスを復元
+                    for chunk in store.iter_sorted_chunks():
+                        key_index.filter(chunk)
+            elif checkpoint is not None:
+                checkpoint.start(config_key, limit=limit, spill_dir=str(spill_dir))
             
-            # CSVファイルをスプレッドシートにアップロード
-            result = upload_csv_to_sheet(csv_path, credentials_path, spreadsheet_id)
+            state_store = SyncStateStore()
+            previous_state = state_store.get(self.datafile_id)
+            skip_unchanged = self._skip_unchanged_enabled() and not self.offline
+            use_conditional = skip_unchanged and not resumed and not self.reconcile_requested
+            conditional_headers = self.build_conditional_headers(previous_state) if use_conditional else None
             
-            if result:
-                print("✅ スプレッドシートへの転記が完了しました")
+            self._begin_stage('fetch')
+            if not write_resumed:
+                for result in self.iter_pages(limit, conditional_headers, offset, page_no + 1):
+                    if header_info is None:
+                        header_info = result.get('header_info', [])
+                        self.resolve_schema(header_info)
+                    page_df = self.convert_page(result, header_info)
+                    if key_index is not None:
+                        page_df = key_index.filter(page_df)
+                    page_hasher = ContentHasher()
+                    page_hasher.update(page_df)
+                    page_hashes.append(page_hasher.hexdigest())
+                    store.append(page_df)
+                    offset += len(result.get('records', []))
+                    page_no += 1
+                    if checkpoint is not None:
+                        if 'header_info' not in checkpoint.state or checkpoint.state.get('columns') != store.columns:
+                            checkpoint.update(
+                                header_info=header_info,
+                                validators=self.response_validators,
+                                columns=list(store.columns)
+                            )
+                        # ページの退避が完了した時点を再開位置としてジャーナルに追記
+                        checkpoint.append_page(
+                            page_hashes[-1],
+                            next_offset=offset,
+                            page_no=page_no,
+                            row_count=store.row_count,
+                            chunk_count=store.chunk_count
+                        )
+            
+            if self.not_modified:
+                logger.info("⏭️ 変更がないため、変換・保存・転記をスキップします")
+                self._record_result(previous_state.get('row_count', 0), 0, skipped=True)
+                if checkpoint is not None:
+                    checkpoint.clear()
                 return True
-            else:
-                print("❌ スプレッドシートへの転記に失敗しました")
+            
+            if not header_info or store.row_count == 0:
+                logger.error("❌ ヘッダー情報またはレコードが見つかりません")
+                if checkpoint is not None:
+                    checkpoint.clear()
                 return False
-                
+            logger.info(f"📊 チャンク退避完了: {store.row_count}行 × {len(store.columns)}列")
+            
+            # 2-1. データ品質を集計・検査（しきい値を超えた場合は再開せず、次回は最初から取得）
+            try:
+                profile_stage = self.profile_dataset(Dataset.from_store(store))
+            except DataProfileError:
+                if checkpoint is not None:
+                    checkpoint.clear()
+                raise
+            
+            # 2-2. フィンガープリントを前回アップロード時と比較
+            fingerprint = {
+                'schema_hash': schema_fingerprint(header_info),
+                'content_hash': ContentHasher.combine(page_hashes),
+                'row_count': store.row_count,
+            }
+            if checkpoint is not None and checkpoint.state.get('phase') == 'fetch':
+                checkpoint.update(phase='write', rows_written=0)
+            if (
+                skip_unchanged and not self.force_full_rewrite and not write_resumed
+                and self._is_unchanged(previous_state, fingerprint)
+            ):
+                state_store.save(self.datafile_id, {**fingerprint, **self.response_validators})
+                logger.info("⏭️ データ内容に変更がないため、保存・転記をスキップします")
+                self._record_result(store.row_count, len(store.columns), skipped=True)
+                if profile_stage is not None:
+                    profile_stage.save()
+                self._save_key_index(key_index)
+                if checkpoint is not None:
+                    checkpoint.clear()
+                self.reconcile_sheet(Dataset.from_store(store))
+                return True
+            
+            # 3-4. スプレッドシート・CSVなどのシンクへ並行して出力（各シンクが退避チャンクを順に読み出す）
+            self._begin_stage('deliver')
+            fanout = self.deliver(Dataset.from_store(store), checkpoint)
+            if not fanout.primary_succeeded:
+                logger.error("❌ スプレッドシートへの転記に失敗しました")
+                return False
+            
+            # 5. アップロードに成功したフィンガープリント・データプロファイルを保存
+            state_store.save(self.datafile_id, {**fingerprint, **self.response_validators})
+            self._record_result(store.row_count, len(store.columns))
+            if profile_stage is not None:
+                profile_stage.save()
+            self._save_key_index(key_index)
+            if checkpoint is not None:
+                checkpoint.clear()
+            self.reconcile_sheet(None)
+            
+            logger.info("=" * 60)
+            logger.info("🎉 b→dash APIデータ同期完了（ストリーミングモード）")
+            logger.info(f"📊 処理データ: {store.row_count}行 × {len(store.columns)}列")
+            return True
+            
         except Exception as e:
-            print(f"❌ スプレッドシート転記エラー: {e}")
+            logger.error(f"❌ データ同期エラー: {e}", exc_info=True)
+            self._record_error(e)
             return False
+        finally:
+            if fanout is not None:
+                # 任意シンクが退避チャンクを読み終えるまで待ってから削除する
+                fanout.close()
+                self._record_sinks(fanout.results)
+            # 再開に使用するチェックポイントが残っている場合は退避チャンクも残す
+            if store is not None and (checkpoint is None or not checkpoint.active):
+                store.cleanup()
     
-    def sync_data_to_spreadsheet(self, limit: int = 5000) -> bool:
+    def sync_data_pipelined(self, limit: int = 5000) -> bool:
         """
-        b→dash APIからデータを取得してスプレッドシートに同期
+        取得・変換・書き込みを重ねて実行するパイプライン方式でスプレッドシートに同期
+        
+        ページ N+1 の取得、ページ N の変換、ページ N-1 のシートへの書き込みを別スレッドで並行に行い、
+        工程間は上限付きキュー（PIPELINE_QUEUE_SIZE）でつなぎます。処理時間は各工程の合計ではなく
+        最も遅い工程に近づきます。シートには取得順に追記し、最後にシート上で配信年月の昇順に並べ替えます。
+        スプレッドシート以外のシンクには、変換時にディスクへ退避したチャンクから出力します。
+        
+        書き込みながら取得するため、内容のハッシュによる変更なしのスキップは行いません（304 は有効。
+        突き合わせを依頼されている場合は条件付きリクエストを使わず、全件を書き直して一致させます）。
+        追記先は非表示のシャドーシートで、並べ替え・データ品質の検査に合格してから転記先のシートへ反映します。
+        取得が終わる前に転記先のシートを空にしないよう、STAGED_UPLOAD が無効な場合と、
+        シャーディング・チェックポイントが有効な場合はストリーミング方式で同期します。
         
         Args:
-            limit (int): 取得するレコード数の上限
+            limit (int): 1ページあたりの取得件数
             
         Returns:
             bool: 同期成功時はTrue、失敗時はFalse
         """
+        if self._checkpoint_enabled():
+            logger.info("⏩ チェックポイントが有効なため、ストリーミング方式で同期します")
+            return self.sync_data_streaming(limit)
+        
+        store = None
+        fanout = None
+        shadow = None
         try:
-            print("🚀 b→dash APIデータ同期開始")
-            print("=" * 60)
+            logger.info("🚀 b→dash APIデータ同期開始（パイプラインモード）")
+            logger.info("=" * 60)
             
-            # 1. API認証情報の設定
+            # 1. API認証情報の設定・スプレッドシートへの接続
             if not self.setup_api_credentials():
                 return False
-            
-            # 2. データ取得
-            data = self.fetch_data(limit)
-            if not data:
+            spreadsheet_id = env.get_datafile_config_value(self.datafile_id, 'ssid', 'SPREADSHEET', '')
+            if not spreadsheet_id:
+                logger.error("❌ スプレッドシートIDが設定されていません")
                 return False
+            if create_shard_writer(self.datafile_id, env.get_service_account_file(), spreadsheet_id) is not None:
+                logger.info("🧩 シャーディングが有効なため、ストリーミング方式で同期します")
+                return self.sync_data_streaming(limit)
             
-            # 3. DataFrameに変換
-            df = self.convert_to_dataframe(data)
-            if df is None:
-                return False
+            # 非表示のシャドーシートに追記し、並べ替え・検査まで終えてから一度に反映
+            shadow = create_shadow_worksheet(self.datafile_id, env.get_service_account_file(), spreadsheet_id)
+            if shadow is None:
+                logger.info("⏩ STAGED_UPLOAD が無効なため、ストリーミング方式で同期します（取得中に転記先のシートを空にしない）")
+                return self.sync_data_streaming(limit)
             
-            # 4. CSVファイルとして保存
-            csv_path = self.save_to_csv(df)
-            if not csv_path:
-                return False
+            spill_dir = env.get_project_root() / env.get_config_value(
+                'SYNC_SETTINGS', 'SPILL_DIR', 'data/spill'
+            ) / str(self.datafile_id)
+            store = ChunkStore(spill_dir)
+            key_index = create_key_index(self.datafile_id)
+            hasher = ContentHasher()
+            header_info: List[Dict[str, Any]] = []
             
-            # 5. スプレッドシートにアップロード
-            if not self.upload_to_spreadsheet(csv_path):
+            state_store = SyncStateStore()
+            previous_state = state_store.get(self.datafile_id)
+            skip_unchanged = self._skip_unchanged_enabled() and not self.offline
+            # 突き合わせる場合は、変更がなくても全件を書き直して一致させる
+            use_conditional = skip_unchanged and not self.reconcile_requested
+            conditional_headers = self.build_conditional_headers(previous_state) if use_conditional else None
+            
+            def convert(result: Dict[str, Any]) -> pd.DataFrame:
+                nonlocal header_info
+                if not header_info:
+                    header_info = result.get('header_info', [])
+                    self.resolve_schema(header_info)
+                page_df = self.convert_page(result, header_info)
+                if key_index is not None:
+                    page_df = key_index.filter(page_df)
+                hasher.update(page_df)
+                store.append(page_df)
+                return page_df
+            
+            # 2. 取得 → 変換 → 書き込みを上限付きキューでつないで並行に実行
+            self._begin_stage('pipeline')
+            queue_size = env.get_config_value('SYNC_SETTINGS', 'PIPELINE_QUEUE_SIZE', 2)
+            chunk_rows = env.get_config_value('SPREADSHEET', 'WRITE_CHUNK_ROWS', 5000)
+            timings: Dict[str, float] = {}
+            pages = background(self.iter_pages(limit, conditional_headers), queue_size, 'fetch', timings)
+            frames = map_stage(convert, pages, queue_size, 'convert', timings)
+            
+            appender: Optional[SheetAppender] = None
+            try:
+                for page_df in frames:
+                    if page_df.empty:
+                        continue
+                    started = time.perf_counter()
+                    if appender is None:
+                        headers = header_values(page_df)
+                        appender = SheetAppender(shadow.open(2, len(headers)), headers, chunk_rows)
+                        appender.start()
+                    appender.append(page_df)
+                    timings['write'] = timings.get('write', 0.0) + time.perf_counter() - started
+            finally:
+                frames.close()
+            
+            if self.not_modified:
+                logger.info("⏭️ 変更がないため、変換・保存・転記をスキップします")
+                self._record_result(previous_state.get('row_count', 0), 0, skipped=True)
+                return True
+            if appender is None:
+                logger.error("❌ ヘッダー情報またはレコードが見つかりません")
                 return False
             
-            print("=" * 60)
-            print("🎉 b→dash APIデータ同期完了")
-            print(f"📊 処理データ: {len(df)}行 × {len(df.columns)}列")
+            written_rows = appender.finish(find_date_column(store.columns))
+            # データ品質の検査に合格してから反映（不合格の場合は転記先のシートを更新しない）
+            profile_stage = self.profile_dataset(Dataset.from_store(store))
+            shadow.promote(written_rows + 1, len(appender.headers))
+            logger.info(f"✅ パイプライン書き込み完了: {written_rows}行 × {len(store.columns)}列")
+            logger.info("⏱️ 工程ごとの処理時間: " + " / ".join(f"{name} {sec:.1f}秒" for name, sec in timings.items()))
+            if self.report is not None:
+                self.report.extra['pipeline_stages'] = {name: round(sec, 3) for name, sec in timings.items()}
             
-            # 配信年月の範囲を表示
-            date_column = None
-            for col in df.columns:
-                if '配信年月' in col or '年月' in col:
-                    date_column = col
-                    break
+            # 3. アップロードに成功したフィンガープリントを保存
+            fingerprint = {
+                'schema_hash': schema_fingerprint(header_info),
+                'content_hash': hasher.hexdigest(),
+                'row_count': store.row_count,
+            }
+            state_store.save(self.datafile_id, {**fingerprint, **self.response_validators})
+            self._record_result(store.row_count, len(store.columns))
+            if profile_stage is not None:
+                profile_stage.save()
+            self._save_key_index(key_index)
+            self.reconcile_sheet(None)
             
-            if date_column and date_column in df.columns:
-                date_values = df[date_column].dropna().unique()
-                if len(date_values) > 0:
-                    print(f"📅 配信年月の範囲: {min(date_values)} ～ {max(date_values)}")
-                    print(f"📊 配信年月の種類: {len(date_values)}種類")
+            # 4. スプレッドシート以外のシンクへ退避したチャンクから出力
+            fanout = create_sink_fanout(self.datafile_id, exclude=('sheet',))
+            if fanout.sinks:
+                self._begin_stage('deliver')
+                self._record_sinks(fanout.run(Dataset.from_store(store)))
             
+            logger.info("=" * 60)
+            logger.info("🎉 b→dash APIデータ同期完了（パイプラインモード）")
+            logger.info(f"📊 処理データ: {store.row_count}行 × {len(store.columns)}列")
             return True
             
         except Exception as e:
-            print(f"❌ データ同期エラー: {e}")
-            import traceback
-            traceback.print_exc()
-            return False 
\ No newline at end of file
+            logger.error(f"❌ データ同期エラー: {e}", exc_info=True)
+            self._record_error(e)
+            return False
+        finally:
+            # 反映前に終了した場合はシャドーシートを削除（転記先のシートは更新前のまま）
+            if shadow is not None:
+                shadow.discard()
+            if fanout is not None:
+                fanout.close()
+                self._record_sinks(fanout.results)
+            if store is not None:
+                store.cleanup()
+    
+    def reconcile_sheet(self, dataset: Optional[Dataset]) -> None:
+        """
+        突き合わせを依頼されている場合（reconcile_requested）に、シートと転記するデータセットを突き合わせて修復
+        
+        転記をスキップした同期では、シートは配信年月と比較するカラムのみを読み込み、配信年月ごとのダイジェストが
+        一致しないバケットの差分の行だけを1回の batchUpdate で修復します（行単位で修復できない場合は全件を書き直し）。
+        転記した同期（dataset=None）はシートを全件書き直しているため、一致しているものとして記録します。
+        結果は処理結果の reconcile に記録し、実行日を保存します。
+        
+        Args:
+            dataset (Optional[Dataset]): 転記をスキップした同期のデータセット（転記した場合はNone）
+            
+        Raises:
+            RuntimeError: シートへの接続・全件の書き直しに失敗した場合
+        """
+        if not self.reconcile_requested:
+            return
+        if dataset is None:
+            summary: Dict[str, Any] = {'status': 'rewritten'}
+            logger.info("🔍 シートを全件書き直したため、突き合わせは不要です")
+        else:
+            summary = self._reconcile_dataset(dataset)
+        if self.report is not None:
+            self.report.extra['reconcile'] = summary
+            if summary.get('missing_rows') or summary.get('extra_rows'):
+                self.report.notes.append(
+                    f"突き合わせ: 欠落 {summary['missing_rows']}行 / 余分 {summary['extra_rows']}行"
+                    f"（{summary['status']}）"
+                )
+            elif summary['status'] == 'full_rewrite':
+                self.report.notes.append(f"突き合わせ: 全件を書き直しました（{summary['reason']}）")
+        mark_reconciled(self.datafile_id, summary)
+    
+    def _reconcile_dataset(self, dataset: Dataset) -> Dict[str, Any]:
+        """転記をスキップしたデータセットとシートを突き合わせて修復し、結果を返す"""
+        self._begin_stage('reconcile')
+        logger.info("🔍 スプレッドシートと取得したデータの突き合わせ開始")
+        credentials_path = env.get_service_account_file()
+        spreadsheet_id = env.get_datafile_config_value(self.datafile_id, 'ssid', 'SPREADSHEET', '')
+        if create_shard_writer(self.datafile_id, credentials_path, spreadsheet_id) is not None:
+            logger.info("🧩 シャーディングが有効なため、突き合わせは行いません")
+            return {'status': 'skipped', 'reason': 'sharding'}
+        sheet = SpreadSheet(credentials_path, spreadsheet_id)
+        if not sheet.connect():
+            raise RuntimeError("突き合わせのためのスプレッドシートへの接続に失敗しました")
+        
+        summary = create_reconciler(self.datafile_id, sheet).run(dataset)
+        if summary['status'] == 'full_rewrite':
+            chunk_rows = env.get_config_value('SPREADSHEET', 'WRITE_CHUNK_ROWS', 5000)
+            shadow = create_shadow_worksheet(self.datafile_id, credentials_path, spreadsheet_id)
+            if not upload_chunks_to_sheet(
+                dataset.iter_chunks(), [str(c) for c in dataset.columns], dataset.row_count,
+                credentials_path, spreadsheet_id, chunk_rows, shadow=shadow
+            ):
+                raise RuntimeError("スプレッドシートの書き直しに失敗しました")
+        logger.info(f"✅ 突き合わせ完了: {summary['status']}")
+        return summary
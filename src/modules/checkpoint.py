@@ -0,0 +1,193 @@
+"""
+長時間の同期を途中から再開するためのチェックポイント（ジャーナル）を管理するモジュール
+
+ストリーミング方式の同期で、ディスクに退避したページ（次の取得位置・退避件数）と
+スプレッドシートに書き込んだ行数を、データファイルごとのファイルに記録します。
+取得条件・工程・書き込み済みの行数はJSONファイルに、ページごとの進捗（取得位置・内容のハッシュ）は
+ジャーナル（JSON Lines）に1行ずつ追記するため、ページごとの記録にかかる時間はページ数に比例しません。
+取得や書き込みの途中で失敗した場合、次回の実行（または自動再試行）は記録した位置から
+取得・書き込みを再開するため、再開にかかる時間はデータファイルの大きさではなく残りの処理量に比例します。
+
+制限事項:
+    - 再開できるのはストリーミング方式のみです（退避したページをディスクに残して再利用します）
+    - 取得条件（ページサイズ・カラムの許可リスト・絞り込み条件）が変わった場合や、
+      max_age_hours を過ぎた場合はチェックポイントを破棄して最初から取得します
+    - 取得の再開では、前回の実行から API 側のデータが変わっていないことを前提とします
+    - シャーディング転記は途中から再開せず、書き込みを最初からやり直します
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.file_lock import write_json_atomic
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# ジャーナルから復元する値（JSONファイルには保存しない）
+_PAGE_FIELDS = ('next_offset', 'page_no', 'page_hashes', 'row_count', 'chunk_count')
+
+
+class SyncCheckpoint:
+    """データファイルごとの同期の進捗をJSONファイルとジャーナルに記録するクラス"""
+
+    def __init__(self, datafile_id: str, checkpoint_dir: Optional[Path] = None, max_age_hours: float = 24):
+        """
+        Args:
+            datafile_id (str): データファイルID
+            checkpoint_dir (Optional[Path]): チェックポイントの保存先ディレクトリ（Noneの場合は STATE_DIR/checkpoints）
+            max_age_hours (float): 再開に使用するチェックポイントの有効期間（時間）
+        """
+        if checkpoint_dir is None:
+            state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+            checkpoint_dir = env.get_project_root() / state_dir / 'checkpoints'
+        self.datafile_id = str(datafile_id)
+        self.path = Path(checkpoint_dir) / f"datafile_{self.datafile_id}.json"
+        self.journal_path = Path(checkpoint_dir) / f"datafile_{self.datafile_id}.pages.jsonl"
+        self.max_age_hours = max_age_hours
+        self.state: Dict[str, Any] = {}
+        # シンクのスレッドからも書き込み済みの行数を記録するため
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """記録中（未完了）のチェックポイントがあるかどうか"""
+        return bool(self.state)
+
+    def load(self, config_key: str) -> bool:
+        """
+        再開できるチェックポイントがあれば読み込みます。
+        取得条件が異なる・有効期間を過ぎたチェックポイントは削除します。
+
+        Args:
+            config_key (str): 取得条件のキー（開始時に記録した値と一致する場合のみ再開）
+
+        Returns:
+            bool: 再開できるチェックポイントを読み込んだ場合はTrue
+        """
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            state.update(self._replay_journal())
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ チェックポイントの読み込みに失敗したため破棄します: {e}")
+            self.clear()
+            return False
+
+        if state.get('config_key') != config_key:
+            logger.info("🗑️ 取得条件が変わったため、前回のチェックポイントを破棄します")
+            self.clear()
+            return False
+        try:
+            updated_at = datetime.fromisoformat(state.get('updated_at', ''))
+        except ValueError:
+            updated_at = datetime.min
+        if self.journal_path.exists():
+            updated_at = max(updated_at, datetime.fromtimestamp(self.journal_path.stat().st_mtime))
+        if datetime.now() - updated_at > timedelta(hours=self.max_age_hours):
+            logger.info(f"🗑️ {self.max_age_hours}時間以上前のチェックポイントのため破棄します")
+            self.clear()
+            return False
+
+        self.state = state
+        logger.info(
+            f"⏩ チェックポイントから再開します: run_id={state.get('run_id')}, 工程={state.get('phase')}, "
+            f"退避済み {state.get('row_count', 0)}行 / 書き込み済み {state.get('rows_written', 0)}行"
+        )
+        return True
+
+    def start(self, config_key: str, **fields: Any) -> None:
+        """
+        新しいチェックポイントを記録し始めます。
+
+        Args:
+            config_key (str): 取得条件のキー
+            **fields (Any): 追加で記録する値
+        """
+        self.state = {
+            'run_id': datetime.now().strftime('%Y%m%d_%H%M%S'),
+            'config_key': config_key,
+            'created_at': datetime.now().isoformat(),
+            'phase': 'fetch',
+            'next_offset': 0,
+            'page_no': 0,
+            'page_hashes': [],
+            'rows_written': 0,
+            **fields,
+        }
+        try:
+            self.journal_path.unlink()
+        except FileNotFoundError:
+            pass
+        self._save()
+
+    def append_page(self, page_hash: str, **fields: Any) -> None:
+        """
+        退避が完了したページの進捗をジャーナルに追記します。
+
+        Args:
+            page_hash (str): ページの内容のハッシュ
+            **fields (Any): 更新する値（next_offset・page_no・row_count・chunk_count など）
+        """
+        with self._lock:
+            if not self.state:
+                return
+            self.state.setdefault('page_hashes', []).append(page_hash)
+            self.state.update(fields)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'page_hash': page_hash, **fields}, ensure_ascii=False) + '\n')
+
+    def update(self, **fields: Any) -> None:
+        """
+        進捗を更新して保存します。
+
+        Args:
+            **fields (Any): 更新する値
+        """
+        with self._lock:
+            if not self.state:
+                return
+            self.state.update(fields)
+            self._save()
+
+    def clear(self) -> None:
+        """チェックポイントを削除します（同期の完了時・破棄時）。"""
+        with self._lock:
+            self.state = {}
+            for path in (self.path, self.journal_path):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _replay_journal(self) -> Dict[str, Any]:
+        """ジャーナルからページごとの進捗を復元する（書き込み途中で中断した最後の行は切り捨てる）"""
+        progress: Dict[str, Any] = {'next_offset': 0, 'page_no': 0, 'page_hashes': []}
+        if not self.journal_path.exists():
+            return progress
+        with open(self.journal_path, 'r+b') as f:
+            valid_size = 0
+            for line in f:
+                try:
+                    entry = json.loads(line.decode('utf-8')) if line.endswith(b'\n') else None
+                except ValueError:
+                    entry = None
+                if entry is None:
+                    f.truncate(valid_size)
+                    break
+                valid_size += len(line)
+                progress['page_hashes'].append(entry.pop('page_hash'))
+                progress.update(entry)
+        return progress
+
+    def _save(self) -> None:
+        """一意な一時ファイルに書き込んでから置き換え、途中で中断しても壊れないように保存する（ページごとの進捗を除く）"""
+        self.state['updated_at'] = datetime.now().isoformat()
+        write_json_atomic(
+            self.path, {key: value for key, value in self.state.items() if key not in _PAGE_FIELDS}
+        )
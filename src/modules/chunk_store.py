@@ -0,0 +1,135 @@
+"""
+取得したページをディスク上の列指向チャンク（Parquet）に退避するモジュール
+
+ページ単位で受け取ったDataFrameを配信年月ごとのパーティションに追記し、
+読み出し時は配信年月の昇順にチャンク単位で返します。
+データ全体をメモリに載せずにソート済みの順序で処理できるため、
+データファイルの行数に関わらずメモリ使用量を一定に保てます。
+
+制限事項:
+    - Parquetの書き込みには pyarrow が必要です
+    - 同一配信年月内の行順序はページの取得順（安定ソート相当）になります
+"""
+
+import shutil
+from pathlib import Path
+from typing import Iterator, List, Optional
+import pandas as pd
+
+# 配信年月が解釈できない行を格納するパーティション名（元の並べ替えと同様に末尾へ配置）
+UNKNOWN_PARTITION = "zzzz_unknown"
+
+
+def find_date_column(columns: List[str]) -> Optional[str]:
+    """
+    配信年月カラムを探します。
+
+    Args:
+        columns (List[str]): カラム名のリスト
+
+    Returns:
+        Optional[str]: 配信年月カラム名、見つからない場合はNone
+    """
+    for col in columns:
+        if '配信年月' in col or '年月' in col:
+            return col
+    return None
+
+
+def month_partition_keys(values: pd.Series) -> pd.Series:
+    """
+    配信年月（YYYY/MM形式）からパーティションキー（YYYYMM）を作成します。
+
+    Args:
+        values (pd.Series): 配信年月の値
+
+    Returns:
+        pd.Series: パーティションキー。解釈できない値は UNKNOWN_PARTITION
+    """
+    dates = pd.to_datetime(values.astype(str) + '/01', format='%Y/%m/%d', errors='coerce')
+    return dates.dt.strftime('%Y%m').fillna(UNKNOWN_PARTITION)
+
+
+class ChunkStore:
+    """ページ単位のDataFrameをディスクに退避し、配信年月順に読み出すクラス"""
+
+    def __init__(self, spill_dir: Path, resume: bool = False):
+        """
+        Args:
+            spill_dir (Path): チャンクの保存先ディレクトリ（resume=False の場合、既存の内容は削除されます）
+            resume (bool): 既存のチャンクを残して追記を再開するかどうか（restore() で退避状態を復元）
+        """
+        self.spill_dir = Path(spill_dir)
+        self.columns: List[str] = []
+        self.row_count = 0
+        self.chunk_count = 0
+
+        if self.spill_dir.exists() and not resume:
+            shutil.rmtree(self.spill_dir)
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def restore(self, columns: List[str], row_count: int, chunk_count: int) -> None:
+        """
+        チェックポイントに記録した退避状態を復元します。
+        記録より後に書き込まれたチャンク（退避の途中で中断したページ）は削除します。
+
+        Args:
+            columns (List[str]): カラム名
+            row_count (int): 退避済みの行数
+            chunk_count (int): 退避済みのページ数
+        """
+        self.columns = list(columns)
+        self.row_count = row_count
+        self.chunk_count = chunk_count
+        for chunk_file in self.spill_dir.glob("*/chunk_*.parquet"):
+            if int(chunk_file.stem.split('_')[-1]) >= chunk_count:
+                chunk_file.unlink()
+
+    def append(self, df: pd.DataFrame) -> None:
+        """
+        DataFrameを配信年月ごとのパーティションに追記します。
+
+        Args:
+            df (pd.DataFrame): 追記するDataFrame（1ページ分）
+        """
+        if df.empty:
+            return
+
+        # 最初のページのカラム順を基準とし、以降のページもそれに揃える
+        if not self.columns:
+            self.columns = df.columns.tolist()
+        else:
+            for col in df.columns:
+                if col not in self.columns:
+                    self.columns.append(col)
+            df = df.reindex(columns=self.columns)
+
+        date_column = find_date_column(self.columns)
+        if date_column:
+            partitions = df.groupby(month_partition_keys(df[date_column]), sort=False)
+        else:
+            partitions = [(UNKNOWN_PARTITION, df)]
+
+        for partition_key, part in partitions:
+            partition_dir = self.spill_dir / str(partition_key)
+            partition_dir.mkdir(exist_ok=True)
+            part.to_parquet(partition_dir / f"chunk_{self.chunk_count:06d}.parquet", index=False)
+
+        self.chunk_count += 1
+        self.row_count += len(df)
+
+    def iter_sorted_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        チャンクを配信年月の昇順に読み出します。
+
+        Yields:
+            pd.DataFrame: チャンク（カラム順は最初のページに揃えたもの）
+        """
+        for partition_dir in sorted(p for p in self.spill_dir.iterdir() if p.is_dir()):
+            for chunk_file in sorted(partition_dir.glob("chunk_*.parquet")):
+                yield pd.read_parquet(chunk_file).reindex(columns=self.columns)
+
+    def cleanup(self) -> None:
+        """退避したチャンクを削除します。"""
+        if self.spill_dir.exists():
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
@@ -1,86 +1,248 @@
 import pandas as pd
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
 from src.modules.spreadsheet import SpreadSheet
+from src.modules.sheet_swap import ShadowWorksheet
+from src.modules.sheet_serializer import iter_row_blocks, header_values
+from src.utils.logging_config import get_logger
 
-def upload_csv_to_sheet(csv_path: str, credentials_path: Path, spreadsheet_id: str) -> bool:
+logger = get_logger(__name__)
+
+def num_to_col_letter(n: int) -> str:
+    """
+    列のインデックスをExcel風の列文字に変換する
+
+    Args:
+        n (int): 1始まりの列番号
+
+    Returns:
+        str: 列文字（例: 1 → A, 27 → AA）
+    """
+    string = ""
+    while n > 0:
+        n, remainder = divmod(n - 1, 26)
+        string = chr(65 + remainder) + string
+    return string
+
+def write_row_blocks(
+    sheet: SpreadSheet,
+    blocks: Iterable[List[list]],
+    last_col: str,
+    chunk_rows: int = 5000,
+    start_row: int = 2,
+    on_flush: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    行ブロックを chunk_rows 行ずつのリクエストにまとめてシートへ書き込む
+    
+    Args:
+        sheet (SpreadSheet): 接続済みのスプレッドシート
+        blocks (Iterable[List[list]]): 書き込む行ブロック（書き込み順に並んでいること）
+        last_col (str): 最終列の列文字
+        chunk_rows (int): 1回の書き込みリクエストに含める行数
+        start_row (int): 書き込みを開始する行番号
+        on_flush (Optional[Callable[[int], None]]): リクエストごとに、それまでに書き込んだ行数を受け取る関数
+        
+    Returns:
+        int: 書き込んだ行数
+    """
+    next_row = start_row
+    buffer: List[list] = []
+    
+    def flush(rows: List[list]) -> None:
+        nonlocal next_row
+        end_row = next_row + len(rows) - 1
+        sheet.sheet.update(values=rows, range_name=f'A{next_row}:{last_col}{end_row}')
+        logger.info(f"   → {next_row}行目～{end_row}行目を書き込みました")
+        next_row = end_row + 1
+        if on_flush is not None:
+            on_flush(next_row - start_row)
+    
+    for block in blocks:
+        buffer.extend(block)
+        while len(buffer) >= chunk_rows:
+            flush(buffer[:chunk_rows])
+            buffer = buffer[chunk_rows:]
+    if buffer:
+        flush(buffer)
+    
+    # 書き込んだシートの読み取りキャッシュを破棄
+    sheet.invalidate_cache()
+    return next_row - start_row
+
+def skip_leading_rows(chunks: Iterable[pd.DataFrame], skip_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    チャンクの先頭から skip_rows 行を読み飛ばします（書き込み済みの行から再開する場合に使用）。
+    
+    Args:
+        chunks (Iterable[pd.DataFrame]): 書き込み順に並んだチャンク
+        skip_rows (int): 読み飛ばす行数
+        
+    Yields:
+        pd.DataFrame: 読み飛ばした後のチャンク
+    """
+    for chunk in chunks:
+        if skip_rows >= len(chunk):
+            skip_rows -= len(chunk)
+            continue
+        yield chunk.iloc[skip_rows:] if skip_rows else chunk
+        skip_rows = 0
+
+def upload_chunks_to_sheet(
+    chunks: Iterable[pd.DataFrame],
+    headers: List[str],
+    total_rows: int,
+    credentials_path: Path,
+    spreadsheet_id: str,
+    chunk_rows: int = 5000,
+    skip_rows: int = 0,
+    on_progress: Optional[Callable[[int], None]] = None,
+    shadow: Optional[ShadowWorksheet] = None
+) -> bool:
     """
-    CSVファイルのデータをスプレッドシートに転記する
-    毎回既存データを完全にクリアして最新データに更新する
+    DataFrameのチャンクを順にスプレッドシートへ書き込む
+    全データをメモリに載せず、chunk_rows 行ごとに分割して書き込みます
     
     Args:
-        csv_path (str): CSVファイルのパス
+        chunks (Iterable[pd.DataFrame]): 書き込むチャンク（書き込み順に並んでいること）
+        headers (List[str]): ヘッダー行
+        total_rows (int): データの総行数（シートサイズの調整に使用）
         credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
         spreadsheet_id (str): スプレッドシートID
+        chunk_rows (int): 1回の書き込みリクエストに含める行数
+        skip_rows (int): 前回の実行で書き込み済みの行数（0より大きい場合はクリアせずに続きから書き込み）
+        on_progress (Optional[Callable[[int], None]]): リクエストごとに、書き込み済みの行数（skip_rows を含む）を受け取る関数
+        shadow (Optional[ShadowWorksheet]): 指定した場合はシャドーシートに書き込み、完了後に一度に反映（skip_rows・on_progress は使用せず、毎回最初から書き込み）
         
     Returns:
         bool: 転記成功時はTrue、失敗時はFalse
     """
+    if shadow is not None:
+        return _upload_staged(shadow, chunks, headers, total_rows, chunk_rows)
     try:
-        # 1. CSVファイルの読み込み
-        print("📄 CSVファイル読み込み開始")
-        data = pd.read_csv(csv_path)
-        print(f"✅ CSVファイル読込完了: {len(data)} 行")
-        
-        # 2. スプレッドシートに接続
-        print("🔗 スプレッドシート接続開始")
+        # 1. スプレッドシートに接続
+        logger.info("🔗 スプレッドシート接続開始")
         sheet = SpreadSheet(credentials_path, spreadsheet_id)
         if not sheet.connect():
-            print("❌ スプレッドシートへの接続に失敗しました")
+            logger.error("❌ スプレッドシートへの接続に失敗しました")
             return False
-        print("✅ スプレッドシート接続完了")
-        
-        # 3. シートのデータを完全にクリア
-        print("🗑️ 既存データの完全クリア開始")
-        print("   → 全てのデータを削除して最新データに更新します")
-        
-        # シート全体をクリア
-        sheet.sheet.clear()
-        
-        # 念のため、明示的に大きな範囲をクリア（A1:Z10000）
-        try:
-            sheet.sheet.batch_clear(['A1:Z10000'])
-        except Exception as e:
-            print(f"   ⚠️ 拡張クリアでエラー（通常は問題なし）: {e}")
-        
-        print("✅ 既存データの完全クリア完了")
-        
-        # 4. データの前処理
-        print("🔄 データ変換開始")
-        # NaN、Inf、-Infなどの特殊な浮動小数点値をNoneに置き換え
-        data = data.replace([float('inf'), float('-inf')], None)
-        data = data.fillna("")  # NaNを空文字列に変換
+        logger.info("✅ スプレッドシート接続完了")
         
-        # 5. データフレームをリストに変換
-        headers = data.columns.tolist()
-        values = data.values.tolist()
-        all_values = [headers] + values
-        print(f"✅ データ変換完了: ヘッダー {len(headers)} 列, データ {len(values)} 行")
+        # 2. シートをクリアし、全データが収まるサイズに調整（再開時は書き込み済みの行を残す）
+        last_col = num_to_col_letter(len(headers))
+        if skip_rows:
+            logger.info(f"⏩ 書き込み済みの{skip_rows}行を残し、{skip_rows + 2}行目から書き込みを再開します")
+            sheet.sheet.resize(rows=total_rows + 1, cols=len(headers))
+        else:
+            logger.info("🗑️ 既存データの完全クリア開始")
+            sheet.sheet.clear()
+            sheet.sheet.resize(rows=total_rows + 1, cols=len(headers))
+            logger.info("✅ 既存データの完全クリア完了")
+            sheet.sheet.update(values=[headers], range_name=f'A1:{last_col}1')
         
-        # 6. 列のインデックスをExcel風の列文字に変換する関数
-        def num_to_col_letter(n):
-            string = ""
-            while n > 0:
-                n, remainder = divmod(n - 1, 26)
-                string = chr(65 + remainder) + string
-            return string
+        # 3. チャンクを行ブロックに変換しながら chunk_rows 行ずつ書き込み
+        logger.info(f"📝 チャンク書き込み開始: {total_rows - skip_rows}行（{chunk_rows}行ずつ）")
+        blocks = (block for chunk in skip_leading_rows(chunks, skip_rows) for block in iter_row_blocks(chunk, chunk_rows))
+        on_flush = (lambda rows: on_progress(skip_rows + rows)) if on_progress is not None else None
+        written_rows = write_row_blocks(sheet, blocks, last_col, chunk_rows, 2 + skip_rows, on_flush)
         
-        # 7. 最後の列のインデックスから列名を取得
+        logger.info(f"✅ チャンク書き込み完了: {skip_rows + written_rows}行 x {len(headers)}列")
+        return True
+    except Exception as e:
+        logger.error(f"❌ スプレッドシートへのチャンク転記処理でエラーが発生しました: {e}", exc_info=True)
+        return False
+
+def _upload_staged(
+    shadow: ShadowWorksheet,
+    chunks: Iterable[pd.DataFrame],
+    headers: List[str],
+    total_rows: int,
+    chunk_rows: int
+) -> bool:
+    """
+    シャドーシートにヘッダーとチャンクを書き込み、完了後に転記先のシートへ一度に反映する
+    失敗した場合はシャドーシートを削除し、転記先のシートは更新前のまま残す
+    """
+    try:
+        logger.info("🔗 スプレッドシート接続開始（シャドーシートに書き込み、完了後に反映）")
+        sheet = shadow.open(total_rows + 1, len(headers))
         last_col = num_to_col_letter(len(headers))
-        cell_range = f'A1:{last_col}{len(values) + 1}'
-        print(f"📋 更新範囲: {cell_range}")
-        
-        # 8. スプレッドシートに最新データを書き込み
-        print("📝 最新データの書き込み開始")
-        sheet.sheet.update(values=all_values, range_name=cell_range)
-        print(f"✅ 最新データの書き込み完了: {len(values)}行 x {len(headers)}列")
+        sheet.sheet.update(values=[headers], range_name=f'A1:{last_col}1')
         
-        # 9. 処理完了の確認
-        print("🎉 データ更新処理完了")
-        print(f"   → 既存データを全削除して最新の{len(values)}行のデータに更新しました")
+        logger.info(f"📝 チャンク書き込み開始: {total_rows}行（{chunk_rows}行ずつ）")
+        blocks = (block for chunk in chunks for block in iter_row_blocks(chunk, chunk_rows))
+        written_rows = write_row_blocks(sheet, blocks, last_col, chunk_rows)
         
+        shadow.promote(written_rows + 1, len(headers))
+        logger.info(f"✅ チャンク書き込み完了: {written_rows}行 x {len(headers)}列")
         return True
     except Exception as e:
-        print(f"❌ スプレッドシートへの転記処理でエラーが発生しました: {e}")
-        import traceback
-        traceback.print_exc()
-        return False 
\ No newline at end of file
+        logger.error(f"❌ シャドーシートへの転記処理でエラーが発生しました（転記先のシートは更新前のままです）: {e}", exc_info=True)
+        shadow.discard()
+        return False
+
+class SheetAppender:
+    """
+    ヘッダーを書き込んだシートに、DataFrameを届いた順に追記するクラス
+    取得・変換と並行して書き込み、最後にシート上で並べ替えます
+    """
+    
+    def __init__(self, sheet: SpreadSheet, headers: List[str], chunk_rows: int = 5000):
+        """
+        Args:
+            sheet (SpreadSheet): 接続済みのスプレッドシート
+            headers (List[str]): ヘッダー行
+            chunk_rows (int): 1回の書き込みリクエストに含める行数
+        """
+        self.sheet = sheet
+        self.headers = headers
+        self.chunk_rows = chunk_rows
+        self.last_col = num_to_col_letter(len(headers))
+        self.next_row = 2
+    
+    def start(self) -> None:
+        """シートをクリアしてヘッダー行を書き込みます。"""
+        self.sheet.sheet.clear()
+        # 固定行があっても縮小できるよう、ヘッダー行＋空行1行の大きさにする
+        self.sheet.sheet.resize(rows=2, cols=len(self.headers))
+        self.sheet.sheet.update(values=[self.headers], range_name=f'A1:{self.last_col}1')
+        self.next_row = 2
+    
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        DataFrameを最終行の次から追記します（必要な行数だけシートを拡張）。
+        
+        Args:
+            df (pd.DataFrame): 追記するデータ
+            
+        Returns:
+            int: 追記した行数
+        """
+        if df.empty:
+            return 0
+        self.sheet.sheet.resize(rows=self.next_row + len(df) - 1)
+        written_rows = write_row_blocks(
+            self.sheet, iter_row_blocks(df, self.chunk_rows), self.last_col, self.chunk_rows, self.next_row
+        )
+        self.next_row += written_rows
+        return written_rows
+    
+    def finish(self, sort_column: Optional[str] = None) -> int:
+        """
+        書き込みを終了し、指定があればシート上でカラムの昇順に並べ替えます。
+        
+        Args:
+            sort_column (Optional[str]): 並べ替えに使用するカラム名
+            
+        Returns:
+            int: 書き込んだ行数
+        """
+        written_rows = self.next_row - 2
+        if sort_column in self.headers and written_rows > 1:
+            self.sheet.sheet.sort(
+                (self.headers.index(sort_column) + 1, 'asc'),
+                range=f'A2:{self.last_col}{self.next_row - 1}'
+            )
+            logger.info(f"📅 シート上で '{sort_column}' の昇順に並べ替えました")
+        self.sheet.invalidate_cache()
+        return written_rows
@@ -0,0 +1,369 @@
+"""
+同期したデータの品質（データプロファイル）を集計し、しきい値で検査するモジュール
+
+カラムごとの欠損率（None・NaN・空文字）、異なる値の数、最小値・最大値と、
+前回の同期からの行数の増減を、チャンク単位にベクトル演算で集計します。
+集計結果は処理結果（JobReport.extra['data_profile']）に記録し、[DATA_PROFILE] のしきい値を
+超えた場合は通知に含めます（fail_on_violation=true の場合は転記前に同期を失敗させます）。
+
+しきい値（[DATA_PROFILE]、[DATAFILE_<id>] で個別に指定可能。空欄は検査しない）:
+    min_rows                : 行数の下限
+    max_row_drop_pct        : 前回からの行数の減少率の上限（%）
+    max_null_rate           : すべてのカラムの欠損率の上限（0～1）
+    null_rate_limits        : カラムごとの欠損率の上限（例: 配信年月:0, メールアドレス:0.1）
+    max_null_rate_increase  : 前回からの欠損率の増加幅の上限（0～1）
+
+制限事項:
+    - 異なる値の数は値のハッシュ（64ビット）で数えます。DISTINCT_LIMIT を超えたカラムは
+      それ以上数えず、distinct_exact=False として下限値を記録します
+    - 最小値・最大値は型の混在などで比較できないカラムでは記録しません
+    - 前回の集計結果は検査に合格した同期のみ保存し、次回の比較の基準にします
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from src.modules.sync_state import SyncStateStore
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# カラムごとに異なる値を数える上限（値のハッシュを保持するメモリ: 8バイト × 上限）
+DISTINCT_LIMIT = 1_000_000
+
+# 異なる値のハッシュをまとめて重複を除くまでにためる最小の件数
+_MERGE_MIN = 65536
+
+# 小さなチャンクをまとめて集計する行数
+_BATCH_ROWS = 65536
+
+
+class DataProfileError(Exception):
+    """データプロファイルがしきい値を超えた場合の例外"""
+
+    def __init__(self, violations: List[str]):
+        super().__init__("データ品質の検査に失敗しました: " + " / ".join(violations))
+        self.violations = violations
+
+
+def _json_value(value: Any) -> Any:
+    """最小値・最大値をJSONに保存できる値に変換する"""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+class DataProfiler:
+    """チャンクごとにカラムの欠損数・異なる値・最小値・最大値を集計するクラス"""
+
+    def __init__(self):
+        self.row_count = 0
+        self.columns: List[str] = []
+        self._nulls: Dict[str, int] = {}
+        self._distinct: Dict[str, np.ndarray] = {}
+        # 重複を除く前のチャンクごとのハッシュ（ある程度たまってからまとめて重複を除く）
+        self._pending: Dict[str, List[np.ndarray]] = {}
+        self._pending_size: Dict[str, int] = {}
+        self._distinct_exact: Dict[str, bool] = {}
+        self._min: Dict[str, Any] = {}
+        self._max: Dict[str, Any] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        チャンクの集計結果を加えます。
+
+        Args:
+            df (pd.DataFrame): 集計するチャンク
+        """
+        for col in df.columns:
+            if col not in self._nulls:
+                self.columns.append(col)
+                self._nulls[col] = 0
+                self._distinct[col] = np.empty(0, dtype=np.uint64)
+                self._pending[col], self._pending_size[col] = [], 0
+                self._distinct_exact[col] = True
+        self.row_count += len(df)
+
+        for col in df.columns:
+            series = df[col]
+            missing = series.isna().to_numpy()
+            if series.dtype == object or pd.api.types.is_string_dtype(series):
+                # 空文字も欠損として数える（シート上では空欄と区別できないため）
+                missing = missing | series.eq('').fillna(False).to_numpy(dtype=bool)
+            self._nulls[col] += int(missing.sum())
+            values = series[~missing] if missing.any() else series
+            if values.empty:
+                continue
+            self._update_distinct(col, values)
+            self._update_range(col, values)
+
+    def _update_distinct(self, col: str, values: pd.Series) -> None:
+        if not self._distinct_exact[col]:
+            return
+        # チャンク内で重複を除いてからハッシュを計算する（値の種類が少ないカラムはほぼ一定時間）
+        hashes = pd.util.hash_pandas_object(pd.Series(values.unique()), index=False).to_numpy()
+        self._pending[col].append(hashes)
+        self._pending_size[col] += len(hashes)
+        # 集計済みの値と同じ数以上たまった時点でまとめて重複を除く（チャンク数に対して線形の時間）
+        if self._pending_size[col] >= max(len(self._distinct[col]), _MERGE_MIN):
+            self._merge_distinct(col)
+
+    def _merge_distinct(self, col: str) -> None:
+        if not self._pending[col]:
+            return
+        merged = pd.unique(np.concatenate([self._distinct[col], *self._pending[col]]))
+        self._pending[col], self._pending_size[col] = [], 0
+        if len(merged) > DISTINCT_LIMIT:
+            self._distinct_exact[col] = False
+            merged = merged[:DISTINCT_LIMIT]
+        self._distinct[col] = merged
+
+    def _update_range(self, col: str, values: pd.Series) -> None:
+        try:
+            low, high = values.min(), values.max()
+            if col in self._min:
+                low, high = min(self._min[col], low), max(self._max[col], high)
+        except TypeError:
+            # 型が混在して比較できないカラムは記録しない
+            self._min.pop(col, None)
+            self._max.pop(col, None)
+            return
+        self._min[col], self._max[col] = low, high
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: 集計結果（rows と、カラムごとの null_rate / nulls / distinct / distinct_exact / min / max）
+        """
+        columns = {}
+        for col in self.columns:
+            self._merge_distinct(col)
+            columns[str(col)] = {
+                'null_rate': round(self._nulls[col] / self.row_count, 6) if self.row_count else 0.0,
+                'nulls': self._nulls[col],
+                'distinct': int(len(self._distinct[col])),
+                'distinct_exact': self._distinct_exact[col],
+                'min': _json_value(self._min.get(col)),
+                'max': _json_value(self._max.get(col)),
+            }
+        return {'rows': self.row_count, 'columns': columns}
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    チャンクを順に集計します。
+
+    小さなチャンク（ページ・配信年月ごとのチャンクなど）は _BATCH_ROWS 行程度にまとめてから集計し、
+    チャンクごとの固定の処理時間を抑えます。
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): 集計するチャンク
+
+    Returns:
+        Dict[str, Any]: 集計結果（DataProfiler.result() を参照）
+    """
+    profiler = DataProfiler()
+    batch: List[pd.DataFrame] = []
+    batch_rows = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        batch_rows += len(chunk)
+        if batch_rows >= _BATCH_ROWS:
+            profiler.update(batch[0] if len(batch) == 1 else pd.concat(batch, ignore_index=True))
+            batch, batch_rows = [], 0
+    if batch:
+        profiler.update(batch[0] if len(batch) == 1 else pd.concat(batch, ignore_index=True))
+    return profiler.result()
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    if value is None or str(value).strip() == '':
+        return None
+    return float(value)
+
+
+def parse_null_rate_limits(text: str) -> Dict[str, float]:
+    """
+    カラムごとの欠損率の上限を解析します。
+
+    Args:
+        text (str): カンマ区切りの「カラム名:上限」
+
+    Returns:
+        Dict[str, float]: カラム名ごとの欠損率の上限
+
+    Raises:
+        ValueError: 書式が不正な場合
+    """
+    limits = {}
+    for part in str(text or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        column, sep, limit = part.rpartition(':')
+        if not sep or not column.strip():
+            raise ValueError(f"欠損率の上限の書式が不正です: {part}")
+        limits[column.strip()] = float(limit)
+    return limits
+
+
+class DataProfileCheck:
+    """データプロファイルを前回の集計結果・しきい値と比較するクラス"""
+
+    def __init__(
+        self,
+        min_rows: Optional[float] = None,
+        max_row_drop_pct: Optional[float] = None,
+        max_null_rate: Optional[float] = None,
+        null_rate_limits: Optional[Dict[str, float]] = None,
+        max_null_rate_increase: Optional[float] = None,
+        fail_on_violation: bool = False
+    ):
+        """
+        Args:
+            min_rows (Optional[float]): 行数の下限
+            max_row_drop_pct (Optional[float]): 前回からの行数の減少率の上限（%）
+            max_null_rate (Optional[float]): すべてのカラムの欠損率の上限
+            null_rate_limits (Optional[Dict[str, float]]): カラムごとの欠損率の上限
+            max_null_rate_increase (Optional[float]): 前回からの欠損率の増加幅の上限
+            fail_on_violation (bool): しきい値を超えた場合に同期を失敗させるかどうか
+        """
+        self.min_rows = min_rows
+        self.max_row_drop_pct = max_row_drop_pct
+        self.max_null_rate = max_null_rate
+        self.null_rate_limits = null_rate_limits or {}
+        self.max_null_rate_increase = max_null_rate_increase
+        self.fail_on_violation = fail_on_violation
+
+    def compare(self, profile: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+        """
+        集計結果に前回からの増減を加え、しきい値を超えた項目を返します。
+
+        Args:
+            profile (Dict[str, Any]): 今回の集計結果（row_delta / row_delta_pct を追加します）
+            previous (Dict[str, Any]): 前回の集計結果（ない場合は空の辞書）
+
+        Returns:
+            List[str]: しきい値を超えた項目の説明
+        """
+        violations = []
+        rows = profile['rows']
+        previous_rows = previous.get('rows')
+        if previous_rows is not None:
+            profile['row_delta'] = rows - previous_rows
+            profile['row_delta_pct'] = round((rows - previous_rows) / previous_rows * 100, 2) if previous_rows else None
+
+        if self.min_rows is not None and rows < self.min_rows:
+            violations.append(f"行数 {rows:,} が下限 {self.min_rows:,.0f} 未満")
+        if (
+            self.max_row_drop_pct is not None and previous_rows
+            and (previous_rows - rows) / previous_rows * 100 > self.max_row_drop_pct
+        ):
+            violations.append(f"行数が前回の {previous_rows:,} から {rows:,} に減少（上限 {self.max_row_drop_pct}%）")
+
+        previous_columns = previous.get('columns', {})
+        for column, stats in profile['columns'].items():
+            rate = stats['null_rate']
+            limit = self.null_rate_limits.get(column, self.max_null_rate)
+            if limit is not None and rate > limit:
+                violations.append(f"'{column}' の欠損率 {rate:.1%} が上限 {limit:.1%} を超過")
+            before = previous_columns.get(column, {}).get('null_rate')
+            if self.max_null_rate_increase is not None and before is not None and rate - before > self.max_null_rate_increase:
+                violations.append(f"'{column}' の欠損率が前回の {before:.1%} から {rate:.1%} に増加")
+        for column in self.null_rate_limits:
+            if column not in profile['columns']:
+                violations.append(f"検査対象のカラム '{column}' がありません")
+        return violations
+
+
+class DataProfileStage:
+    """データファイルの集計・検査と、検査に合格した集計結果の保存を行うクラス"""
+
+    def __init__(self, datafile_id: str, check: DataProfileCheck, state_store: Optional[SyncStateStore] = None):
+        """
+        Args:
+            datafile_id (str): データファイルID
+            check (DataProfileCheck): しきい値
+            state_store (Optional[SyncStateStore]): 集計結果の保存先（Noneの場合は STATE_DIR/profile_state.json）
+        """
+        if state_store is None:
+            state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+            state_store = SyncStateStore(env.get_project_root() / state_dir / 'profile_state.json')
+        self.datafile_id = str(datafile_id)
+        self.check = check
+        self.state_store = state_store
+        self.profile: Dict[str, Any] = {}
+        self.violations: List[str] = []
+
+    def run(self, chunks: Iterable[pd.DataFrame]) -> Dict[str, Any]:
+        """
+        チャンクを集計し、前回の集計結果・しきい値と比較します。
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): 集計するチャンク
+
+        Returns:
+            Dict[str, Any]: 集計結果（row_delta と violations を含む）
+
+        Raises:
+            DataProfileError: しきい値を超え、fail_on_violation が有効な場合
+        """
+        self.profile = profile_chunks(chunks)
+        self.violations = self.check.compare(self.profile, self.state_store.get(self.datafile_id))
+        self.profile['violations'] = self.violations
+
+        delta = self.profile.get('row_delta')
+        logger.info(
+            f"🩺 データプロファイル: {self.profile['rows']:,}行 × {len(self.profile['columns'])}列"
+            + (f"（前回から {delta:+,}行）" if delta is not None else "")
+        )
+        for violation in self.violations:
+            logger.warning(f"⚠️ データ品質: {violation}")
+        if self.violations and self.check.fail_on_violation:
+            raise DataProfileError(self.violations)
+        return self.profile
+
+    def save(self) -> None:
+        """集計結果を次回の比較の基準として保存します（同期の成功後に呼び出します）。"""
+        if not self.profile:
+            return
+        self.state_store.save(self.datafile_id, {
+            'rows': self.profile['rows'],
+            'columns': {column: {'null_rate': stats['null_rate'], 'distinct': stats['distinct']}
+                        for column, stats in self.profile['columns'].items()},
+        })
+
+
+def create_profile_stage(datafile_id: str) -> Optional[DataProfileStage]:
+    """
+    設定ファイル（[DATAFILE_<id>] / [DATA_PROFILE]）からデータプロファイルの工程を作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+
+    Returns:
+        Optional[DataProfileStage]: 集計しない（enabled=false）場合はNone
+
+    Raises:
+        ValueError: しきい値の書式が不正な場合
+    """
+    def setting(key: str, default: Any = None) -> Any:
+        return env.get_datafile_config_value(datafile_id, key, 'DATA_PROFILE', default)
+
+    if not setting('enabled', False):
+        return None
+    check = DataProfileCheck(
+        min_rows=_optional_float(setting('min_rows')),
+        max_row_drop_pct=_optional_float(setting('max_row_drop_pct')),
+        max_null_rate=_optional_float(setting('max_null_rate')),
+        null_rate_limits=parse_null_rate_limits(setting('null_rate_limits', '')),
+        max_null_rate_increase=_optional_float(setting('max_null_rate_increase')),
+        fail_on_violation=bool(setting('fail_on_violation', False)),
+    )
+    return DataProfileStage(datafile_id, check)
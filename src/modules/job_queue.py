@@ -0,0 +1,253 @@
+"""
+データファイルごとの同期ジョブを複数のワーカーに分配するジョブキュー（SQLite）
+
+オーケストレーター（main.py --enqueue）がデータファイルごとにジョブを登録し、
+任意の数のワーカー（main.py --worker）がジョブをリース（貸し出し）して同期を実行します。
+ワーカーは実行中にハートビートでリースを延長し、期限切れのリース（ワーカーの異常終了など）は
+別のワーカーが引き継ぎます。失敗したジョブは max_attempts 回まで待機時間を延ばしながら再試行します。
+
+ジョブの状態:
+    queued（待機中） → leased（実行中） → done（成功） / failed（再試行の上限に到達）
+
+制限事項:
+    - 複数のホストで共有する場合はキューのファイルを共有フォルダに置きます。SQLiteのロックに対応した
+      ファイル共有（SMBなど）が必要で、同時に実行するワーカーは数十程度までを想定しています
+    - 操作ごとに接続を開くため、同じインスタンスを複数のスレッドから使用できます
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# JobQueue.fail の結果
+FAIL_RETRIED = 'retried'        # 再試行のため待機中に戻した
+FAIL_FINAL = 'final'            # 再試行の上限に達したため失敗で終了した
+FAIL_LEASE_LOST = 'lease_lost'  # リースを失っていたため何もしなかった（別のワーカーが引き継いだ）
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    datafile_id TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    last_error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, not_before);
+"""
+
+
+class Job:
+    """リースしたジョブ"""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id: int = row['id']
+        self.datafile_id: str = row['datafile_id']
+        self.attempts: int = row['attempts']
+        self.max_attempts: int = row['max_attempts']
+
+
+class JobQueue:
+    """SQLiteファイルを使用した、リース・ハートビート・再試行つきのジョブキュー"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Args:
+            db_path (Optional[Path]): キューのファイルのパス（Noneの場合は [JOB_QUEUE] db_path）
+        """
+        if db_path is None:
+            db_path = env.get_project_root() / env.get_config_value('JOB_QUEUE', 'db_path', 'data/queue/jobs.sqlite3')
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """書き込みロックを取得したトランザクションで接続する（終了時にコミットして閉じる）"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, datafile_id: str, max_attempts: int = 3) -> int:
+        """
+        ジョブを登録します。同じデータファイルの待機中・実行中のジョブがあれば登録しません。
+
+        Args:
+            datafile_id (str): データファイルID
+            max_attempts (int): 最大実行回数（初回を含む）
+
+        Returns:
+            int: 登録した（または既存の）ジョブID
+        """
+        with self._connect() as conn:
+            existing = conn.execute(
+                "SELECT id FROM jobs WHERE datafile_id = ? AND status IN ('queued', 'leased')",
+                (str(datafile_id),)
+            ).fetchone()
+            if existing is not None:
+                logger.info(f"⏭️ データファイル {datafile_id} のジョブは登録済みです: job={existing['id']}")
+                return existing['id']
+            cursor = conn.execute(
+                "INSERT INTO jobs (datafile_id, max_attempts, enqueued_at) VALUES (?, ?, ?)",
+                (str(datafile_id), max_attempts, time.time())
+            )
+            logger.info(f"📥 ジョブを登録しました: job={cursor.lastrowid}, データファイル {datafile_id}")
+            return cursor.lastrowid
+
+    def lease(self, worker_id: str, lease_sec: float) -> Optional[Job]:
+        """
+        実行できるジョブを1件リースします（待機中のジョブ、または期限切れのリースを引き継ぎ）。
+
+        Args:
+            worker_id (str): ワーカーID
+            lease_sec (float): リースの期間（秒）
+
+        Returns:
+            Optional[Job]: リースしたジョブ（実行できるジョブがない場合はNone）
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # 期限切れのリースのうち、再試行の上限に達したものは失敗とする
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, "
+                "last_error = COALESCE(last_error, 'リースの期限切れ（ワーカーの異常終了）') "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND not_before <= ?) "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY not_before, id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            if row['status'] == 'leased':
+                logger.warning(f"⚠️ 期限切れのリースを引き継ぎます: job={row['id']}（前のワーカー: {row['lease_owner']}）")
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, started_at = ? WHERE id = ?",
+                (worker_id, now + lease_sec, now, row['id'])
+            )
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+        return Job(row)
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_sec: float) -> bool:
+        """
+        リースを延長します。
+
+        Args:
+            job_id (int): ジョブID
+            worker_id (str): ワーカーID
+            lease_sec (float): 延長後のリースの期間（秒）
+
+        Returns:
+            bool: 延長できた場合はTrue（リースが別のワーカーに移っていた場合はFalse）
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time() + lease_sec, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        ジョブを成功として終了します。
+
+        Args:
+            job_id (int): ジョブID
+            worker_id (str): ワーカーID
+            result (Optional[Dict[str, Any]]): 処理結果（JSONとして保存）
+
+        Returns:
+            bool: 更新できた場合はTrue（リースを失っていた場合はFalse）
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, result = ?, lease_expires = NULL "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (time.time(), json.dumps(result, ensure_ascii=False, default=str), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry_delay_sec: float = 60) -> str:
+        """
+        ジョブを失敗として終了します。再試行の上限に達していなければ待機中に戻します。
+        再試行までの待機時間は retry_delay_sec × 2^(実行回数-1) 秒です。
+
+        Args:
+            job_id (int): ジョブID
+            worker_id (str): ワーカーID
+            error (str): エラー内容
+            retry_delay_sec (float): 再試行までの基本の待機時間（秒）
+
+        Returns:
+            str: FAIL_RETRIED（待機中に戻した） / FAIL_FINAL（失敗で終了した） / FAIL_LEASE_LOST（リースを失っていた）
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return FAIL_LEASE_LOST
+            if row['attempts'] < row['max_attempts']:
+                delay = retry_delay_sec * (2 ** (row['attempts'] - 1))
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', not_before = ?, last_error = ?, "
+                    "lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                    (now + delay, error, job_id)
+                )
+                logger.info(f"🔁 job={job_id} を{delay:.0f}秒後に再試行します（{row['attempts']}/{row['max_attempts']}回実行）")
+                return FAIL_RETRIED
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ?, lease_expires = NULL WHERE id = ?",
+                (now, error, job_id)
+            )
+            logger.error(f"❌ job={job_id} は再試行の上限（{row['max_attempts']}回）に達しました")
+            return FAIL_FINAL
+
+    def pending_count(self) -> int:
+        """
+        Returns:
+            int: 待機中（再試行待ちを含む）・実行中のジョブ数
+        """
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'leased')").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: 状態ごとのジョブ数
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
@@ -0,0 +1,205 @@
+"""
+主キーのハッシュインデックスで、ページ・実行をまたいだ重複を除くモジュール
+
+ページ単位の取得中にデータファイルが更新されると、行がページの境界をまたいでずれ、
+同じ行が2回返されることがあります。[DATAFILE_<id>] primary_key に主キーのカラムを設定すると、
+取得したページごとに主キーの64ビットハッシュをインデックスに登録し、既に登録済みのキーの行を
+除きます（最初に取得した行を残します）。判定はインデックスの参照のみのため、行数に比例した時間で済みます。
+
+同期に成功した時点のインデックス（主キーのハッシュ・行の内容のハッシュ・配信年月）は
+STATE_DIR/key_index/datafile_<id>.parquet に保存し、次回の同期では前回のインデックスと
+キーで突き合わせて、追加・削除・変更された行数を求めます（DataFrame同士の結合は行いません）。
+
+制限事項:
+    - ページのずれで返されなかった行（取得漏れ）は除けません。前回との比較で削除された行数として記録します
+    - 行の内容のハッシュはカラムの型・順序に依存します（スキーマが変わった実行では全行が変更扱いになります）
+    - 主キーの値が欠損している行は、欠損値どうしを同じキーとして扱います
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from src.modules.chunk_store import UNKNOWN_PARTITION, find_date_column, month_partition_keys
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_key_columns(text: str) -> List[str]:
+    """
+    主キーのカラムの設定値を解析します。
+
+    Args:
+        text (str): カンマ区切りのカラム名
+
+    Returns:
+        List[str]: カラム名（未設定の場合は空のリスト）
+    """
+    return [column.strip() for column in str(text or '').split(',') if column.strip()]
+
+
+class KeyIndex:
+    """主キーのハッシュで重複を除き、前回の同期とキーで比較するインデックス"""
+
+    def __init__(self, datafile_id: str, key_columns: List[str], index_dir: Optional[Path] = None):
+        """
+        Args:
+            datafile_id (str): データファイルID
+            key_columns (List[str]): 主キーのカラム名（変換後の日本語カラム名）
+            index_dir (Optional[Path]): インデックスの保存先ディレクトリ（Noneの場合は STATE_DIR/key_index）
+        """
+        if index_dir is None:
+            state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+            index_dir = env.get_project_root() / state_dir / 'key_index'
+        self.datafile_id = str(datafile_id)
+        self.key_columns = key_columns
+        self.path = Path(index_dir) / f"datafile_{self.datafile_id}.parquet"
+        self.duplicates = 0
+        self._seen: set = set()
+        self._key_hashes: List[np.ndarray] = []
+        self._row_hashes: List[np.ndarray] = []
+        self._buckets: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _hash_keys(self, df: pd.DataFrame) -> np.ndarray:
+        missing = [column for column in self.key_columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"主キーのカラムが見つかりません: {', '.join(missing)}")
+        return pd.util.hash_pandas_object(df[self.key_columns], index=False).to_numpy()
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        ページ内・登録済みのページと主キーが重複する行を除き、残った行のキーを登録します。
+
+        Args:
+            df (pd.DataFrame): 取得したページ
+
+        Returns:
+            pd.DataFrame: 重複を除いたページ（重複がない場合は同じDataFrame）
+        """
+        if df.empty:
+            return df
+        keys = self._hash_keys(df)
+        # ページ内の重複はベクトル演算で、登録済みのキーとの重複はハッシュセットの参照で判定
+        keep = ~pd.Series(keys).duplicated().to_numpy()
+        seen = self._seen
+        if seen:
+            keep &= np.fromiter((key not in seen for key in keys.tolist()), dtype=bool, count=len(keys))
+        dropped = len(df) - int(keep.sum())
+        if dropped:
+            self.duplicates += dropped
+            logger.warning(f"⚠️ 主キーが重複する{dropped}行を除きました（ページのずれによる重複の可能性があります）")
+            df = df[keep].reset_index(drop=True)
+            keys = keys[keep]
+        self._register(df, keys)
+        return df
+
+    def _register(self, df: pd.DataFrame, keys: np.ndarray) -> None:
+        self._seen.update(keys.tolist())
+        self._key_hashes.append(keys)
+        self._row_hashes.append(pd.util.hash_pandas_object(df, index=False).to_numpy())
+        date_column = find_date_column([str(c) for c in df.columns])
+        if date_column:
+            # 配信年月の種類は少ないため、異なる値ごとに変換してから展開する
+            codes, uniques = pd.factorize(df[date_column], use_na_sentinel=False)
+            buckets = month_partition_keys(pd.Series(uniques)).to_numpy(dtype=object)
+            self._buckets.append(buckets[codes])
+        else:
+            self._buckets.append(np.full(len(df), UNKNOWN_PARTITION, dtype=object))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: 登録したキーのインデックス（key_hash / row_hash / bucket）
+        """
+        if not self._key_hashes:
+            return pd.DataFrame({
+                'key_hash': np.empty(0, dtype=np.uint64),
+                'row_hash': np.empty(0, dtype=np.uint64),
+                'bucket': np.empty(0, dtype=object),
+            })
+        return pd.DataFrame({
+            'key_hash': np.concatenate(self._key_hashes),
+            'row_hash': np.concatenate(self._row_hashes),
+            'bucket': np.concatenate(self._buckets),
+        })
+
+    def load_previous(self) -> Optional[pd.DataFrame]:
+        """
+        Returns:
+            Optional[pd.DataFrame]: 前回の同期で保存したインデックス（ない場合・読み込めない場合はNone）
+        """
+        if not self.path.exists():
+            return None
+        try:
+            return pd.read_parquet(self.path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 前回のキーインデックスの読み込みに失敗したため無視します: {e}")
+            return None
+
+    def diff(self, previous: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """
+        前回の同期のインデックスとキーで突き合わせ、追加・削除・変更された行数を求めます。
+
+        Args:
+            previous (Optional[pd.DataFrame]): 前回のインデックス（Noneの場合は保存済みのものを読み込み）
+
+        Returns:
+            Dict[str, Any]: keys / duplicates_dropped と、前回のインデックスがあれば added / removed / changed / unchanged
+        """
+        result: Dict[str, Any] = {'keys': len(self), 'duplicates_dropped': self.duplicates}
+        if previous is None:
+            previous = self.load_previous()
+        if previous is None:
+            return result
+        current = self.to_frame()
+        # キーのハッシュ（整数）どうしの突き合わせのため、行の内容は読み込まない
+        merged = current[['key_hash', 'row_hash']].merge(
+            previous[['key_hash', 'row_hash']], on='key_hash', how='outer', suffixes=('', '_previous'), indicator=True
+        )
+        both = merged['_merge'] == 'both'
+        changed = int((both & (merged['row_hash'] != merged['row_hash_previous'])).sum())
+        result.update({
+            'added': int((merged['_merge'] == 'left_only').sum()),
+            'removed': int((merged['_merge'] == 'right_only').sum()),
+            'changed': changed,
+            'unchanged': int(both.sum()) - changed,
+        })
+        return result
+
+    def save(self) -> None:
+        """インデックスを保存します（同期の成功後に呼び出します）。"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 一意な一時ファイルに書き込んでから置き換え、同時に保存するプロセスと一時ファイルを共有しない
+        fd, tmp_name = tempfile.mkstemp(prefix=self.path.name + '.', suffix='.tmp', dir=self.path.parent)
+        os.close(fd)
+        try:
+            self.to_frame().to_parquet(tmp_name, index=False)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+
+def create_key_index(datafile_id: str) -> Optional[KeyIndex]:
+    """
+    設定ファイル（[DATAFILE_<id>] / [BDASH] primary_key）からキーインデックスを作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+
+    Returns:
+        Optional[KeyIndex]: 主キーが設定されていない場合はNone
+    """
+    key_columns = parse_key_columns(env.get_datafile_config_value(datafile_id, 'primary_key', 'BDASH', ''))
+    if not key_columns:
+        return None
+    logger.info(f"🔑 主キー: {', '.join(key_columns)}")
+    return KeyIndex(datafile_id, key_columns)
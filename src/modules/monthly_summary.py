@@ -0,0 +1,337 @@
+"""
+配信年月ごとの集計を作成し、集計用のワークシートに書き込むモジュール
+
+取得したデータを配信年月（と任意の分析軸）でグループ化し、合計・件数・平均・比率などを
+pandas のベクトル演算で集計します。チャンクごとに部分集計を作成して最後にまとめるため、
+ストリーミング方式でもデータ全体をメモリに載せずに集計できます。
+集計シートへは前回の書き込み結果と比較して変更があった月の行だけを更新します。
+
+集計の書式（セミコロン区切り、<出力カラム名> = <関数>(<カラム>)）:
+    配信数 = sum(配信数); 開封数 = sum(開封数); 件数 = count(); 開封率 = ratio(開封数, 配信数)
+
+関数:
+    sum / mean / min / max (カラム), count () , ratio (分子のカラム, 分母のカラム) ※合計どうしの比率
+
+制限事項:
+    - 集計行は配信年月の昇順、同じ月の中は分析軸の昇順に並べます
+    - 月の行数が変わった場合は、その月以降の行をまとめて書き直します
+    - 集計シートを手作業で編集した場合は次回の全件書き直しまで反映されません（書式・カラムの変更時は全件書き直し）
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+from src.modules.chunk_store import find_date_column, month_partition_keys
+from src.modules.csv_to_sheet import num_to_col_letter
+from src.modules.sheet_serializer import iter_row_blocks
+from src.modules.spreadsheet import SpreadSheet
+from src.modules.sync_state import SyncStateStore
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_METRIC_PATTERN = re.compile(r'^(?P<name>.+?)\s*=\s*(?P<func>\w+)\s*\((?P<args>[^)]*)\)$')
+_FUNCTIONS = {'sum': 1, 'mean': 1, 'min': 1, 'max': 1, 'count': 0, 'ratio': 2}
+
+
+class MetricSpec:
+    """1つの集計項目"""
+
+    def __init__(self, name: str, func: str, columns: List[str]):
+        """
+        Args:
+            name (str): 出力カラム名
+            func (str): 集計関数（sum, mean, min, max, count, ratio）
+            columns (List[str]): 集計対象のカラム
+        """
+        self.name = name
+        self.func = func
+        self.columns = columns
+
+
+def parse_metrics(text: str) -> List[MetricSpec]:
+    """
+    集計項目の文字列を解析します。
+
+    Args:
+        text (str): セミコロン区切りの集計項目
+
+    Returns:
+        List[MetricSpec]: 集計項目
+
+    Raises:
+        ValueError: 書式が不正な場合、未知の関数が指定された場合
+    """
+    metrics = []
+    for part in str(text or '').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        match = _METRIC_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"集計項目の書式が不正です: {part}")
+        func = match.group('func').lower()
+        columns = [c.strip() for c in match.group('args').split(',') if c.strip()]
+        if func not in _FUNCTIONS:
+            raise ValueError(f"未知の集計関数です: {func}")
+        if len(columns) != _FUNCTIONS[func]:
+            raise ValueError(f"{func} には {_FUNCTIONS[func]} 個のカラムを指定してください: {part}")
+        metrics.append(MetricSpec(match.group('name').strip(), func, columns))
+    return metrics
+
+
+class MonthlyAggregator:
+    """チャンクごとの部分集計をまとめて、配信年月ごとの集計を作成するクラス"""
+
+    def __init__(self, group_by: List[str], metrics: List[MetricSpec]):
+        """
+        Args:
+            group_by (List[str]): 分析軸（配信年月カラムは指定の有無・位置にかかわらず先頭になります。空の場合は配信年月のみ）
+            metrics (List[MetricSpec]): 集計項目
+        """
+        self.group_by = group_by
+        self.metrics = metrics
+
+    def _components(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """部分集計のカラム名 → (まとめ方, 元のカラム)。平均・比率は合計と件数に分解する"""
+        components: Dict[str, Tuple[str, Optional[str]]] = {'__rows': ('sum', None)}
+        for metric in self.metrics:
+            if metric.func in ('sum', 'mean', 'ratio'):
+                for column in metric.columns:
+                    components[f"sum:{column}"] = ('sum', column)
+                if metric.func == 'mean':
+                    components[f"n:{metric.columns[0]}"] = ('sum', metric.columns[0])
+            elif metric.func in ('min', 'max'):
+                components[f"{metric.func}:{metric.columns[0]}"] = (metric.func, metric.columns[0])
+        return components
+
+    def _resolve_group_by(self, columns: List[str]) -> List[str]:
+        date_column = find_date_column(columns)
+        if date_column is None:
+            raise KeyError("月別集計には配信年月カラムが必要です")
+        # 月ごとの並べ替え・ブロック分けは先頭の分析軸で行うため、配信年月を常に先頭にする
+        group_by = [date_column] + [column for column in self.group_by if column and column != date_column]
+        missing = [column for column in group_by if column not in columns]
+        if missing:
+            raise KeyError(f"集計の分析軸のカラムが見つかりません: {', '.join(missing)}")
+        return group_by
+
+    def partial(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        1チャンク分の部分集計を作成します。
+
+        Args:
+            df (pd.DataFrame): 日本語カラム名に変換済みのチャンク
+
+        Returns:
+            pd.DataFrame: 分析軸をインデックスとする部分集計
+
+        Raises:
+            KeyError: 分析軸・集計対象のカラムが存在しない場合
+        """
+        group_by = self._resolve_group_by(df.columns.tolist())
+        values = pd.DataFrame({column: df[column].astype(str) for column in group_by})
+        for name, (how, column) in self._components().items():
+            if column is None:
+                values[name] = 1
+                continue
+            if column not in df.columns:
+                raise KeyError(f"集計対象のカラムが見つかりません: {column}")
+            numeric = pd.to_numeric(df[column], errors='coerce')
+            values[name] = numeric.notna().astype('int64') if name.startswith('n:') else numeric
+
+        aggregations = {name: how for name, (how, _) in self._components().items()}
+        return values.groupby(group_by, sort=False).agg(aggregations)
+
+    def combine(self, partials: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        部分集計をまとめ、集計項目を計算して配信年月の昇順に並べます。
+
+        Args:
+            partials (Iterable[pd.DataFrame]): partial() の結果
+
+        Returns:
+            pd.DataFrame: 分析軸と集計項目のカラムからなる集計結果
+        """
+        partials = [p for p in partials if not p.empty]
+        if not partials:
+            return pd.DataFrame(columns=self.group_by + [metric.name for metric in self.metrics])
+        stacked = pd.concat(partials)
+        aggregations = {name: how for name, (how, _) in self._components().items()}
+        totals = stacked.groupby(level=list(range(stacked.index.nlevels)), sort=False).agg(aggregations)
+
+        summary = totals.index.to_frame(index=False)
+        for metric in self.metrics:
+            if metric.func == 'count':
+                values = totals['__rows']
+            elif metric.func == 'sum':
+                values = totals[f"sum:{metric.columns[0]}"]
+            elif metric.func == 'mean':
+                values = totals[f"sum:{metric.columns[0]}"] / totals[f"n:{metric.columns[0]}"].replace(0, float('nan'))
+            elif metric.func == 'ratio':
+                numerator, denominator = metric.columns
+                values = totals[f"sum:{numerator}"] / totals[f"sum:{denominator}"].replace(0, float('nan'))
+            else:
+                values = totals[f"{metric.func}:{metric.columns[0]}"]
+            summary[metric.name] = values.to_numpy()
+
+        group_by = summary.columns[:totals.index.nlevels].tolist()
+        sort_keys = summary.assign(__month=month_partition_keys(summary[group_by[0]]))
+        order = sort_keys.sort_values(['__month'] + group_by[1:], kind='stable').index
+        return summary.loc[order].reset_index(drop=True)
+
+    def aggregate(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """
+        チャンクを順に部分集計し、集計結果を返します。
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): 日本語カラム名に変換済みのチャンク
+
+        Returns:
+            pd.DataFrame: 集計結果
+        """
+        return self.combine(self.partial(chunk) for chunk in chunks if not chunk.empty)
+
+
+def month_blocks(summary: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    集計結果を月ごとのブロック（行数・内容のハッシュ値）に分けます。
+
+    Args:
+        summary (pd.DataFrame): 配信年月の昇順に並んだ集計結果
+
+    Returns:
+        List[Dict[str, Any]]: month / rows / digest の一覧（シートの行の順）
+    """
+    if summary.empty:
+        return []
+    months = summary.iloc[:, 0].astype(str).to_numpy()
+    row_hashes = pd.util.hash_pandas_object(summary, index=False).to_numpy()
+    # 月の昇順に並んでいるため、同じ月が続く範囲を1ブロックとする
+    boundaries = [0] + [i for i in range(1, len(months)) if months[i] != months[i - 1]] + [len(months)]
+    blocks = []
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        blocks.append({
+            'month': months[start],
+            'rows': end - start,
+            'digest': hashlib.sha256(row_hashes[start:end].tobytes()).hexdigest(),
+        })
+    return blocks
+
+
+def plan_updates(previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """
+    前回の書き込み結果と比較し、書き込みが必要な行の範囲を求めます。
+    月の並び・行数が前回と同じ間は内容が変わった月のみを、並びが変わった位置からは残りすべてを書き込みます。
+
+    Args:
+        previous (List[Dict[str, Any]]): 前回書き込んだ月ごとのブロック
+        current (List[Dict[str, Any]]): 今回の月ごとのブロック
+
+    Returns:
+        List[Tuple[int, int]]: 書き込む (集計結果の開始位置, 行数) の一覧
+    """
+    updates = []
+    position = 0
+    for index, block in enumerate(current):
+        before = previous[index] if index < len(previous) else None
+        if before is None or before['month'] != block['month'] or before['rows'] != block['rows']:
+            updates.append((position, sum(b['rows'] for b in current[index:])))
+            return updates
+        if before['digest'] != block['digest']:
+            updates.append((position, block['rows']))
+        position += block['rows']
+    return updates
+
+
+class SummarySheetWriter:
+    """集計結果を集計シートに書き込むクラス（変更があった月のみ更新）"""
+
+    def __init__(self, datafile_id: str, credentials_path: Path, spreadsheet_id: str, sheet_name: str):
+        """
+        Args:
+            datafile_id (str): データファイルID（前回の書き込み結果の保存に使用）
+            credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
+            spreadsheet_id (str): 転記先のスプレッドシートID
+            sheet_name (str): 集計シート名（存在しない場合は作成）
+        """
+        self.datafile_id = str(datafile_id)
+        self.credentials_path = credentials_path
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+        self.state_store = SyncStateStore(env.get_project_root() / state_dir / 'summary_state.json')
+
+    def write(self, summary: pd.DataFrame, full_rewrite: bool = False) -> Dict[str, Any]:
+        """
+        集計結果を書き込みます。
+
+        Args:
+            summary (pd.DataFrame): 集計結果
+            full_rewrite (bool): 前回の結果と比較せずにすべて書き直すかどうか
+
+        Returns:
+            Dict[str, Any]: 書き込み結果（sheet / rows / updated_rows / months）
+        """
+        headers = [str(column) for column in summary.columns]
+        blocks = month_blocks(summary)
+        previous = self.state_store.get(self.datafile_id)
+        key = f"{self.spreadsheet_id}:{self.sheet_name}"
+        full_rewrite = full_rewrite or previous.get('sheet') != key or previous.get('headers') != headers
+
+        sheet = SpreadSheet(self.credentials_path, self.spreadsheet_id, self.sheet_name, create_if_missing=True)
+        if not sheet.connect():
+            raise RuntimeError(f"集計シートに接続できません: {self.sheet_name}")
+
+        last_col = num_to_col_letter(len(headers))
+        updates = [(0, len(summary))] if full_rewrite else plan_updates(previous.get('months', []), blocks)
+        if full_rewrite:
+            sheet.sheet.clear()
+            sheet.sheet.update(values=[headers], range_name=f'A1:{last_col}1')
+        if full_rewrite or previous.get('rows') != len(summary):
+            sheet.sheet.resize(rows=len(summary) + 1, cols=len(headers))
+
+        data = []
+        for start, rows in updates:
+            if rows == 0:
+                continue
+            values = [row for block in iter_row_blocks(summary.iloc[start:start + rows], rows) for row in block]
+            data.append({'range': f'A{start + 2}:{last_col}{start + rows + 1}', 'values': values})
+        if data:
+            # 変更があった月の範囲をまとめて1回のリクエストで書き込む
+            sheet.sheet.batch_update(data)
+        sheet.invalidate_cache()
+
+        updated_rows = sum(rows for _, rows in updates)
+        self.state_store.save(self.datafile_id, {
+            'sheet': key,
+            'headers': headers,
+            'rows': len(summary),
+            'months': blocks,
+        })
+        logger.info(f"✅ 集計シート {self.sheet_name} を更新しました: {len(summary)}行中 {updated_rows}行を書き込み")
+        return {'sheet': self.sheet_name, 'rows': len(summary), 'updated_rows': updated_rows, 'months': len(blocks)}
+
+
+def create_aggregator(datafile_id: str) -> MonthlyAggregator:
+    """
+    設定ファイル（[DATAFILE_<id>] / [SUMMARY]）から集計方法を作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+
+    Returns:
+        MonthlyAggregator: 集計方法
+
+    Raises:
+        ValueError: 集計項目の書式が不正な場合
+    """
+    group_by = str(env.get_datafile_config_value(datafile_id, 'group_by', 'SUMMARY', '') or '')
+    metrics = str(env.get_datafile_config_value(datafile_id, 'metrics', 'SUMMARY', '件数 = count()') or '')
+    return MonthlyAggregator(
+        [column.strip() for column in group_by.split(',') if column.strip()],
+        parse_metrics(metrics)
+    )
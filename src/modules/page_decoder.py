@@ -0,0 +1,349 @@
+"""
+b→dash APIのページ（レスポンスJSON）をDataFrameに変換するモジュール
+
+ProcessPoolExecutor のワーカープロセスでJSONのデコードとDataFrameの構築を行い、
+結果は pickle した辞書ではなく Arrow IPC 形式（列指向のバイナリ）で親プロセスに返します。
+親プロセスは受け取ったパーティションを結合して並べ替えるだけなので、
+変換処理がCPUコア数に応じてスケールします。
+
+レスポンスのデコード（decode_response）では、レコードを1行ずつの辞書にせず、
+pyarrow のJSONパーサーで型付きの列（RecordColumns）に直接変換します。
+行ごとの辞書・値のPythonオブジェクトを作らないため中間データが小さくなり、
+DataFrameは必要なカラムだけを列単位で変換して構築します。
+header_info などレコード以外の部分は、records を除いたJSONを json.loads で読み込み、元のまま返します。
+欠損値を含む整数のカラムは float64 にせず、pandas の Int64（欠損は pd.NA）にします。
+
+制限事項:
+    - Arrow IPC・JSONの変換には pyarrow が必要です
+    - ワーカー関数はプロセス間で受け渡すため、モジュールのトップレベルに定義しています
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+import pandas as pd
+import pyarrow as pa
+import pyarrow.json as pa_json
+
+if TYPE_CHECKING:
+    # ワーカープロセスで設定・ロギングを読み込まないよう、型チェック時のみ参照する
+    from src.modules.schema_registry import SchemaPlan
+    from src.modules.row_filter import RowFilter
+
+
+# records キーの位置（この後の '[' から records の配列が始まる）
+_RECORDS_KEY = re.compile(rb'"records"\s*:\s*\[')
+# records の配列の終わりを探すときに試す ']' の数（records より後ろの部分は小さい想定）
+_MAX_TAIL_CANDIDATES = 16
+
+# Arrowの整数型 → pandas の欠損値を扱える整数型（欠損値を含む整数のカラムを float64 にしない）
+_NULLABLE_INT_TYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+    pa.uint64(): pd.UInt64Dtype(),
+}
+
+
+def _table_to_pandas(table: pa.Table) -> pd.DataFrame:
+    """ArrowのテーブルをDataFrameに変換する（整数のカラムは欠損値があっても整数型のまま）"""
+    return table.to_pandas(types_mapper=_NULLABLE_INT_TYPES.get)
+
+
+class RecordColumns:
+    """レコードを型付きの列（Arrowのテーブル）として保持するバッファ"""
+
+    def __init__(self, table: pa.Table):
+        """
+        Args:
+            table (pa.Table): レコードのキーをカラム名とするテーブル
+        """
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def keys(self) -> List[str]:
+        """レコードのキー（最初に現れた順）"""
+        return self.table.column_names
+
+    def to_frame(self, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        必要なカラムだけをDataFrameに変換します。
+
+        Args:
+            keys (Optional[List[str]]): 取り出すキー（Noneの場合はすべてのキー）
+
+        Returns:
+            pd.DataFrame: レコードのキーをカラム名とするDataFrame
+        """
+        if keys is None:
+            return _table_to_pandas(self.table)
+        df = _table_to_pandas(self.table.select([key for key in keys if key in self.table.column_names]))
+        return df.reindex(columns=keys)
+
+
+def _without_timestamps(data_type: pa.DataType) -> pa.DataType:
+    """型推論で日時になったフィールドを文字列に戻した型を返す（元の文字列のまま保持するため）"""
+    if pa.types.is_timestamp(data_type):
+        return pa.string()
+    if pa.types.is_struct(data_type):
+        return pa.struct([pa.field(f.name, _without_timestamps(f.type)) for f in data_type])
+    if pa.types.is_list(data_type):
+        return pa.list_(_without_timestamps(data_type.value_type))
+    return data_type
+
+
+def _load_without_records(raw: bytes, top_keys: List[str], result_keys: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    records の配列を空にしたJSONを json.loads で読み込み、レコード以外の部分を元のまま返す
+
+    records の後ろの ']' を末尾から順に試し、読み込んだキーがArrowで読んだキーと一致するものを採用します。
+    見つからない場合はNoneを返します（呼び出し元はレスポンス全体を json.loads で読み込みます）。
+
+    Args:
+        raw (bytes): レスポンスボディ（JSON）
+        top_keys (List[str]): Arrowで読んだトップレベルのキー
+        result_keys (List[str]): Arrowで読んだ result のキー
+
+    Returns:
+        Optional[Dict[str, Any]]: result.records を空のリストにしたレスポンス
+    """
+    match = _RECORDS_KEY.search(raw)
+    if match is None:
+        return None
+    head = raw[:match.end()]
+    end = len(raw)
+    for _ in range(_MAX_TAIL_CANDIDATES):
+        end = raw.rfind(b']', match.end() - 1, end)
+        if end < 0:
+            return None
+        try:
+            data = json.loads(head + raw[end:])
+        except ValueError:
+            continue
+        result = data.get('result') if isinstance(data, dict) else None
+        if (
+            isinstance(result, dict) and result.get('records') == []
+            and sorted(data) == sorted(top_keys) and sorted(result) == sorted(result_keys)
+        ):
+            return data
+    return None
+
+
+def decode_response(raw: bytes) -> Dict[str, Any]:
+    """
+    レスポンスJSONをデコードし、result.records を RecordColumns に置き換えて返します。
+
+    pyarrow のJSONパーサーでレコードを直接型付きの列に変換するため、行ごとの辞書を作りません。
+    header_info などレコード以外の部分は records を除いて json.loads で読み込むため、null の値も元のまま残ります。
+    列の型が行によって異なるなど、Arrowで変換できない場合は通常の方法でデコードします（records は辞書のリスト）。
+
+    Args:
+        raw (bytes): レスポンスボディ（JSON）
+
+    Returns:
+        Dict[str, Any]: デコードしたレスポンス
+    """
+    try:
+        read_options = pa_json.ReadOptions(block_size=len(raw) + 1)
+        table = pa_json.read_json(pa.BufferReader(raw), read_options=read_options)
+        if any(_without_timestamps(f.type) != f.type for f in table.schema):
+            # 日時らしい文字列は推論された型ではなく、文字列のまま読み直す
+            schema = pa.schema([pa.field(f.name, _without_timestamps(f.type)) for f in table.schema])
+            table = pa_json.read_json(
+                pa.BufferReader(raw),
+                read_options=read_options,
+                parse_options=pa_json.ParseOptions(explicit_schema=schema)
+            )
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return json.loads(raw)
+
+    if table.num_rows != 1 or 'result' not in table.column_names or not pa.types.is_struct(table.schema.field('result').type):
+        return json.loads(raw)
+    result_array = table.column('result').combine_chunks()
+    result_type = result_array.type
+    if result_type.get_field_index('records') < 0 or not pa.types.is_list(result_type.field('records').type):
+        return json.loads(raw)
+    items = result_array.field('records').flatten()
+    if pa.types.is_struct(items.type):
+        records = pa.Table.from_arrays(items.flatten(), names=[f.name for f in items.type])
+    elif pa.types.is_null(items.type) and len(items) == 0:
+        records = pa.table({})
+    else:
+        return json.loads(raw)
+
+    data = _load_without_records(raw, table.column_names, [field.name for field in result_type])
+    if data is None:
+        return json.loads(raw)
+    data['result']['records'] = RecordColumns(records)
+    return data
+
+
+def build_column_mapping(header_info: List[Dict[str, Any]], keys: List[str]) -> Dict[str, str]:
+    """
+    カラム名のマッピングを作成（内部ID → 日本語名）
+
+    Args:
+        header_info (List[Dict[str, Any]]): APIレスポンスのヘッダー情報
+        keys (List[str]): レコードで使用されているキー
+
+    Returns:
+        Dict[str, str]: レコードのキー → 日本語カラム名
+    """
+    # 実際のレコードで使用されている形式に合わせるため、小文字で突き合わせる
+    keys_by_lower = {}
+    for key in keys:
+        keys_by_lower.setdefault(key.lower(), key)
+
+    column_mapping = {}
+    for col in header_info:
+        internal_id = col.get('column_id', '').lower()
+        key = keys_by_lower.get(internal_id)
+        if key is not None:
+            column_mapping[key] = col.get('column_name', key)
+    return column_mapping
+
+
+def select_record_keys(keys: List[str], header_info: List[Dict[str, Any]], allowed: List[str]) -> List[str]:
+    """
+    カラムの許可リストに含まれるレコードのキーを、許可リストの順に返します。
+    許可リストの各要素はカラムID（大文字小文字を区別しない）または日本語カラム名で指定します。
+
+    Args:
+        keys (List[str]): レコードで使用されているキー
+        header_info (List[Dict[str, Any]]): ヘッダー情報
+        allowed (List[str]): カラムの許可リスト
+
+    Returns:
+        List[str]: 残すレコードのキー
+    """
+    keys_by_lower = {}
+    for key in keys:
+        keys_by_lower.setdefault(key.lower(), key)
+
+    ids_by_entry = {}
+    for col in header_info:
+        column_id = col.get('column_id', '').lower()
+        ids_by_entry.setdefault(column_id, column_id)
+        ids_by_entry.setdefault(col.get('column_name'), column_id)
+
+    selected = []
+    for entry in allowed:
+        column_id = ids_by_entry.get(entry, ids_by_entry.get(entry.lower(), entry.lower()))
+        key = keys_by_lower.get(column_id)
+        if key is not None and key not in selected:
+            selected.append(key)
+    return selected
+
+
+def records_to_dataframe(
+    records: Union[RecordColumns, List[Dict[str, Any]]],
+    header_info: List[Dict[str, Any]],
+    plan: Optional['SchemaPlan'] = None,
+    columns: Optional[List[str]] = None,
+    row_filter: Optional['RowFilter'] = None
+) -> pd.DataFrame:
+    """
+    レコードを日本語カラム名のDataFrameに変換します（並べ替えは行いません）。
+
+    Args:
+        records (Union[RecordColumns, List[Dict[str, Any]]]): レコード（decode_response の列指向のバッファ、または辞書のリスト）
+        header_info (List[Dict[str, Any]]): ヘッダー情報
+        plan (Optional[SchemaPlan]): スキーマレジストリの変換プラン（Noneの場合は header_info から作成）
+        columns (Optional[List[str]]): カラムの許可リスト（Noneの場合はすべてのカラム）
+        row_filter (Optional[RowFilter]): 行の絞り込み条件
+
+    Returns:
+        pd.DataFrame: 変換後のDataFrame
+    """
+    # 許可リストがあれば、DataFrame構築時に必要なキーだけを取り出す
+    # （絞り込み条件で参照するカラムは絞り込み後に取り除く）
+    keys = None
+    if columns and records:
+        record_keys = records.keys() if isinstance(records, RecordColumns) else list(records[0].keys())
+        keys = select_record_keys(record_keys, header_info, columns)
+        projected_count = len(keys)
+        if row_filter:
+            keys += [
+                key for key in select_record_keys(record_keys, header_info, row_filter.required_columns(header_info))
+                if key not in keys
+            ]
+    if isinstance(records, RecordColumns):
+        df = records.to_frame(keys)
+    else:
+        df = pd.DataFrame(records, columns=keys)
+    if plan is not None:
+        column_mapping = plan.column_mapping(df.columns.tolist())
+    else:
+        column_mapping = build_column_mapping(header_info, df.columns.tolist())
+    df.columns = [column_mapping.get(col, col) for col in df.columns]
+    if plan is not None:
+        df = plan.apply_dtypes(df)
+    if row_filter:
+        df = row_filter.apply(df, header_info)
+    if keys is not None:
+        df = df.iloc[:, :projected_count]
+    return df
+
+
+def dataframe_to_ipc(df: pd.DataFrame) -> bytes:
+    """
+    DataFrameをArrow IPCストリーム形式のバイト列に変換します。
+
+    Args:
+        df (pd.DataFrame): 変換するDataFrame
+
+    Returns:
+        bytes: Arrow IPC ストリーム
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def ipc_to_dataframe(data: bytes) -> pd.DataFrame:
+    """
+    Arrow IPCストリーム形式のバイト列をDataFrameに戻します。
+
+    Args:
+        data (bytes): Arrow IPC ストリーム
+
+    Returns:
+        pd.DataFrame: 復元したDataFrame
+    """
+    return _table_to_pandas(pa.ipc.open_stream(data).read_all())
+
+
+def decode_page(
+    raw: bytes,
+    header_info: Optional[List[Dict[str, Any]]] = None,
+    columns: Optional[List[str]] = None,
+    row_filter: Optional['RowFilter'] = None
+) -> Tuple[int, Optional[bytes], List[Dict[str, Any]]]:
+    """
+    ワーカープロセスで1ページ分のレスポンスをデコードし、DataFrameのパーティションを作成します。
+
+    Args:
+        raw (bytes): レスポンスボディ（JSON）
+        header_info (Optional[List[Dict[str, Any]]]): ヘッダー情報（ページに含まれない場合に使用）
+        columns (Optional[List[str]]): カラムの許可リスト（Noneの場合はすべてのカラム）
+        row_filter (Optional[RowFilter]): 行の絞り込み条件
+
+    Returns:
+        Tuple[int, Optional[bytes], List[Dict[str, Any]]]:
+            (レコード件数, Arrow IPC ストリーム（レコードがない場合はNone）, ページのヘッダー情報)
+    """
+    result = decode_response(raw).get('result', {})
+    records = result.get('records', [])
+    page_header_info = result.get('header_info') or header_info or []
+    if not records:
+        return 0, None, page_header_info
+    df = records_to_dataframe(records, page_header_info, columns=columns, row_filter=row_filter)
+    return len(records), dataframe_to_ipc(df), page_header_info
@@ -0,0 +1,221 @@
+"""
+b→dash APIのページサイズ（limit）をデータファイルごとに自動調整するモジュール
+
+ページごとの応答時間・レスポンスの大きさから1件あたりの処理時間・バイト数を推定し、
+1ページが目標の応答時間（target_sec）と上限サイズ（max_bytes）に収まる件数へ近づけます。
+スロットリング（429）・サーバーエラー（5xx）・タイムアウトの場合はページサイズを半分にして
+同じ位置から再試行し、その実行中は失敗したサイズ以上には増やしません。
+学習したページサイズはデータファイルごとに保存し、次回の実行の初期値として使用します。
+
+制限事項:
+    - 変更なしの判定に使う内容のハッシュはページ単位で計算するため、ページサイズが変わった実行では
+      データに変更がなくても転記をスキップしません（頻繁に変わらないよう、推定値が現在の値から
+      大きく離れた場合のみ変更し、PAGE_SIZE_STEP 単位に丸めます）
+    - サーバーが1ページで返す件数に上限がある場合、最初はその上限を最終ページと区別できないため、
+      件数がページサイズ未満のページの後に空のページか範囲外（416）になるまで1回余分に確認し、
+      判明した上限を保存して以降のページサイズを制限します
+    - 並列変換（DECODE_WORKERS）は先読みするページの位置を固定するため、学習済みのページサイズを固定で使用します
+    - 記録したレスポンスの再生（--replay）では使用しません（記録時のページサイズで再生します）
+"""
+
+from typing import Any, Dict, Optional
+from src.modules.sync_state import SyncStateStore
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# ページサイズを小さくして再試行するステータスコード
+THROTTLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# 推定値がこの範囲（現在の値に対する比）に収まる間はページサイズを変えない
+_HOLD_RANGE = (0.75, 1.5)
+
+# 1件あたりの処理時間・バイト数の移動平均に使う重み（新しいページの比率）
+_SMOOTHING = 0.5
+
+
+class AdaptivePageSizer:
+    """応答時間・レスポンスの大きさ・スロットリングからページサイズを調整するクラス"""
+
+    def __init__(
+        self,
+        datafile_id: str,
+        initial: int,
+        min_size: int = 1000,
+        max_size: int = 20000,
+        target_sec: float = 5.0,
+        max_bytes: int = 32 * 1024 * 1024,
+        step: int = 500,
+        state_store: Optional[SyncStateStore] = None
+    ):
+        """
+        Args:
+            datafile_id (str): データファイルID
+            initial (int): 学習済みの値がない場合のページサイズ
+            min_size (int): ページサイズの下限
+            max_size (int): ページサイズの上限
+            target_sec (float): 1ページの目標の応答時間（秒）
+            max_bytes (int): 1ページのレスポンスの上限サイズ（バイト）
+            step (int): ページサイズを丸める単位
+            state_store (Optional[SyncStateStore]): 学習したページサイズの保存先（Noneの場合は STATE_DIR/page_size_state.json）
+        """
+        if state_store is None:
+            state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+            state_store = SyncStateStore(env.get_project_root() / state_dir / 'page_size_state.json')
+        self.datafile_id = str(datafile_id)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_sec = target_sec
+        self.max_bytes = max_bytes
+        self.step = max(step, 1)
+        self.state_store = state_store
+
+        learned = self.state_store.get(self.datafile_id)
+        # サーバーが1ページで返す件数の上限（判明している場合）
+        self.server_max: Optional[int] = learned.get('server_max')
+        if self.server_max:
+            self.min_size = min(self.min_size, self.server_max)
+        # スロットリングされたサイズ・サーバー側の上限（この実行中はこれ未満に抑える）
+        self.ceiling = min(max_size, self.server_max or max_size)
+        self.sec_per_row: Optional[float] = learned.get('sec_per_row')
+        self.bytes_per_row: Optional[float] = learned.get('bytes_per_row')
+        self.size = self._clamp(int(learned.get('page_size') or initial))
+        self.initial_size = self.size
+        self.pages = 0
+        self.throttles = 0
+        self.changes = 0
+        if learned.get('page_size'):
+            logger.info(f"📐 学習済みのページサイズを使用します: {self.size}件（範囲: {min_size}～{max_size}件）")
+
+    def _clamp(self, size: float) -> int:
+        size = int(size) // self.step * self.step
+        return max(self.min_size, min(self.ceiling, size))
+
+    def observe(self, rows: int, elapsed_sec: float, nbytes: int) -> None:
+        """
+        取得したページの計測結果から、次のページのサイズを決めます。
+
+        Args:
+            rows (int): ページの件数
+            elapsed_sec (float): 応答時間（秒）
+            nbytes (int): レスポンスの大きさ（バイト）
+        """
+        self.pages += 1
+        if rows <= 0:
+            return
+        sec_per_row, bytes_per_row = elapsed_sec / rows, nbytes / rows
+        if self.sec_per_row is None or self.bytes_per_row is None:
+            self.sec_per_row, self.bytes_per_row = sec_per_row, bytes_per_row
+        else:
+            self.sec_per_row += _SMOOTHING * (sec_per_row - self.sec_per_row)
+            self.bytes_per_row += _SMOOTHING * (bytes_per_row - self.bytes_per_row)
+
+        ideal = min(
+            self.target_sec / self.sec_per_row if self.sec_per_row > 0 else self.max_size,
+            self.max_bytes / self.bytes_per_row if self.bytes_per_row > 0 else self.max_size,
+        )
+        low, high = _HOLD_RANGE
+        if low * self.size <= ideal <= high * self.size:
+            return
+        # 増やす場合は1ページごとに最大2倍まで（減らす場合はすぐに推定値まで）
+        new_size = self._clamp(min(ideal, self.size * 2))
+        if new_size != self.size:
+            logger.info(
+                f"📐 ページサイズを変更します: {self.size} → {new_size}件"
+                f"（1件あたり {self.sec_per_row * 1000:.2f}ms / {self.bytes_per_row:.0f}バイト）"
+            )
+            self.size = new_size
+            self.changes += 1
+
+    def throttled(self, status_code: Optional[int] = None, retry_after: Optional[str] = None) -> float:
+        """
+        スロットリング・サーバーエラー・タイムアウトの場合にページサイズを半分にします。
+
+        Args:
+            status_code (Optional[int]): レスポンスのステータスコード（タイムアウトの場合はNone）
+            retry_after (Optional[str]): Retry-After ヘッダーの値
+
+        Returns:
+            float: 再試行までの待機時間（秒）
+        """
+        self.throttles += 1
+        self.ceiling = max(self.min_size, self.size - self.step)
+        new_size = self._clamp(self.size // 2)
+        logger.warning(
+            f"⚠️ {'タイムアウト' if status_code is None else status_code} のため、"
+            f"ページサイズを {self.size} → {new_size}件に減らして再試行します"
+        )
+        if new_size != self.size:
+            self.size = new_size
+            self.changes += 1
+        try:
+            return max(float(retry_after), 0.0)
+        except (TypeError, ValueError):
+            return min(2.0 ** self.throttles, 60.0)
+
+    def cap(self, server_max: int) -> None:
+        """
+        サーバーが1ページで返す件数の上限に合わせて、ページサイズを制限します（次回以降の実行も含む）。
+
+        Args:
+            server_max (int): サーバーが1ページで返した件数
+        """
+        self.server_max = server_max
+        self.min_size = min(self.min_size, server_max)
+        self.ceiling = server_max
+        new_size = self._clamp(min(self.size, server_max))
+        if new_size != self.size:
+            self.size = new_size
+            self.changes += 1
+
+    def save(self) -> None:
+        """学習したページサイズを保存します（次回の実行の初期値）。"""
+        if self.pages == 0 and self.server_max is None:
+            return
+        self.state_store.save(self.datafile_id, {
+            'page_size': self.size,
+            'sec_per_row': self.sec_per_row,
+            'bytes_per_row': self.bytes_per_row,
+            'server_max': self.server_max,
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: 処理結果（JobReport.extra）に記録する調整の内容
+        """
+        return {
+            'initial': self.initial_size,
+            'final': self.size,
+            'changes': self.changes,
+            'throttles': self.throttles,
+            'server_max': self.server_max,
+        }
+
+
+def create_page_sizer(datafile_id: str, limit: int) -> Optional[AdaptivePageSizer]:
+    """
+    設定ファイル（[DATAFILE_<id>] / [SYNC_SETTINGS]）からページサイズの調整を作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+        limit (int): 学習済みの値がない場合のページサイズ
+
+    Returns:
+        Optional[AdaptivePageSizer]: 調整しない（ADAPTIVE_PAGE_SIZE=false）場合はNone
+    """
+    def setting(key: str, default: Any) -> Any:
+        return env.get_datafile_config_value(datafile_id, key, 'SYNC_SETTINGS', default)
+
+    if not setting('ADAPTIVE_PAGE_SIZE', False):
+        return None
+    return AdaptivePageSizer(
+        datafile_id,
+        limit,
+        min_size=int(setting('PAGE_SIZE_MIN', 1000)),
+        max_size=int(setting('PAGE_SIZE_MAX', 20000)),
+        target_sec=float(setting('PAGE_TARGET_SEC', 5.0)),
+        max_bytes=int(float(setting('PAGE_MAX_MB', 32)) * 1024 * 1024),
+        step=int(setting('PAGE_SIZE_STEP', 500)),
+    )
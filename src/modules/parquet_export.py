@@ -0,0 +1,176 @@
+"""
+b→dashのデータをParquetパーツとしてオブジェクトストレージへ出力するモジュール
+
+PathGenerator.generate_gcs_path のレイアウト
+(mysql_exports/{service}/{env}/{load_type}/{table}/{date}/{table}_part_NNN_{ts}.parquet)
+に従い、サイズ上限付きのパーツに分割して並列に書き込みます。
+書き込み完了後、同じディレクトリにパーツ一覧のマニフェスト(JSON)を出力します。
+
+制限事項:
+    - パーツサイズはメモリ上のサイズから見積もるため、実際のParquetファイルは上限より小さくなります
+    - Parquetの書き込みには pyarrow が必要です
+"""
+
+import io
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from typing import Iterable, Iterator, List, Dict, Any, Optional
+import pandas as pd
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.object_store import ObjectStore, get_object_store
+from src.utils.path_generator import PathGenerator, JST
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ParquetExporter:
+    """DataFrameをサイズ上限付きのParquetパーツとして書き出すクラス"""
+
+    def __init__(
+        self,
+        store: ObjectStore,
+        path_generator: PathGenerator,
+        max_part_bytes: int = 128 * 1024 * 1024,
+        max_workers: int = 4
+    ):
+        """
+        Args:
+            store (ObjectStore): 書き込み先のオブジェクトストレージ
+            path_generator (PathGenerator): パス生成器
+            max_part_bytes (int): 1パーツあたりの最大サイズ（メモリ上の見積もり）
+            max_workers (int): 並列に書き込むパーツ数
+        """
+        self.store = store
+        self.path_generator = path_generator
+        self.max_part_bytes = max_part_bytes
+        self.max_workers = max_workers
+
+    def _iter_parts(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """チャンクを結合・分割して、サイズ上限に収まるパーツを順に返す"""
+        pending: List[pd.DataFrame] = []
+        pending_bytes = 0
+
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            bytes_per_row = max(1, int(chunk.memory_usage(deep=True, index=False).sum()) // len(chunk))
+            rows_per_part = max(1, self.max_part_bytes // bytes_per_row)
+            start = 0
+            while start < len(chunk):
+                room_rows = max(1, (self.max_part_bytes - pending_bytes) // bytes_per_row)
+                piece = chunk.iloc[start:start + min(room_rows, rows_per_part)]
+                pending.append(piece)
+                pending_bytes += len(piece) * bytes_per_row
+                start += len(piece)
+                if pending_bytes >= self.max_part_bytes:
+                    yield pd.concat(pending, ignore_index=True)
+                    pending, pending_bytes = [], 0
+
+        if pending:
+            yield pd.concat(pending, ignore_index=True)
+
+    def _write_part(self, part: pd.DataFrame, key: str) -> Dict[str, Any]:
+        """1パーツをParquetに変換して書き込み、マニフェスト用の情報を返す"""
+        buffer = io.BytesIO()
+        part.to_parquet(buffer, index=False)
+        data = buffer.getvalue()
+        uri = self.store.put_bytes(key, data)
+        return {
+            'key': key,
+            'uri': uri,
+            'rows': len(part),
+            'bytes': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+        }
+
+    def export(self, chunks: Iterable[pd.DataFrame], table_name: str, load_type: str = "full_load") -> Dict[str, Any]:
+        """
+        チャンクをParquetパーツとして並列に書き出し、マニフェストを出力します。
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): 出力するデータ（順に結合されます）
+            table_name (str): テーブル名（パスに使用）
+            load_type (str): ロードタイプ（"full_load" or "incremental"）
+
+        Returns:
+            Dict[str, Any]: マニフェストの内容
+        """
+        futures: List[Future] = []
+        parts: List[Dict[str, Any]] = []
+        columns: Optional[List[str]] = None
+        # 1回の出力のパーツ・マニフェストは同じ日付ディレクトリ・タイムスタンプにする
+        exported_at = datetime.now(JST)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for part_no, part in enumerate(self._iter_parts(chunks), start=1):
+                if columns is None:
+                    columns = part.columns.tolist()
+                key = self.path_generator.generate_gcs_path(table_name, part_no, load_type, now=exported_at)
+                futures.append(executor.submit(self._write_part, part, key))
+
+                # 書き込み待ちのパーツを並列数の2倍までに抑え、メモリ使用量を制限する
+                while sum(not f.done() for f in futures) >= self.max_workers * 2:
+                    parts.append(futures.pop(0).result())
+
+            for future in futures:
+                parts.append(future.result())
+
+        manifest = {
+            'table': table_name,
+            'load_type': load_type,
+            'created_at': exported_at.isoformat(),
+            'columns': columns or [],
+            'total_rows': sum(p['rows'] for p in parts),
+            'total_bytes': sum(p['bytes'] for p in parts),
+            'parts': parts,
+        }
+
+        if parts:
+            manifest_dir = parts[0]['key'].rsplit('/', 1)[0]
+            timestamp = exported_at.strftime('%H%M%S')
+            manifest_key = f"{manifest_dir}/{table_name}_manifest_{timestamp}.json"
+            manifest['manifest_uri'] = self.store.put_bytes(
+                manifest_key, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+            )
+
+        return manifest
+
+
+def export_datafile_to_object_store(chunks: Iterable[pd.DataFrame], datafile_id: str) -> bool:
+    """
+    settings.ini の [OBJECT_STORE] 設定に従ってデータファイルをParquetパーツで出力します。
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): 出力するデータ
+        datafile_id (str): データファイルID
+
+    Returns:
+        bool: 出力成功時はTrue、失敗時はFalse
+    """
+    try:
+        path_generator = PathGenerator(
+            env.get_config_value('OBJECT_STORE', 'service_name', 'bdash'),
+            env.get_config_value('OBJECT_STORE', 'environment', 'production')
+        )
+        exporter = ParquetExporter(
+            get_object_store(),
+            path_generator,
+            max_part_bytes=env.get_config_value('OBJECT_STORE', 'max_part_mb', 128) * 1024 * 1024,
+            max_workers=env.get_config_value('OBJECT_STORE', 'max_workers', 4)
+        )
+
+        logger.info("📦 オブジェクトストレージへのParquet出力開始")
+        manifest = exporter.export(chunks, f"datafile_{datafile_id}")
+        logger.info(
+            f"✅ Parquet出力完了: {len(manifest['parts'])}パーツ, "
+            f"{manifest['total_rows']}行, {manifest['total_bytes'] / 1024 / 1024:.1f}MB"
+        )
+        if 'manifest_uri' in manifest:
+            logger.info(f"📄 マニフェスト: {manifest['manifest_uri']}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Parquet出力エラー: {e}")
+        return False
@@ -0,0 +1,437 @@
+"""
+スプレッドシートとb→dashのデータを突き合わせ、欠落・余分な行だけを修復するモジュール
+
+シート全体を書き直さずに、同期で取得したデータにあってシートにない行（欠落）・シートにあって
+取得したデータにない行（余分）を検出して修復します。比較の基準は同期が転記するデータセットそのもの
+（変換・絞り込み・重複の除去の後）のため、突き合わせのためにb→dashから取得し直すことはありません。
+比較は次の2段階で行います。
+
+    1. 配信年月ごとのバケットの比較
+       シートの配信年月・比較するカラムを1回の batch_get で読み込み、両側で行ごとにハッシュを求めて、
+       バケットごとの行数とダイジェスト（行のハッシュを並べ替えて連結したもののハッシュ）を比較します。
+    2. 一致しないバケットの掘り下げ
+       ダイジェストが一致しないバケットだけ、行のハッシュを多重集合として突き合わせ、
+       欠落・余分な行を特定します。
+
+修復は、余分な行の削除・欠落した行の挿入（バケットの末尾）と値の書き込みを1回の batchUpdate で行うため、
+シートを見ている人には修復前か修復後のどちらかの状態が表示されます。
+
+比較するカラムは [BDASH] primary_key（未設定の場合はすべてのカラム）です。主キーのみを比較する場合、
+読み込むのは主キーと配信年月のカラムだけですが、主キーが同じで値だけが変わった行は検出しません
+（[RECONCILE] compare_values=true で、すべてのカラムを比較します）。
+
+突き合わせは、データに変更がなく転記をスキップした同期で行います（転記した同期はシートを全件書き直しているため、
+その時点で一致しているものとして記録します）。
+
+制限事項:
+    - シートが配信年月の昇順に並んでいない・ヘッダーが一致しない場合、差分が多い（max_repair_ratio を超える）場合は
+      全件を書き直します
+    - 欠落した行はバケット（配信年月）の末尾に挿入するため、同じ配信年月の中での並び順は取得順と異なることがあります
+    - シャーディングが有効な場合は突き合わせを行いません
+    - 2^53 を超える整数はスプレッドシートで精度が落ちるため、常に不一致として扱われます
+"""
+
+import hashlib
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from src.modules.chunk_store import UNKNOWN_PARTITION, find_date_column, month_partition_keys
+from src.modules.csv_to_sheet import num_to_col_letter
+from src.modules.key_index import parse_key_columns
+from src.modules.sheet_serializer import iter_row_blocks
+from src.modules.sinks import Dataset
+from src.modules.spreadsheet import SpreadSheet
+from src.modules.sync_state import SyncStateStore
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# レポートに記録する一致しないバケットの上限
+_MAX_REPORTED_BUCKETS = 20
+
+
+def _normalize(value: Any) -> str:
+    """
+    セルの値を比較用の文字列に変換する（書き込み時の値とシートから読み込んだ値が同じ文字列になるように）
+
+    Args:
+        value (Any): 書き込み用に変換した値、またはシートから読み込んだ値（UNFORMATTED_VALUE）
+
+    Returns:
+        str: 比較用の文字列
+    """
+    if value is None or value == '':
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def _hash_rows(rows: List[List[Any]]) -> np.ndarray:
+    """行ごとに、比較用の文字列に変換した値のハッシュ（64ビット）を求める"""
+    if not rows:
+        return np.empty(0, dtype=np.uint64)
+    frame = pd.DataFrame([[_normalize(value) for value in row] for row in rows], dtype=object)
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _bucket_keys(values: pd.Series) -> np.ndarray:
+    """配信年月の値ごとのバケット（YYYYMM）。配信年月の種類は少ないため、異なる値ごとに変換してから展開する"""
+    codes, uniques = pd.factorize(values.astype(object), use_na_sentinel=False)
+    keys = month_partition_keys(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    return keys[codes]
+
+
+def _bucket_digests(buckets: np.ndarray, hashes: np.ndarray) -> Dict[str, Tuple[int, str]]:
+    """
+    バケットごとの行数とダイジェスト（行の並び順に依存しない）を求める
+
+    Returns:
+        Dict[str, Tuple[int, str]]: バケット → (行数, ダイジェスト)
+    """
+    digests: Dict[str, Tuple[int, str]] = {}
+    if len(hashes) == 0:
+        return digests
+    for bucket, positions in pd.Series(np.arange(len(hashes))).groupby(buckets, sort=False).groups.items():
+        sorted_hashes = np.sort(hashes[np.asarray(positions)])
+        digests[bucket] = (len(sorted_hashes), hashlib.sha1(sorted_hashes.tobytes()).hexdigest())
+    return digests
+
+
+def _unmatched(left: np.ndarray, right: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    行のハッシュを多重集合として突き合わせ、相手側に対応する行がない位置を返す
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (left の位置, right の位置)
+    """
+    def occurrences(hashes: np.ndarray) -> pd.MultiIndex:
+        # 同じ内容の行が複数ある場合は、出現順の番号で区別する
+        rank = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        return pd.MultiIndex.from_arrays([hashes, rank])
+
+    left_index, right_index = occurrences(left), occurrences(right)
+    return np.flatnonzero(~left_index.isin(right_index)), np.flatnonzero(~right_index.isin(left_index))
+
+
+def _descending_runs(positions: List[int]) -> List[Tuple[int, int]]:
+    """行の位置を連続する範囲 [start, end) にまとめ、下の範囲から順に返す"""
+    runs: List[Tuple[int, int]] = []
+    for position in sorted(positions, reverse=True):
+        if runs and runs[-1][0] == position + 1:
+            runs[-1] = (position, runs[-1][1])
+        else:
+            runs.append((position, position + 1))
+    return runs
+
+
+def _cell_data(value: Any) -> Dict[str, Any]:
+    """書き込み用に変換した値を updateCells のセルに変換する（値は解釈せずにそのまま書き込む）"""
+    if value is None or value == '':
+        return {}
+    if isinstance(value, bool):
+        return {'userEnteredValue': {'boolValue': value}}
+    if isinstance(value, (int, float)):
+        return {'userEnteredValue': {'numberValue': value}}
+    return {'userEnteredValue': {'stringValue': str(value)}}
+
+
+class SheetReconciler:
+    """スプレッドシートとb→dashのデータを配信年月ごとのダイジェストで突き合わせ、差分の行だけを修復するクラス"""
+
+    def __init__(
+        self,
+        sheet: SpreadSheet,
+        key_columns: Optional[List[str]] = None,
+        max_repair_ratio: float = 0.2,
+        dry_run: bool = False
+    ):
+        """
+        Args:
+            sheet (SpreadSheet): 接続済みの転記先のスプレッドシート
+            key_columns (Optional[List[str]]): 比較するカラム（Noneまたは空の場合はすべてのカラム）
+            max_repair_ratio (float): 行単位で修復する差分の上限（データの行数に対する比。超える場合は全件を書き直す）
+            dry_run (bool): 差分を記録するだけで修復しないかどうか
+        """
+        self.sheet = sheet
+        self.key_columns = key_columns or []
+        self.max_repair_ratio = max_repair_ratio
+        self.dry_run = dry_run
+
+    def run(self, dataset: Dataset) -> Dict[str, Any]:
+        """
+        同期で取得したデータセットとシートを突き合わせ、差分の行を修復します。
+
+        Args:
+            dataset (Dataset): 同期が転記するデータセット（シートへの書き込みと同じ配信年月順のもの）
+
+        Returns:
+            Dict[str, Any]: 突き合わせの結果。status は consistent（一致）/ repaired（修復済み）/
+                mismatch（dry_run で差分あり）/ full_rewrite（全件の書き直しが必要、理由は reason）
+        """
+        headers = [str(c) for c in dataset.columns]
+        compare_columns = self.key_columns or headers
+        missing = [column for column in compare_columns if column not in headers]
+        if missing:
+            raise ValueError(f"比較するカラムが見つかりません: {', '.join(missing)}")
+        date_column = find_date_column(headers)
+        result: Dict[str, Any] = {
+            'compared_columns': len(compare_columns),
+            'source_rows': dataset.row_count,
+        }
+
+        # 1. b→dash側: 行ごとのハッシュとバケット（シートと同じ配信年月順）
+        source_hashes, source_buckets = [], []
+        for chunk in dataset.iter_chunks():
+            rows = [row for block in iter_row_blocks(chunk[compare_columns]) for row in block]
+            source_hashes.append(_hash_rows(rows))
+            source_buckets.append(
+                _bucket_keys(chunk[date_column]) if date_column else np.full(len(chunk), UNKNOWN_PARTITION, dtype=object)
+            )
+        source_hash = np.concatenate(source_hashes) if source_hashes else np.empty(0, dtype=np.uint64)
+        source_bucket = np.concatenate(source_buckets) if source_buckets else np.empty(0, dtype=object)
+
+        # 2. シート側: ヘッダー・配信年月・比較するカラムを1回のリクエストで読み込む
+        sheet_headers, sheet_rows, sheet_dates = self._read_sheet(headers, compare_columns, date_column)
+        result['sheet_rows'] = len(sheet_rows)
+        if sheet_headers != headers:
+            return self._full_rewrite(result, 'シートのヘッダーがデータのカラムと一致しません')
+        sheet_hash = _hash_rows(sheet_rows)
+        sheet_bucket = (
+            _bucket_keys(pd.Series(sheet_dates, dtype=object)) if date_column
+            else np.full(len(sheet_rows), UNKNOWN_PARTITION, dtype=object)
+        )
+        ranges = self._bucket_ranges(sheet_bucket)
+        if ranges is None:
+            return self._full_rewrite(result, 'シートが配信年月の昇順に並んでいません')
+
+        # 3. バケットごとのダイジェストを比較
+        source_digests = _bucket_digests(source_bucket, source_hash)
+        sheet_digests = _bucket_digests(sheet_bucket, sheet_hash)
+        buckets = sorted(set(source_digests) | set(sheet_digests))
+        mismatched = [bucket for bucket in buckets if source_digests.get(bucket) != sheet_digests.get(bucket)]
+        result.update({
+            'buckets': len(buckets),
+            'mismatched_buckets': mismatched[:_MAX_REPORTED_BUCKETS],
+            'missing_rows': 0,
+            'extra_rows': 0,
+        })
+        if not mismatched:
+            logger.info(f"✅ シートとb→dashのデータは一致しています（{len(buckets)}バケット / {len(sheet_rows)}行）")
+            result['status'] = 'consistent'
+            return result
+
+        # 4. 一致しないバケットのみ、行のハッシュを突き合わせて欠落・余分な行を特定
+        operations = []
+        for bucket in mismatched:
+            source_positions = np.flatnonzero(source_bucket == bucket)
+            start, end = ranges.get(bucket, (None, None))
+            if start is None:
+                # シートにないバケットは、次のバケットの先頭（なければ末尾）に挿入する
+                following = [ranges[b][0] for b in ranges if b > bucket]
+                anchor = min(following) if following else len(sheet_rows)
+                extra, missing_rows = np.empty(0, dtype=np.int64), source_positions
+            else:
+                anchor = end
+                extra_local, missing_local = _unmatched(sheet_hash[start:end], source_hash[source_positions])
+                extra, missing_rows = extra_local + start, source_positions[missing_local]
+            operations.append((anchor, bucket, extra.tolist(), missing_rows.tolist()))
+            logger.info(f"   → {bucket}: 欠落 {len(missing_rows)}行 / 余分 {len(extra)}行")
+        missing_total = sum(len(op[3]) for op in operations)
+        extra_total = sum(len(op[2]) for op in operations)
+        result.update({'missing_rows': missing_total, 'extra_rows': extra_total})
+        logger.info(
+            f"🔍 一致しないバケット: {len(mismatched)}/{len(buckets)}件"
+            f"（欠落 {missing_total}行 / 余分 {extra_total}行）"
+        )
+
+        if self.dry_run:
+            result['status'] = 'mismatch'
+            return result
+        if missing_total + extra_total > self.max_repair_ratio * max(dataset.row_count, 1):
+            return self._full_rewrite(result, f"差分の行数がデータの{self.max_repair_ratio:.0%}を超えています")
+
+        # 5. 削除・挿入・値の書き込みを1回の batchUpdate で修復
+        self._repair(dataset, operations)
+        result['status'] = 'repaired'
+        logger.info(f"🩹 差分の行を修復しました: 挿入 {missing_total}行 / 削除 {extra_total}行")
+        return result
+
+    def _read_sheet(
+        self, headers: List[str], compare_columns: List[str], date_column: Optional[str]
+    ) -> Tuple[List[str], List[List[Any]], List[Any]]:
+        """
+        シートのヘッダー・比較するカラム・配信年月を1回の batch_get で読み込む
+
+        Returns:
+            Tuple[List[str], List[List[Any]], List[Any]]: (ヘッダー, 比較するカラムの行ごとの値, 配信年月の値)
+        """
+        columns = list(compare_columns)
+        if date_column and date_column not in columns:
+            columns.append(date_column)
+        letters = [num_to_col_letter(headers.index(column) + 1) for column in columns]
+        ranges = [f"A1:{num_to_col_letter(len(headers))}1"] + [f"{letter}2:{letter}" for letter in letters]
+        value_ranges = self.sheet.batch_get(ranges, value_render_option='UNFORMATTED_VALUE')
+
+        sheet_headers = [str(value) for value in (value_ranges[0][0] if value_ranges[0] else [])]
+        # 空のセルは行の末尾・範囲の末尾が省略されるため、最も長い列に合わせて補う
+        values = [[row[0] if row else '' for row in value_range] for value_range in value_ranges[1:]]
+        row_count = max((len(column) for column in values), default=0)
+        values = [column + [''] * (row_count - len(column)) for column in values]
+        compare_values = values[:len(compare_columns)]
+        rows = [list(row) for row in zip(*compare_values)] if row_count else []
+        dates = values[columns.index(date_column)] if date_column else []
+        return sheet_headers, rows, dates
+
+    @staticmethod
+    def _bucket_ranges(sheet_bucket: np.ndarray) -> Optional[Dict[str, Tuple[int, int]]]:
+        """
+        シートのバケットごとの行の範囲を求める
+
+        Returns:
+            Optional[Dict[str, Tuple[int, int]]]: バケット → データ行の範囲 [start, end)。
+                バケットが連続していない・昇順でない場合はNone
+        """
+        if len(sheet_bucket) == 0:
+            return {}
+        changes = np.flatnonzero(sheet_bucket[1:] != sheet_bucket[:-1]) + 1
+        starts = np.concatenate(([0], changes))
+        ends = np.concatenate((changes, [len(sheet_bucket)]))
+        keys = sheet_bucket[starts].tolist()
+        if len(set(keys)) != len(keys) or keys != sorted(keys):
+            return None
+        return {key: (int(start), int(end)) for key, start, end in zip(keys, starts, ends)}
+
+    def _repair(self, dataset: Dataset, operations: List[Tuple[int, str, List[int], List[int]]]) -> None:
+        """
+        余分な行の削除・欠落した行の挿入と値の書き込みを1回の batchUpdate で行う
+
+        Args:
+            dataset (Dataset): 同期が転記するデータセット
+            operations (List[Tuple[int, str, List[int], List[int]]]): バケットごとの
+                (挿入位置のデータ行, バケット, 削除するデータ行, 挿入するb→dash側の行の位置)
+        """
+        # 挿入する行を、配信年月順に読み出したチャンクから取り出す
+        wanted = np.array(sorted(p for op in operations for p in op[3]), dtype=np.int64)
+        source_rows: Dict[int, List[Any]] = {}
+        offset = 0
+        for chunk in dataset.iter_chunks():
+            selected = wanted[(wanted >= offset) & (wanted < offset + len(chunk))]
+            if len(selected):
+                rows = [row for block in iter_row_blocks(chunk.iloc[selected - offset]) for row in block]
+                source_rows.update(zip(selected.tolist(), rows))
+            offset += len(chunk)
+
+        # 下のバケットから処理し、上の行の位置がずれないようにする（データ行 i はグリッドの i+1 行目）
+        sheet_id = self.sheet.sheet.id
+        requests: List[Dict[str, Any]] = []
+        for anchor, _, extra, missing in sorted(operations, key=lambda op: (op[0], op[1]), reverse=True):
+            for start, end in _descending_runs(extra):
+                requests.append({'deleteDimension': {'range': {
+                    'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': start + 1, 'endIndex': end + 1,
+                }}})
+            if not missing:
+                continue
+            at = anchor - len(extra) + 1
+            requests.append({'insertDimension': {
+                'range': {'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': at, 'endIndex': at + len(missing)},
+                # ヘッダーの直後に挿入する場合はヘッダーの書式を引き継がない
+                'inheritFromBefore': at > 1,
+            }})
+            requests.append({'updateCells': {
+                'start': {'sheetId': sheet_id, 'rowIndex': at, 'columnIndex': 0},
+                'rows': [{'values': [_cell_data(value) for value in source_rows[p]]} for p in missing],
+                'fields': 'userEnteredValue',
+            }})
+        self.sheet.workbook.batch_update({'requests': requests})
+        self.sheet.invalidate_cache()
+
+    @staticmethod
+    def _full_rewrite(result: Dict[str, Any], reason: str) -> Dict[str, Any]:
+        logger.warning(f"⚠️ {reason}。行単位では修復できないため、全件を書き直します")
+        result.update({'status': 'full_rewrite', 'reason': reason})
+        return result
+
+
+def create_reconciler(datafile_id: str, sheet: SpreadSheet) -> SheetReconciler:
+    """
+    設定ファイル（[DATAFILE_<id>] / [RECONCILE] / [BDASH] primary_key）から突き合わせを作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+        sheet (SpreadSheet): 接続済みの転記先のスプレッドシート
+
+    Returns:
+        SheetReconciler: 突き合わせ
+    """
+    key_columns = parse_key_columns(env.get_datafile_config_value(datafile_id, 'primary_key', 'BDASH', ''))
+    if env.get_datafile_config_value(datafile_id, 'compare_values', 'RECONCILE', False):
+        key_columns = []
+    return SheetReconciler(
+        sheet,
+        key_columns,
+        max_repair_ratio=float(env.get_datafile_config_value(datafile_id, 'max_repair_ratio', 'RECONCILE', 0.2)),
+        dry_run=bool(env.get_datafile_config_value(datafile_id, 'dry_run', 'RECONCILE', False)),
+    )
+
+
+def _schedule_store() -> SyncStateStore:
+    state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+    return SyncStateStore(env.get_project_root() / state_dir / 'reconcile_state.json')
+
+
+def reconcile_due(datafile_id: str, now: Optional[datetime] = None, state_store: Optional[SyncStateStore] = None) -> bool:
+    """
+    突き合わせの実行時刻になったかどうか（[SYNC_SETTINGS] MISSING_RECORDS_SYNC_HOUR 以降で、
+    前回の実行から CHECK_INTERVAL_DAYS 日以上経過。7日以上の間隔の場合は FULL_CHECK_DAY の曜日のみ）
+
+    Args:
+        datafile_id (str): データファイルID
+        now (Optional[datetime]): 現在時刻（Noneの場合は datetime.now()）
+        state_store (Optional[SyncStateStore]): 前回の実行日の保存先（Noneの場合は STATE_DIR/reconcile_state.json）
+
+    Returns:
+        bool: 実行する場合はTrue
+    """
+    if not env.get_config_value('RECONCILE', 'enabled', False):
+        return False
+    now = now or datetime.now()
+    if now.hour < int(env.get_config_value('SYNC_SETTINGS', 'MISSING_RECORDS_SYNC_HOUR', 20)):
+        return False
+    interval = int(env.get_config_value('SYNC_SETTINGS', 'CHECK_INTERVAL_DAYS', 1))
+    if interval >= 7 and now.weekday() != int(env.get_config_value('SYNC_SETTINGS', 'FULL_CHECK_DAY', 6)):
+        return False
+    state_store = state_store or _schedule_store()
+    last_run = state_store.get(datafile_id).get('last_run_date') or env.get_config_value(
+        'SYNC_SETTINGS', 'LAST_FULL_CHECK_DATE', ''
+    )
+    if not last_run:
+        return True
+    try:
+        return (now.date() - date.fromisoformat(str(last_run))).days >= interval
+    except ValueError:
+        logger.warning(f"⚠️ 前回の突き合わせの実行日を解釈できないため、実行します: {last_run}")
+        return True
+
+
+def mark_reconciled(datafile_id: str, result: Dict[str, Any], now: Optional[datetime] = None, state_store: Optional[SyncStateStore] = None) -> None:
+    """
+    突き合わせの実行日と結果を保存します（次回の実行時刻の判定に使用）。
+
+    Args:
+        datafile_id (str): データファイルID
+        result (Dict[str, Any]): 突き合わせの結果
+        now (Optional[datetime]): 現在時刻（Noneの場合は datetime.now()）
+        state_store (Optional[SyncStateStore]): 保存先（Noneの場合は STATE_DIR/reconcile_state.json）
+    """
+    now = now or datetime.now()
+    (state_store or _schedule_store()).save(datafile_id, {
+        'last_run_date': now.date().isoformat(),
+        'status': result.get('status'),
+        'missing_rows': result.get('missing_rows', 0),
+        'extra_rows': result.get('extra_rows', 0),
+    })
@@ -0,0 +1,231 @@
+"""
+取得したレコードを行単位で絞り込むモジュール
+
+設定ファイルに記載した条件（日付範囲・一致・IN）をページごとのDataFrameに
+ベクトル演算で適用し、不要な行を保存・転記の前に取り除きます。
+APIが絞り込みに対応している場合は、同じ条件をリクエストパラメータとしても送信できます。
+
+条件の書式（セミコロン区切りで複数指定、すべて満たす行を残します）:
+    配信年月 >= 2024/01; 配信種別 in (メール, LINE); ステータス != 停止
+
+制限事項:
+    - 配信年月カラムは年月として、数値型のカラムは数値として、それ以外は文字列として比較します
+    - 比較できない値（欠損・日付に変換できない値）を含む行は除外されます
+    - ワーカープロセスでも使用するため、設定・ロギングのモジュールは読み込みません
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from src.modules.chunk_store import find_date_column
+
+_IN_PATTERN = re.compile(r'^(?P<column>.+?)\s+(?P<op>not\s+in|in)\s*\((?P<value>.*)\)$', re.IGNORECASE)
+_COMPARE_PATTERN = re.compile(r'^(?P<column>.+?)\s*(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>.+)$')
+
+
+def _to_month(values: pd.Series) -> pd.Series:
+    """配信年月（YYYY/MM形式）を月初の日時に変換する（変換できない値はNaT）"""
+    return pd.to_datetime(values.astype(str) + '/01', format='%Y/%m/%d', errors='coerce')
+
+
+class RowPredicate:
+    """1つの絞り込み条件"""
+
+    def __init__(self, column: str, op: str, values: List[str]):
+        """
+        Args:
+            column (str): カラムIDまたは日本語カラム名
+            op (str): 演算子（=, !=, >, >=, <, <=, in, not in）
+            values (List[str]): 比較する値（in / not in 以外は1件）
+        """
+        self.column = column
+        self.op = op
+        self.values = values
+
+    def _coerce(self, series: pd.Series, values: List[str]):
+        """カラムの種類に合わせて比較用の値に変換する"""
+        if find_date_column([str(series.name)]):
+            return _to_month(series), _to_month(pd.Series(values))
+        if pd.api.types.is_numeric_dtype(series):
+            return pd.to_numeric(series, errors='coerce'), pd.to_numeric(pd.Series(values), errors='coerce')
+        # 型変換前（文字列のまま）の数値カラムは、すべての値が数値に変換できれば数値として比較する
+        numeric_values = pd.to_numeric(pd.Series(values), errors='coerce')
+        if numeric_values.notna().all():
+            numeric_series = pd.to_numeric(series, errors='coerce')
+            if numeric_series.notna().sum() == series.notna().sum():
+                return numeric_series, numeric_values
+        return series.astype('string'), pd.Series(values, dtype='string')
+
+    def mask(self, series: pd.Series) -> pd.Series:
+        """
+        条件を満たす行をTrueとするマスクを返します。
+
+        Args:
+            series (pd.Series): 対象のカラム
+
+        Returns:
+            pd.Series: 条件を満たす行のマスク
+        """
+        left, right = self._coerce(series, self.values)
+        if self.op in ('in', 'not in'):
+            matched = left.isin(right.dropna().tolist()) & left.notna()
+            return ~matched & left.notna() if self.op == 'not in' else matched
+
+        value = right.iloc[0]
+        if self.op == '=':
+            result = left == value
+        elif self.op == '!=':
+            result = left != value
+        elif self.op == '>':
+            result = left > value
+        elif self.op == '>=':
+            result = left >= value
+        elif self.op == '<':
+            result = left < value
+        else:
+            result = left <= value
+        return result.fillna(False).astype(bool) & left.notna()
+
+    def to_dict(self, column_id: str) -> Dict[str, Any]:
+        return {'column': column_id, 'op': self.op, 'values': self.values}
+
+
+def parse_predicates(text: str) -> List[RowPredicate]:
+    """
+    絞り込み条件の文字列を解析します。
+
+    Args:
+        text (str): セミコロン区切りの条件
+
+    Returns:
+        List[RowPredicate]: 絞り込み条件
+
+    Raises:
+        ValueError: 条件の書式が不正な場合
+    """
+    predicates = []
+    for part in str(text or '').split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        match = _IN_PATTERN.match(part)
+        if match:
+            values = [v.strip().strip('"\'') for v in match.group('value').split(',') if v.strip()]
+            op = 'not in' if match.group('op').lower().startswith('not') else 'in'
+        else:
+            match = _COMPARE_PATTERN.match(part)
+            if not match:
+                raise ValueError(f"絞り込み条件の書式が不正です: {part}")
+            values = [match.group('value').strip().strip('"\'')]
+            op = match.group('op')
+        predicates.append(RowPredicate(match.group('column').strip(), op, values))
+    return predicates
+
+
+class RowFilter:
+    """複数の絞り込み条件をまとめて適用するクラス"""
+
+    def __init__(self, predicates: List[RowPredicate], recent_months: int = 0):
+        """
+        Args:
+            predicates (List[RowPredicate]): 絞り込み条件
+            recent_months (int): 直近何か月分の配信年月を残すか（0=制限なし、当月を含む）
+        """
+        self.predicates = predicates
+        self.recent_months = recent_months
+        self.cutoff_month: Optional[str] = None
+        if recent_months > 0:
+            cutoff = pd.Timestamp.today().to_period('M') - (recent_months - 1)
+            self.cutoff_month = cutoff.strftime('%Y/%m')
+
+    def __bool__(self) -> bool:
+        return bool(self.predicates) or self.cutoff_month is not None
+
+    @property
+    def columns(self) -> List[str]:
+        """条件で参照するカラム（カラムIDまたは日本語カラム名）"""
+        return [predicate.column for predicate in self.predicates]
+
+    def required_columns(self, header_info: List[Dict[str, Any]]) -> List[str]:
+        """
+        絞り込みに必要なカラム（条件で参照するカラムと、直近の月数を指定した場合の配信年月カラム）
+
+        Args:
+            header_info (List[Dict[str, Any]]): ヘッダー情報（配信年月カラムの特定に使用）
+
+        Returns:
+            List[str]: カラムIDまたは日本語カラム名
+        """
+        columns = list(self.columns)
+        if self.cutoff_month is not None:
+            date_column = find_date_column([col.get('column_name', '') for col in header_info])
+            if date_column is not None and date_column not in columns:
+                columns.append(date_column)
+        return columns
+
+    def _resolve_column(self, df: pd.DataFrame, column: str, header_info: List[Dict[str, Any]]) -> Optional[str]:
+        if column in df.columns:
+            return column
+        for col in header_info:
+            if col.get('column_id', '').lower() == column.lower():
+                return col.get('column_name') if col.get('column_name') in df.columns else None
+        return None
+
+    def apply(self, df: pd.DataFrame, header_info: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        条件をすべて満たす行だけを返します。
+
+        Args:
+            df (pd.DataFrame): 日本語カラム名に変換済みのDataFrame
+            header_info (List[Dict[str, Any]]): ヘッダー情報（カラムIDで指定された条件の解決に使用）
+
+        Returns:
+            pd.DataFrame: 絞り込み後のDataFrame
+
+        Raises:
+            KeyError: 条件のカラムがDataFrameに存在しない場合
+        """
+        if df.empty:
+            return df
+        keep = pd.Series(True, index=df.index)
+        predicates = list(self.predicates)
+        if self.cutoff_month is not None:
+            date_column = find_date_column(df.columns.tolist())
+            if date_column is None:
+                raise KeyError("直近の月数を指定していますが、配信年月カラムが見つかりません")
+            predicates.append(RowPredicate(date_column, '>=', [self.cutoff_month]))
+
+        for predicate in predicates:
+            column = self._resolve_column(df, predicate.column, header_info)
+            if column is None:
+                raise KeyError(f"絞り込み条件のカラムが見つかりません: {predicate.column}")
+            keep &= predicate.mask(df[column])
+        return df[keep].reset_index(drop=True)
+
+    def to_api_filters(self, header_info: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        APIに送信する絞り込み条件を作成します（カラムIDに変換できた条件のみ）。
+
+        Args:
+            header_info (List[Dict[str, Any]]): ヘッダー情報
+
+        Returns:
+            List[Dict[str, Any]]: column / op / values の一覧
+        """
+        ids_by_entry = {}
+        for col in header_info:
+            ids_by_entry[col.get('column_id', '').lower()] = col.get('column_id', '')
+            ids_by_entry[col.get('column_name')] = col.get('column_id', '')
+
+        predicates = list(self.predicates)
+        if self.cutoff_month is not None:
+            date_column = find_date_column([col.get('column_name', '') for col in header_info])
+            if date_column:
+                predicates.append(RowPredicate(date_column, '>=', [self.cutoff_month]))
+
+        filters = []
+        for predicate in predicates:
+            column_id = ids_by_entry.get(predicate.column, ids_by_entry.get(predicate.column.lower()))
+            if column_id:
+                filters.append(predicate.to_dict(column_id))
+        return filters
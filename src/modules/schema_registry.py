@@ -0,0 +1,263 @@
+"""
+データファイルのスキーマ（header_info）を登録・比較するモジュール
+
+データファイルIDごとに header_info・フィンガープリント・変換プラン（カラム名の対応と型）を
+ディスクに保存します。スキーマが前回と同じ場合は保存済みの変換プランをそのまま使い、
+カラムの追加・削除・名称変更・型変更（スキーマドリフト）があれば検出して報告します。
+
+制限事項:
+    - 型変換は数値型（整数・小数）のみ行い、変換できない値を含むカラムは元の型のままにします
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.file_lock import file_lock, write_json_atomic
+from src.modules.sync_state import schema_fingerprint
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# header_info の data_type（小文字）→ pandas の型
+_NUMERIC_DTYPES = {
+    'int': 'Int64',
+    'integer': 'Int64',
+    'bigint': 'Int64',
+    'long': 'Int64',
+    'float': 'Float64',
+    'double': 'Float64',
+    'decimal': 'Float64',
+    'numeric': 'Float64',
+    'number': 'Float64',
+}
+
+
+class SchemaPlan:
+    """header_info から作成したカラム名の対応と型の変換プラン"""
+
+    def __init__(self, column_names: Dict[str, str], dtypes: Dict[str, str]):
+        """
+        Args:
+            column_names (Dict[str, str]): カラムID（小文字）→ 日本語カラム名
+            dtypes (Dict[str, str]): 日本語カラム名 → pandas の型
+        """
+        self.column_names = column_names
+        self.dtypes = dtypes
+
+    @classmethod
+    def compile(cls, header_info: List[Dict[str, Any]]) -> 'SchemaPlan':
+        """
+        header_info から変換プランを作成します。
+
+        Args:
+            header_info (List[Dict[str, Any]]): APIレスポンスのヘッダー情報
+
+        Returns:
+            SchemaPlan: 変換プラン
+        """
+        column_names = {}
+        dtypes = {}
+        for col in header_info:
+            column_id = col.get('column_id', '')
+            column_name = col.get('column_name', column_id)
+            column_names[column_id.lower()] = column_name
+            dtype = _NUMERIC_DTYPES.get(str(col.get('data_type', '')).lower())
+            if dtype:
+                dtypes[column_name] = dtype
+        return cls(column_names, dtypes)
+
+    def column_mapping(self, keys: List[str]) -> Dict[str, str]:
+        """
+        レコードのキーから日本語カラム名への対応を返します。
+
+        Args:
+            keys (List[str]): レコードで使用されているキー
+
+        Returns:
+            Dict[str, str]: レコードのキー → 日本語カラム名
+        """
+        return {key: self.column_names[key.lower()] for key in keys if key.lower() in self.column_names}
+
+    def apply_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        数値型のカラムを変換します。変換できない値を含むカラムはそのままにします。
+
+        Args:
+            df (pd.DataFrame): 日本語カラム名に変換済みのDataFrame
+
+        Returns:
+            pd.DataFrame: 型変換後のDataFrame
+        """
+        for column_name, dtype in self.dtypes.items():
+            if column_name not in df.columns or str(df[column_name].dtype) == dtype:
+                continue
+            converted = pd.to_numeric(df[column_name], errors='coerce')
+            if converted.isna().sum() != df[column_name].isna().sum():
+                continue
+            try:
+                df[column_name] = converted.astype(dtype)
+            except (TypeError, ValueError):
+                # 小数を含む整数カラムなどは数値変換のみ適用する
+                df[column_name] = converted
+        return df
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'column_names': self.column_names, 'dtypes': self.dtypes}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SchemaPlan':
+        return cls(data.get('column_names', {}), data.get('dtypes', {}))
+
+
+def detect_drift(old_header_info: List[Dict[str, Any]], new_header_info: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    2つの header_info を比較し、スキーマの差分を返します。
+
+    Args:
+        old_header_info (List[Dict[str, Any]]): 前回のヘッダー情報
+        new_header_info (List[Dict[str, Any]]): 今回のヘッダー情報
+
+    Returns:
+        Dict[str, List[Any]]: added / removed / renamed / type_changed / reordered の一覧
+    """
+    old_columns = {col.get('column_id', '').lower(): col for col in old_header_info}
+    new_columns = {col.get('column_id', '').lower(): col for col in new_header_info}
+
+    drift: Dict[str, List[Any]] = {
+        'added': [new_columns[c].get('column_name', c) for c in new_columns if c not in old_columns],
+        'removed': [old_columns[c].get('column_name', c) for c in old_columns if c not in new_columns],
+        'renamed': [],
+        'type_changed': [],
+        'reordered': [],
+    }
+    for column_id in new_columns.keys() & old_columns.keys():
+        old_col, new_col = old_columns[column_id], new_columns[column_id]
+        if old_col.get('column_name') != new_col.get('column_name'):
+            drift['renamed'].append([old_col.get('column_name'), new_col.get('column_name')])
+        if old_col.get('data_type') != new_col.get('data_type'):
+            drift['type_changed'].append(
+                [new_col.get('column_name'), old_col.get('data_type'), new_col.get('data_type')]
+            )
+
+    common_old = [c for c in old_columns if c in new_columns]
+    common_new = [c for c in new_columns if c in old_columns]
+    if common_old != common_new:
+        drift['reordered'] = [new_columns[c].get('column_name', c) for c in common_new]
+    return drift
+
+
+class SchemaRegistry:
+    """データファイルごとのスキーマと変換プランをJSONファイルで保存するクラス"""
+
+    def __init__(self, registry_file: Optional[Path] = None):
+        """
+        Args:
+            registry_file (Optional[Path]): 保存先ファイルのパス（Noneの場合は設定値から決定）
+        """
+        if registry_file is None:
+            state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+            registry_file = env.get_project_root() / state_dir / 'schema_registry.json'
+        self.registry_file = Path(registry_file)
+        self._entries: Optional[Dict[str, Any]] = None
+
+    def _read(self) -> Dict[str, Any]:
+        """レジストリのファイルを読み込む（file_lock の中で呼び出す）"""
+        if not self.registry_file.exists():
+            return {}
+        try:
+            with open(self.registry_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ スキーマレジストリの読み込みに失敗したため無視します: {e}")
+            return {}
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            with file_lock(self.registry_file):
+                self._entries = self._read()
+        return self._entries
+
+    def _save(self, datafile_id: str) -> None:
+        """
+        データファイルのエントリを保存する
+
+        複数のワーカーが同じファイルを更新するため、ロックを取得してから読み込み直し、
+        このデータファイルのエントリだけを置き換えて保存する
+        """
+        with file_lock(self.registry_file):
+            entries = self._read()
+            entries[str(datafile_id)] = self._load()[str(datafile_id)]
+            write_json_atomic(self.registry_file, entries)
+
+    def get_header_info(self, datafile_id: str) -> List[Dict[str, Any]]:
+        """
+        登録済みのヘッダー情報を返します。
+
+        Args:
+            datafile_id (str): データファイルID
+
+        Returns:
+            List[Dict[str, Any]]: 前回のヘッダー情報（未登録の場合は空のリスト）
+        """
+        return self._load().get(str(datafile_id), {}).get('header_info', [])
+
+    def resolve(self, datafile_id: str, header_info: List[Dict[str, Any]]) -> Tuple[SchemaPlan, Optional[Dict[str, List[Any]]]]:
+        """
+        header_info に対応する変換プランを返します。
+        スキーマが登録済みのものと同じ場合は保存済みのプランを再利用します。
+
+        Args:
+            datafile_id (str): データファイルID
+            header_info (List[Dict[str, Any]]): 今回のヘッダー情報
+
+        Returns:
+            Tuple[SchemaPlan, Optional[Dict[str, List[Any]]]]:
+                (変換プラン, スキーマドリフト（初回登録・変更なしの場合はNone）)
+        """
+        entries = self._load()
+        fingerprint = schema_fingerprint(header_info)
+        entry = entries.get(str(datafile_id))
+
+        if entry and entry.get('fingerprint') == fingerprint:
+            return SchemaPlan.from_dict(entry.get('plan', {})), None
+
+        drift = detect_drift(entry.get('header_info', []), header_info) if entry else None
+        plan = SchemaPlan.compile(header_info)
+        entries[str(datafile_id)] = {
+            'fingerprint': fingerprint,
+            'header_info': header_info,
+            'plan': plan.to_dict(),
+            'updated_at': datetime.now().isoformat(),
+        }
+        self._save(datafile_id)
+
+        if entry is None:
+            logger.info(f"📝 データファイル {datafile_id} のスキーマを登録しました: {len(header_info)}列")
+        return plan, drift
+
+
+def format_drift(drift: Dict[str, List[Any]]) -> str:
+    """
+    スキーマドリフトを表示用の文字列にします。
+
+    Args:
+        drift (Dict[str, List[Any]]): detect_drift の結果
+
+    Returns:
+        str: 表示用の文字列
+    """
+    parts = []
+    if drift.get('added'):
+        parts.append(f"追加: {', '.join(drift['added'])}")
+    if drift.get('removed'):
+        parts.append(f"削除: {', '.join(drift['removed'])}")
+    if drift.get('renamed'):
+        parts.append("名称変更: " + ', '.join(f"{old}→{new}" for old, new in drift['renamed']))
+    if drift.get('type_changed'):
+        parts.append("型変更: " + ', '.join(f"{name}({old}→{new})" for name, old, new in drift['type_changed']))
+    if drift.get('reordered'):
+        parts.append("列順変更")
+    return ' / '.join(parts) or "変更なし"
@@ -0,0 +1,126 @@
+"""
+DataFrameをスプレッドシート書き込み用の値（JSONに変換可能な行リスト）に変換するモジュール
+
+DataFrame全体のコピー（replace / fillna / values.tolist）を作らず、
+カラムごとにNumPy配列から一括でPythonの値に変換し、指定行数のブロック単位で返します。
+NaN・Inf・NaT・None・pd.NA は空文字列に、NumPyのスカラー値はPythonの値に、
+日時は文字列に変換します。
+"""
+
+import math
+from datetime import date, datetime
+from typing import Any, Callable, Iterator, List
+import numpy as np
+import pandas as pd
+
+# 変換が不要な型
+_PLAIN_TYPES = (str, int, bool)
+
+
+def _convert_value(value: Any) -> Any:
+    """
+    object型カラムの値を1つ変換する
+
+    Args:
+        value (Any): 変換する値
+
+    Returns:
+        Any: JSONに変換可能な値
+    """
+    value_type = type(value)
+    if value_type in _PLAIN_TYPES:
+        return value
+    if value_type is float:
+        return value if math.isfinite(value) else ""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ""
+    if isinstance(value, np.generic):
+        return _convert_value(value.item())
+    if isinstance(value, float):
+        return float(value) if math.isfinite(value) else ""
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return str(value)
+
+
+def _float_converter(array: np.ndarray) -> Callable[[int, int], List[Any]]:
+    finite = np.isfinite(array)
+    has_missing = not finite.all()
+
+    def convert(start: int, end: int) -> List[Any]:
+        values = array[start:end].tolist()
+        if has_missing:
+            for index in np.flatnonzero(~finite[start:end]).tolist():
+                values[index] = ""
+        return values
+    return convert
+
+
+def _datetime_converter(series: pd.Series) -> Callable[[int, int], List[Any]]:
+    # 時刻がすべて0時ならCSV出力と同様に日付のみで表す
+    non_null = series.dropna()
+    only_dates = bool((non_null == non_null.dt.normalize()).all()) if len(non_null) else True
+    formatted = series.dt.strftime('%Y-%m-%d' if only_dates else '%Y-%m-%d %H:%M:%S')
+    array = formatted.to_numpy(dtype=object, na_value="")
+
+    def convert(start: int, end: int) -> List[Any]:
+        return array[start:end].tolist()
+    return convert
+
+
+def _column_converter(series: pd.Series) -> Callable[[int, int], List[Any]]:
+    """
+    カラムの型に応じた変換関数を作成する
+
+    Args:
+        series (pd.Series): 変換対象のカラム
+
+    Returns:
+        Callable[[int, int], List[Any]]: 行範囲 [start, end) の値リストを返す関数
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype):
+        if dtype.kind == 'f':
+            return _float_converter(series.to_numpy())
+        if dtype.kind in 'iub':
+            array = series.to_numpy()
+            return lambda start, end: array[start:end].tolist()
+        if dtype.kind == 'M':
+            return _datetime_converter(series)
+
+    # object型・拡張型（文字列、Nullable整数など）は値ごとに変換する
+    array = series.to_numpy(dtype=object)
+    return lambda start, end: [_convert_value(v) for v in array[start:end].tolist()]
+
+
+def iter_row_blocks(df: pd.DataFrame, block_rows: int = 5000) -> Iterator[List[List[Any]]]:
+    """
+    DataFrameをスプレッドシート書き込み用の行リストにブロック単位で変換する
+
+    Args:
+        df (pd.DataFrame): 変換するDataFrame
+        block_rows (int): 1ブロックあたりの行数
+
+    Yields:
+        List[List[Any]]: 行ごとの値のリスト（ヘッダーは含まない）
+    """
+    converters = [_column_converter(df.iloc[:, i]) for i in range(df.shape[1])]
+    for start in range(0, len(df), block_rows):
+        end = min(start + block_rows, len(df))
+        columns = [convert(start, end) for convert in converters]
+        yield [list(row) for row in zip(*columns)]
+
+
+def header_values(df: pd.DataFrame) -> List[str]:
+    """
+    ヘッダー行の値を返す
+
+    Args:
+        df (pd.DataFrame): 対象のDataFrame
+
+    Returns:
+        List[str]: カラム名のリスト
+    """
+    return [str(col) for col in df.columns]
@@ -0,0 +1,253 @@
+"""
+大きなデータセットを複数のワークシート・スプレッドシートに分割（シャーディング）して転記するモジュール
+
+配信年月の年ごと、または行数ごとにデータを分割し、シャードごとのワークシートへ並列に書き込みます。
+転記先のスプレッドシートにはインデックスシートを作成し、シャードの配置先・範囲・行数を一覧にします。
+スプレッドシートあたりのセル数の上限に達しないよう、シャードを複数のスプレッドシートに振り分けることもできます。
+
+制限事項:
+    - チャンクはシャードキー（配信年月）の順に並んでいる必要があります
+    - 書き込み中のシャードは max_workers 件までメモリに保持します
+    - 前回のインデックスにあり今回作成しなかったシャードのワークシートは削除します
+"""
+
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+from src.modules.chunk_store import find_date_column, month_partition_keys, UNKNOWN_PARTITION
+from src.modules.csv_to_sheet import num_to_col_letter, write_row_blocks
+from src.modules.sheet_serializer import iter_row_blocks
+from src.modules.spreadsheet import SpreadSheet
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_HEADERS = ['シート名', 'スプレッドシートID', '開始', '終了', '行数', '更新日時']
+
+
+def _shard_keys(chunk: pd.DataFrame, shard_by: str) -> Optional[pd.Series]:
+    """チャンクの各行のシャードキーを返す（行数で分割する場合はNone）"""
+    if shard_by != 'year':
+        return None
+    date_column = find_date_column(chunk.columns.tolist())
+    if date_column is None:
+        raise ValueError("年ごとに分割するには配信年月カラムが必要です")
+    keys = month_partition_keys(chunk[date_column])
+    return keys.str[:4].where(keys != UNKNOWN_PARTITION, 'unknown')
+
+
+def _shard_name(key: str, part_no: int) -> str:
+    """シャード名（年ごとの場合は 2024, 2024_2 ...、行数ごとの場合は 001, 002 ...）"""
+    if not key:
+        return f"{part_no:03d}"
+    return key if part_no == 1 else f"{key}_{part_no}"
+
+
+def iter_shards(chunks: Iterable[pd.DataFrame], shard_by: str, max_rows: int) -> Iterator[Tuple[str, List[pd.DataFrame]]]:
+    """
+    チャンクをシャードにまとめます。
+    同じキーでも max_rows 行を超える分は別のシャードになります。
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): 書き込み順に並んだチャンク
+        shard_by (str): 分割方法（year=配信年月の年ごと、rows=行数ごと）
+        max_rows (int): 1シャードあたりの最大行数
+
+    Yields:
+        Tuple[str, List[pd.DataFrame]]: (シャード名, シャードに含めるDataFrameのリスト)
+    """
+    part_numbers: Dict[str, int] = {}
+    current_key: Optional[str] = None
+    parts: List[pd.DataFrame] = []
+    rows = 0
+
+    for chunk in chunks:
+        keys = _shard_keys(chunk, shard_by)
+        pieces = chunk.groupby(keys, sort=False) if keys is not None else [('', chunk)]
+        for key, piece in pieces:
+            start = 0
+            while start < len(piece):
+                if key != current_key or rows >= max_rows:
+                    if parts:
+                        yield _shard_name(current_key, part_numbers[current_key]), parts
+                    current_key = key
+                    part_numbers[key] = part_numbers.get(key, 0) + 1
+                    parts, rows = [], 0
+                take = min(max_rows - rows, len(piece) - start)
+                parts.append(piece.iloc[start:start + take])
+                rows += take
+                start += take
+    if parts:
+        yield _shard_name(current_key, part_numbers[current_key]), parts
+
+
+class ShardedSheetWriter:
+    """シャードを複数のワークシートに並列で書き込み、インデックスシートを更新するクラス"""
+
+    def __init__(
+        self,
+        credentials_path: Path,
+        spreadsheet_id: str,
+        shard_spreadsheet_ids: Optional[List[str]] = None,
+        sheet_prefix: str = 'data_',
+        index_sheet_name: str = 'shard_index',
+        shard_by: str = 'year',
+        max_rows: int = 200000,
+        chunk_rows: int = 5000,
+        max_workers: int = 3
+    ):
+        """
+        Args:
+            credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
+            spreadsheet_id (str): インデックスシートを置くスプレッドシートID
+            shard_spreadsheet_ids (Optional[List[str]]): シャードを振り分けるスプレッドシートID（Noneの場合は spreadsheet_id のみ）
+            sheet_prefix (str): シャードのワークシート名の接頭辞
+            index_sheet_name (str): インデックスシート名
+            shard_by (str): 分割方法（year=配信年月の年ごと、rows=行数ごと）
+            max_rows (int): 1シャードあたりの最大行数
+            chunk_rows (int): 1回の書き込みリクエストに含める行数
+            max_workers (int): 並列に書き込むシャード数
+        """
+        self.credentials_path = credentials_path
+        self.spreadsheet_id = spreadsheet_id
+        self.shard_spreadsheet_ids = shard_spreadsheet_ids or [spreadsheet_id]
+        self.sheet_prefix = sheet_prefix
+        self.index_sheet_name = index_sheet_name
+        self.shard_by = shard_by
+        self.max_rows = max_rows
+        self.chunk_rows = chunk_rows
+        self.max_workers = max_workers
+
+    def _write_shard(self, spreadsheet_id: str, title: str, parts: List[pd.DataFrame], headers: List[str], first_row: int) -> Dict[str, Any]:
+        """1つのシャードをワークシートに書き込む（スレッドごとに接続する）"""
+        rows = sum(len(part) for part in parts)
+        sheet = SpreadSheet(self.credentials_path, spreadsheet_id, title, create_if_missing=True)
+        if not sheet.connect():
+            raise RuntimeError(f"シャードのシートに接続できません: {title}")
+
+        sheet.sheet.clear()
+        sheet.sheet.resize(rows=rows + 1, cols=len(headers))
+        last_col = num_to_col_letter(len(headers))
+        sheet.sheet.update(values=[headers], range_name=f'A1:{last_col}1')
+        blocks = (block for part in parts for block in iter_row_blocks(part, self.chunk_rows))
+        written_rows = write_row_blocks(sheet, blocks, last_col, self.chunk_rows)
+
+        date_column = find_date_column(parts[0].columns.tolist())
+        if date_column:
+            first, last = parts[0][date_column].iloc[0], parts[-1][date_column].iloc[-1]
+        else:
+            first, last = first_row, first_row + rows - 1
+        logger.info(f"✅ シャード {title} の書き込み完了: {written_rows}行")
+        return {
+            'sheet': title,
+            'spreadsheet_id': spreadsheet_id,
+            'first': str(first),
+            'last': str(last),
+            'rows': written_rows,
+        }
+
+    def _remove_stale_shards(self, index_sheet: SpreadSheet, shards: List[Dict[str, Any]]) -> None:
+        """前回のインデックスにあり今回作成しなかったシャードのワークシートを削除する"""
+        current = {(shard['spreadsheet_id'], shard['sheet']) for shard in shards}
+        try:
+            previous = index_sheet.sheet.get_all_values()[1:]
+        except Exception as e:
+            logger.warning(f"⚠️ 前回のシャードインデックスの取得に失敗しました: {e}")
+            return
+
+        for row in previous:
+            if len(row) < 2 or (row[1], row[0]) in current or not row[0].startswith(self.sheet_prefix):
+                continue
+            try:
+                stale = SpreadSheet(self.credentials_path, row[1], row[0])
+                if stale.connect():
+                    stale.workbook.del_worksheet(stale.sheet)
+                    stale.invalidate_cache()
+                    logger.info(f"🗑️ 不要になったシャードを削除しました: {row[0]}")
+            except Exception as e:
+                logger.warning(f"⚠️ シャード {row[0]} の削除に失敗しました: {e}")
+
+    def _write_index(self, shards: List[Dict[str, Any]]) -> None:
+        """インデックスシートにシャードの一覧を書き込む"""
+        index_sheet = SpreadSheet(self.credentials_path, self.spreadsheet_id, self.index_sheet_name, create_if_missing=True)
+        if not index_sheet.connect():
+            raise RuntimeError(f"インデックスシートに接続できません: {self.index_sheet_name}")
+        self._remove_stale_shards(index_sheet, shards)
+
+        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        values = [INDEX_HEADERS] + [
+            [shard['sheet'], shard['spreadsheet_id'], shard['first'], shard['last'], shard['rows'], updated_at]
+            for shard in shards
+        ]
+        index_sheet.sheet.clear()
+        index_sheet.sheet.resize(rows=len(values), cols=len(INDEX_HEADERS))
+        index_sheet.sheet.update(values=values, range_name=f'A1:{num_to_col_letter(len(INDEX_HEADERS))}{len(values)}')
+        index_sheet.invalidate_cache()
+
+    def write(self, chunks: Iterable[pd.DataFrame], headers: List[str]) -> List[Dict[str, Any]]:
+        """
+        チャンクをシャードに分割して書き込み、インデックスシートを更新します。
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): 書き込み順に並んだチャンク
+            headers (List[str]): ヘッダー行
+
+        Returns:
+            List[Dict[str, Any]]: シャードごとの書き込み結果（sheet / spreadsheet_id / first / last / rows）
+
+        Raises:
+            RuntimeError: シャードの書き込みに失敗した場合
+        """
+        logger.info(f"🧩 シャーディング転記開始: 分割方法={self.shard_by}, 最大{self.max_rows}行/シート, {self.max_workers}並列")
+        futures: List[Future] = []
+        first_row = 1
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for shard_no, (name, parts) in enumerate(iter_shards(chunks, self.shard_by, self.max_rows)):
+                # 書き込み中のシャードは max_workers 件までに抑え、メモリ使用量を制限する
+                pending = [future for future in futures if not future.done()]
+                while len(pending) >= self.max_workers:
+                    wait(pending, return_when=FIRST_COMPLETED)
+                    pending = [future for future in futures if not future.done()]
+
+                spreadsheet_id = self.shard_spreadsheet_ids[shard_no % len(self.shard_spreadsheet_ids)]
+                futures.append(executor.submit(
+                    self._write_shard, spreadsheet_id, f"{self.sheet_prefix}{name}", parts, headers, first_row
+                ))
+                first_row += sum(len(part) for part in parts)
+            shards = [future.result() for future in futures]
+
+        self._write_index(shards)
+        logger.info(f"✅ シャーディング転記完了: {len(shards)}シート / 合計 {sum(s['rows'] for s in shards)}行")
+        return shards
+
+
+def create_shard_writer(datafile_id: str, credentials_path: Path, spreadsheet_id: str) -> Optional[ShardedSheetWriter]:
+    """
+    設定ファイル（[DATAFILE_<id>] / [SHARDING]）からシャーディングの書き込み先を作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+        credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
+        spreadsheet_id (str): 転記先のスプレッドシートID
+
+    Returns:
+        Optional[ShardedSheetWriter]: シャーディングが無効な場合はNone
+    """
+    if not env.get_datafile_config_value(datafile_id, 'shard_enabled', 'SHARDING', False):
+        return None
+    shard_ids = str(env.get_datafile_config_value(datafile_id, 'spreadsheet_ids', 'SHARDING', '') or '')
+    return ShardedSheetWriter(
+        credentials_path,
+        spreadsheet_id,
+        shard_spreadsheet_ids=[s.strip() for s in shard_ids.split(',') if s.strip()] or None,
+        sheet_prefix=env.get_config_value('SHARDING', 'sheet_prefix', 'data_'),
+        index_sheet_name=env.get_config_value('SHARDING', 'index_sheet_name', 'shard_index'),
+        shard_by=env.get_datafile_config_value(datafile_id, 'shard_by', 'SHARDING', 'year'),
+        max_rows=int(env.get_datafile_config_value(datafile_id, 'max_rows', 'SHARDING', 200000)),
+        chunk_rows=env.get_config_value('SPREADSHEET', 'WRITE_CHUNK_ROWS', 5000),
+        max_workers=env.get_config_value('SHARDING', 'max_workers', 3),
+    )
+
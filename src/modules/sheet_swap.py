@@ -0,0 +1,166 @@
+"""
+転記先のシートを空にせずに更新するための、非表示のシャドーシートを管理するモジュール
+
+新しいデータを非表示のシャドーシートに書き込み、書き込みがすべて完了してから
+1回の batchUpdate で転記先のシートに反映します。batchUpdate は全体が一度に適用されるため、
+シートを見ている人・ダッシュボードには、更新前の完全なデータか更新後の完全なデータのどちらかが表示されます。
+
+反映の方法（swap_method）:
+    copy   : シャドーシートの値を転記先のシートにサーバー側でコピーし、シャドーシートを削除します。
+             シートIDが変わらないため、他のシートの数式・フィルタ・共有リンクがそのまま使えます（既定）
+    rename : 転記先のシートを削除し、シャドーシートを同じ名前・位置で表示します。
+             コピーを行わない分速く反映されますが、シートIDが変わるため、他のシートからの参照は #REF! になります
+
+制限事項:
+    - 書き込み中はシャドーシートの分だけスプレッドシートのセル数の上限を消費します
+    - 前回の実行が中断して残ったシャドーシートは、次回の開始時に削除します
+    - copy の場合、転記先のシートの書式は変更せず値のみを置き換えます
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from src.modules.spreadsheet import SpreadSheet
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SHADOW_MARKER = '__staging_'
+
+
+class ShadowWorksheet:
+    """非表示のシャドーシートに書き込み、転記先のシートへ一度に反映するクラス"""
+
+    def __init__(self, credentials_path: Path, spreadsheet_id: str, sheet_name: Optional[str] = None, swap_method: str = 'copy'):
+        """
+        Args:
+            credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
+            spreadsheet_id (str): スプレッドシートID
+            sheet_name (Optional[str]): 転記先のシート名（Noneの場合は先頭のシート）
+            swap_method (str): 反映の方法（copy / rename）
+        """
+        if swap_method not in ('copy', 'rename'):
+            raise ValueError(f"未知の反映方法です: {swap_method}")
+        self.credentials_path = credentials_path
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_name = sheet_name
+        self.swap_method = swap_method
+        self.live: Optional[SpreadSheet] = None
+        self.shadow: Optional[SpreadSheet] = None
+
+    def open(self, rows: int, cols: int) -> SpreadSheet:
+        """
+        転記先のシートに接続し、非表示のシャドーシートを作成します。
+
+        Args:
+            rows (int): シャドーシートの行数（ヘッダー行を含む）
+            cols (int): シャドーシートの列数
+
+        Returns:
+            SpreadSheet: シャドーシートに接続したスプレッドシート（書き込みに使用）
+
+        Raises:
+            RuntimeError: 接続に失敗した場合
+        """
+        self.live = SpreadSheet(self.credentials_path, self.spreadsheet_id, self.sheet_name)
+        if not self.live.connect():
+            raise RuntimeError("スプレッドシートへの接続に失敗しました")
+        self._remove_stale_shadows()
+
+        title = f"{self.live.sheet.title}{SHADOW_MARKER}{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        self.live.workbook.batch_update({'requests': [{
+            'addSheet': {'properties': {
+                'title': title,
+                'hidden': True,
+                'gridProperties': {'rowCount': max(rows, 1), 'columnCount': max(cols, 1)},
+            }}
+        }]})
+        self.shadow = SpreadSheet(self.credentials_path, self.spreadsheet_id, title)
+        if not self.shadow.connect():
+            raise RuntimeError(f"シャドーシートに接続できません: {title}")
+        logger.info(f"🫥 シャドーシートを作成しました: {title}")
+        return self.shadow
+
+    def _remove_stale_shadows(self) -> None:
+        """前回の実行が中断して残ったシャドーシートを削除する"""
+        prefix = f"{self.live.sheet.title}{SHADOW_MARKER}"
+        stale = [ws for ws in self.live.workbook.worksheets() if ws.title.startswith(prefix)]
+        if stale:
+            self.live.workbook.batch_update({'requests': [{'deleteSheet': {'sheetId': ws.id}} for ws in stale]})
+            logger.info(f"🗑️ 残っていたシャドーシートを削除しました: {', '.join(ws.title for ws in stale)}")
+
+    def promote(self, rows: int, cols: int) -> None:
+        """
+        シャドーシートの内容を1回の batchUpdate で転記先のシートに反映します。
+
+        Args:
+            rows (int): 反映する行数（ヘッダー行を含む）
+            cols (int): 反映する列数
+        """
+        live_id, shadow_id = self.live.sheet.id, self.shadow.sheet.id
+        rows, cols = max(rows, 1), max(cols, 1)
+        if self.swap_method == 'copy':
+            grid = {'sheetId': shadow_id, 'startRowIndex': 0, 'endRowIndex': rows, 'startColumnIndex': 0, 'endColumnIndex': cols}
+            requests = [
+                {'updateSheetProperties': {
+                    'properties': {'sheetId': live_id, 'gridProperties': {'rowCount': rows, 'columnCount': cols}},
+                    'fields': 'gridProperties.rowCount,gridProperties.columnCount',
+                }},
+                {'copyPaste': {
+                    'source': grid,
+                    'destination': {**grid, 'sheetId': live_id},
+                    'pasteType': 'PASTE_VALUES',
+                }},
+                {'deleteSheet': {'sheetId': shadow_id}},
+            ]
+        else:
+            # 表示中のシートが1つもない状態にならないよう、先にシャドーシートを表示してから削除・改名する
+            requests = [
+                {'updateSheetProperties': {
+                    'properties': {'sheetId': shadow_id, 'hidden': False, 'index': self.live.sheet.index},
+                    'fields': 'hidden,index',
+                }},
+                {'deleteSheet': {'sheetId': live_id}},
+                {'updateSheetProperties': {
+                    'properties': {'sheetId': shadow_id, 'title': self.live.sheet.title},
+                    'fields': 'title',
+                }},
+            ]
+        self.live.workbook.batch_update({'requests': requests})
+        self.live.invalidate_cache()
+        self.shadow.invalidate_cache()
+        self.shadow = None
+        logger.info(f"🔀 シャドーシートを転記先のシートに反映しました（{self.swap_method}）: {rows - 1}行 × {cols}列")
+
+    def discard(self) -> None:
+        """シャドーシートを削除します（書き込みに失敗した場合。転記先のシートは更新前のまま）。"""
+        if self.shadow is None or self.shadow.sheet is None:
+            return
+        try:
+            self.live.workbook.batch_update({'requests': [{'deleteSheet': {'sheetId': self.shadow.sheet.id}}]})
+            logger.info(f"🗑️ シャドーシートを削除しました（転記先のシートは更新前のままです）: {self.shadow.sheet.title}")
+        except Exception as e:
+            logger.warning(f"⚠️ シャドーシートの削除に失敗しました（次回の実行時に削除します）: {e}")
+        self.shadow = None
+
+
+def create_shadow_worksheet(datafile_id: str, credentials_path: Path, spreadsheet_id: str) -> Optional[ShadowWorksheet]:
+    """
+    設定ファイル（[DATAFILE_<id>] / [SPREADSHEET]）からシャドーシートを作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+        credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
+        spreadsheet_id (str): スプレッドシートID
+
+    Returns:
+        Optional[ShadowWorksheet]: シャドーシートを使用しない（STAGED_UPLOAD=false）場合はNone
+    """
+    if not env.get_datafile_config_value(datafile_id, 'STAGED_UPLOAD', 'SPREADSHEET', False):
+        return None
+    return ShadowWorksheet(
+        credentials_path,
+        spreadsheet_id,
+        swap_method=env.get_datafile_config_value(datafile_id, 'STAGED_SWAP_METHOD', 'SPREADSHEET', 'copy'),
+    )
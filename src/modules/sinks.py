@@ -0,0 +1,355 @@
+"""
+取得・変換したデータセットを複数の出力先（シンク）へ並行して出力するモジュール
+
+スプレッドシート・CSV・Parquet・オブジェクトストレージ・月別集計の各シンクが同じデータセットを
+それぞれ読み出して書き込みます。同期処理が待つのは主シンク（通常はスプレッドシート）のみで、
+任意シンクは optional_timeout_sec まで待ったあともバックグラウンドで出力を続けます。
+シンクごとに成否・処理時間を SinkResult として返します。
+
+制限事項:
+    - データセットはシンクごとに先頭から読み出すため、何度でも読み出せる必要があります
+    - ストリーミング方式では退避ファイルを削除する前に SinkFanout.close() で全シンクの完了を待ちます
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.modules.checkpoint import SyncCheckpoint
+from src.modules.chunk_store import ChunkStore
+from src.modules.csv_to_sheet import upload_chunks_to_sheet
+from src.modules.monthly_summary import SummarySheetWriter, create_aggregator
+from src.modules.parquet_export import export_datafile_to_object_store
+from src.modules.sheet_sharding import create_shard_writer
+from src.modules.sheet_swap import create_shadow_worksheet
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class Dataset:
+    """シンクに渡すデータセット（チャンクを何度でも先頭から読み出せる）"""
+
+    def __init__(self, chunks_factory: Callable[[], Iterable[pd.DataFrame]], columns: List[str], row_count: int):
+        """
+        Args:
+            chunks_factory (Callable[[], Iterable[pd.DataFrame]]): 書き込み順のチャンクを返す関数
+            columns (List[str]): カラム名
+            row_count (int): 総行数
+        """
+        self._chunks_factory = chunks_factory
+        self.columns = columns
+        self.row_count = row_count
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'Dataset':
+        return cls(lambda: [df], df.columns.tolist(), len(df))
+
+    @classmethod
+    def from_store(cls, store: ChunkStore) -> 'Dataset':
+        return cls(store.iter_sorted_chunks, store.columns, store.row_count)
+
+    def iter_chunks(self) -> Iterable[pd.DataFrame]:
+        return self._chunks_factory()
+
+
+def _output_path(datafile_id: str, extension: str) -> str:
+    """data フォルダ内の出力ファイルのパスを作成する"""
+    os.makedirs('data', exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"data/bdash_datafile_{datafile_id}_{timestamp}.{extension}"
+
+
+class Sink:
+    """出力先の基底クラス"""
+
+    name = 'sink'
+
+    def __init__(self, datafile_id: str, primary: bool = False):
+        """
+        Args:
+            datafile_id (str): データファイルID
+            primary (bool): 主シンク（同期の成否に含め、完了を待つ）かどうか
+        """
+        self.datafile_id = datafile_id
+        self.primary = primary
+
+    def write(self, dataset: Dataset) -> Any:
+        """
+        データセットを出力します。
+
+        Args:
+            dataset (Dataset): 出力するデータセット
+
+        Returns:
+            Any: 出力結果の詳細（ファイルパスなど）
+
+        Raises:
+            Exception: 出力に失敗した場合
+        """
+        raise NotImplementedError
+
+
+class SheetSink(Sink):
+    """Googleスプレッドシートへ転記するシンク（シャーディングの設定があれば分割して転記）"""
+
+    name = 'sheet'
+
+    def __init__(self, datafile_id: str, primary: bool = False, checkpoint: Optional[SyncCheckpoint] = None):
+        """
+        Args:
+            datafile_id (str): データファイルID
+            primary (bool): 主シンク（同期の成否に含め、完了を待つ）かどうか
+            checkpoint (Optional[SyncCheckpoint]): 書き込み済みの行数を記録するチェックポイント（記録済みの行の次から再開）
+        """
+        super().__init__(datafile_id, primary)
+        self.checkpoint = checkpoint
+
+    def write(self, dataset: Dataset) -> Any:
+        spreadsheet_id = env.get_datafile_config_value(self.datafile_id, 'ssid', 'SPREADSHEET', '')
+        if not spreadsheet_id:
+            raise ValueError("スプレッドシートIDが設定されていません")
+        credentials_path = env.get_service_account_file()
+
+        shard_writer = create_shard_writer(self.datafile_id, credentials_path, spreadsheet_id)
+        if shard_writer is not None:
+            shards = shard_writer.write(dataset.iter_chunks(), [str(c) for c in dataset.columns])
+            return {'shards': [{'sheet': s['sheet'], 'rows': s['rows']} for s in shards]}
+
+        chunk_rows = env.get_config_value('SPREADSHEET', 'WRITE_CHUNK_ROWS', 5000)
+        shadow = create_shadow_worksheet(self.datafile_id, credentials_path, spreadsheet_id)
+        skip_rows, on_progress = 0, None
+        if shadow is None and self.checkpoint is not None and self.checkpoint.active:
+            skip_rows = int(self.checkpoint.state.get('rows_written', 0))
+            on_progress = lambda rows: self.checkpoint.update(rows_written=rows)
+        if not upload_chunks_to_sheet(
+            dataset.iter_chunks(),
+            [str(c) for c in dataset.columns],
+            dataset.row_count,
+            credentials_path,
+            spreadsheet_id,
+            chunk_rows,
+            skip_rows,
+            on_progress,
+            shadow
+        ):
+            raise RuntimeError("スプレッドシートへの転記に失敗しました")
+        return {'spreadsheet_id': spreadsheet_id}
+
+
+class CsvSink(Sink):
+    """CSVファイル（UTF-8 BOM付き）に保存するシンク"""
+
+    name = 'csv'
+
+    def write(self, dataset: Dataset) -> Any:
+        filepath = _output_path(self.datafile_id, 'csv')
+        # 先頭チャンクのみヘッダー・BOM付きで書き込み、以降は追記
+        first = True
+        for chunk in dataset.iter_chunks():
+            chunk.to_csv(
+                filepath,
+                index=False,
+                header=first,
+                mode='w' if first else 'a',
+                encoding='utf-8-sig' if first else 'utf-8'
+            )
+            first = False
+        logger.info(f"✅ CSVファイルを保存しました: {filepath}")
+        return {'path': filepath}
+
+
+class ParquetSink(Sink):
+    """ローカルのParquetファイル（列指向スナップショット）に保存するシンク"""
+
+    name = 'parquet'
+
+    def write(self, dataset: Dataset) -> Any:
+        filepath = _output_path(self.datafile_id, 'parquet')
+        writer: Optional[pq.ParquetWriter] = None
+        try:
+            for chunk in dataset.iter_chunks():
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(filepath, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        logger.info(f"✅ Parquetファイルを保存しました: {filepath}")
+        return {'path': filepath}
+
+
+class ObjectStoreSink(Sink):
+    """オブジェクトストレージへParquetパーツを出力するシンク（[OBJECT_STORE] の設定を使用）"""
+
+    name = 'object_store'
+
+    def write(self, dataset: Dataset) -> Any:
+        if not export_datafile_to_object_store(dataset.iter_chunks(), self.datafile_id):
+            raise RuntimeError("オブジェクトストレージへの出力に失敗しました")
+        return None
+
+
+class SummarySink(Sink):
+    """配信年月ごとの集計を集計シートに書き込むシンク（[SUMMARY] の設定を使用、変更があった月のみ更新）"""
+
+    name = 'summary'
+
+    def write(self, dataset: Dataset) -> Any:
+        spreadsheet_id = env.get_datafile_config_value(self.datafile_id, 'ssid', 'SPREADSHEET', '')
+        if not spreadsheet_id:
+            raise ValueError("スプレッドシートIDが設定されていません")
+        aggregator = create_aggregator(self.datafile_id)
+        summary = aggregator.aggregate(dataset.iter_chunks())
+        writer = SummarySheetWriter(
+            self.datafile_id,
+            env.get_service_account_file(),
+            spreadsheet_id,
+            env.get_datafile_config_value(self.datafile_id, 'sheet_name', 'SUMMARY', '月別集計'),
+        )
+        return writer.write(summary)
+
+
+SINK_TYPES = {sink.name: sink for sink in (SheetSink, CsvSink, ParquetSink, ObjectStoreSink, SummarySink)}
+
+
+class SinkResult:
+    """シンク1件分の出力結果"""
+
+    def __init__(self, name: str, primary: bool):
+        self.name = name
+        self.primary = primary
+        self.status = 'running'
+        self.duration = 0.0
+        self.detail: Any = None
+        self.error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == 'success'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'primary': self.primary,
+            'status': self.status,
+            'duration_sec': round(self.duration, 3),
+            'detail': self.detail,
+            'error': self.error,
+        }
+
+
+class SinkFanout:
+    """1つのデータセットを複数のシンクへ並行して出力するクラス"""
+
+    def __init__(self, sinks: List[Sink], optional_timeout: float = 0.0):
+        """
+        Args:
+            sinks (List[Sink]): 出力先のシンク
+            optional_timeout (float): 主シンクの完了後、任意シンクの完了を待つ秒数
+        """
+        self.sinks = sinks
+        self.optional_timeout = optional_timeout
+        self.results: List[SinkResult] = []
+        self._futures: List[Future] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _run_sink(self, sink: Sink, dataset: Dataset, result: SinkResult) -> None:
+        started = time.perf_counter()
+        try:
+            result.detail = sink.write(dataset)
+            result.status = 'success'
+        except Exception as e:
+            result.status = 'failed'
+            result.error = str(e)
+            log = logger.error if sink.primary else logger.warning
+            log(f"{'❌' if sink.primary else '⚠️'} シンク {sink.name} への出力に失敗しました: {e}")
+        finally:
+            result.duration = time.perf_counter() - started
+            if result.success:
+                logger.info(f"✅ シンク {sink.name} への出力完了: {result.duration:.1f}秒")
+
+    def run(self, dataset: Dataset) -> List[SinkResult]:
+        """
+        全シンクへの出力を開始し、主シンクの完了（と optional_timeout までの任意シンク）を待ちます。
+
+        Args:
+            dataset (Dataset): 出力するデータセット
+
+        Returns:
+            List[SinkResult]: シンクごとの出力結果（未完了の任意シンクは status='running'）
+        """
+        logger.info(f"📤 出力開始: {', '.join(('*' if s.primary else '') + s.name for s in self.sinks)}")
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self.sinks), 1), thread_name_prefix='sink')
+        self.results = [SinkResult(sink.name, sink.primary) for sink in self.sinks]
+        self._futures = [
+            self._executor.submit(self._run_sink, sink, dataset, result)
+            for sink, result in zip(self.sinks, self.results)
+        ]
+
+        wait([f for f, sink in zip(self._futures, self.sinks) if sink.primary])
+        optional = [f for f, sink in zip(self._futures, self.sinks) if not sink.primary]
+        if optional and self.optional_timeout > 0:
+            wait(optional, timeout=self.optional_timeout)
+        self._executor.shutdown(wait=False)
+
+        running = [r.name for r in self.results if r.status == 'running']
+        if running:
+            logger.info(f"⏳ 任意シンクはバックグラウンドで出力を続けます: {', '.join(running)}")
+        return self.results
+
+    @property
+    def primary_succeeded(self) -> bool:
+        """主シンクがすべて成功したかどうか"""
+        return all(result.success for result in self.results if result.primary)
+
+    def close(self) -> None:
+        """バックグラウンドで出力中の任意シンクの完了を待ちます。"""
+        if self._executor is not None:
+            wait(self._futures)
+            self._executor = None
+
+
+def create_sink_fanout(
+    datafile_id: str,
+    exclude: Iterable[str] = (),
+    checkpoint: Optional[SyncCheckpoint] = None
+) -> SinkFanout:
+    """
+    設定ファイル（[DATAFILE_<id>] / [SINKS]）から出力先を作成します。
+
+    Args:
+        datafile_id (str): データファイルID
+        exclude (Iterable[str]): 除外するシンク名（別の方法で出力済みのシンク）
+        checkpoint (Optional[SyncCheckpoint]): スプレッドシートへの書き込みを再開するためのチェックポイント
+
+    Returns:
+        SinkFanout: 出力先
+
+    Raises:
+        ValueError: 未知のシンクが指定された場合
+    """
+    targets = str(env.get_datafile_config_value(datafile_id, 'sinks', 'SINKS', 'sheet, csv'))
+    primary = str(env.get_datafile_config_value(datafile_id, 'primary_sinks', 'SINKS', 'sheet'))
+    names = [name.strip() for name in targets.split(',') if name.strip() and name.strip() not in exclude]
+    primary_names = {name.strip() for name in primary.split(',') if name.strip()}
+
+    # 従来の [OBJECT_STORE] EXPORT_ENABLED も任意シンクとして扱う
+    if env.get_config_value('OBJECT_STORE', 'EXPORT_ENABLED', False) and 'object_store' not in names and 'object_store' not in exclude:
+        names.append('object_store')
+
+    unknown = [name for name in names if name not in SINK_TYPES]
+    if unknown:
+        raise ValueError(f"未知のシンクが指定されています: {', '.join(unknown)}")
+    sinks = [
+        SheetSink(datafile_id, primary=name in primary_names, checkpoint=checkpoint) if name == 'sheet'
+        else SINK_TYPES[name](datafile_id, primary=name in primary_names)
+        for name in names
+    ]
+    return SinkFanout(sinks, env.get_config_value('SINKS', 'optional_timeout_sec', 0.0))
@@ -1,24 +1,50 @@
 from pathlib import Path
+import threading
+import time
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 読み取り結果のキャッシュ（(スプレッドシートキー, シート名, 種別...) → (有効期限, 値)）
+# インスタンス間で共有し、書き込み後は invalidate_cache() で破棄します
+_read_cache: Dict[Tuple, Tuple[float, Any]] = {}
+_read_cache_lock = threading.Lock()
+
+# get_last_row で最初に読み取る末尾の行数（値が見つからなければ範囲を倍にして上へ読み進める）
+LAST_ROW_PROBE_ROWS = 1000
 
 class SpreadSheet:
-    def __init__(self, credentials_path: Path, spreadsheet_key: str):
+    def __init__(
+        self,
+        credentials_path: Path,
+        spreadsheet_key: str,
+        sheet_name: Optional[str] = None,
+        cache_ttl: float = 60.0,
+        create_if_missing: bool = False
+    ):
         """
         Args:
             credentials_path (Path): サービスアカウントの認証情報JSONファイルのパス
             spreadsheet_key (str): スプレッドシートのキー
+            sheet_name (Optional[str]): シート名（Noneの場合は先頭のシート）
+            cache_ttl (float): 読み取り結果をキャッシュする秒数（0でキャッシュしない）
+            create_if_missing (bool): シート名のシートが存在しない場合に作成するかどうか
         """
         self.credentials_path = credentials_path
         self.spreadsheet_key = spreadsheet_key
+        self.sheet_name = sheet_name
+        self.cache_ttl = cache_ttl
+        self.create_if_missing = create_if_missing
         self.client = None
+        self.workbook = None
         self.sheet = None
 
     def connect(self) -> bool:
         """
-        スプレッドシートに接続します。シートが存在しない場合は作成します。
+        スプレッドシートに接続します。create_if_missing の場合、シートが存在しなければ作成します。
 
         Returns:
             bool: 接続成功したかどうか
@@ -39,31 +65,136 @@ class SpreadSheet:
             self.client = gspread.authorize(credentials)
             
             # スプレッドシートを開く
-            workbook = self.client.open_by_key(self.spreadsheet_key)
+            self.workbook = self.client.open_by_key(self.spreadsheet_key)
             
             # シートを取得
             try:
-                # 既存のシートを開く
-                self.sheet = workbook.sheet1  # デフォルトのシートを開く
+                # 既存のシートを開く（シート名の指定がなければデフォルトのシート）
+                if self.sheet_name:
+                    try:
+                        self.sheet = self.workbook.worksheet(self.sheet_name)
+                    except gspread.exceptions.WorksheetNotFound:
+                        if not self.create_if_missing:
+                            raise
+                        self.sheet = self.workbook.add_worksheet(title=self.sheet_name, rows=1, cols=1)
+                        logger.info(f"シートを作成しました: {self.sheet_name}")
+                else:
+                    self.sheet = self.workbook.sheet1
             except Exception as e:
-                print(f"シートの取得に失敗: {str(e)}")
+                logger.info(f"シートの取得に失敗: {str(e)}")
                 return False
             
             return True
             
         except Exception as e:
-            print(f"スプレッドシートへの接続に失敗: {str(e)}")
+            logger.info(f"スプレッドシートへの接続に失敗: {str(e)}")
             return False
 
+    def _cache_key(self, *parts: Any) -> Tuple:
+        return (self.spreadsheet_key, self.sheet.title) + parts
+
+    def _cached(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        """
+        キャッシュが有効ならその値を、なければ loader() の結果を返してキャッシュします。
+
+        Args:
+            key (Tuple): キャッシュのキー
+            loader (Callable[[], Any]): 値を取得する関数
+
+        Returns:
+            Any: 取得した値
+        """
+        if self.cache_ttl <= 0:
+            return loader()
+
+        now = time.monotonic()
+        with _read_cache_lock:
+            cached = _read_cache.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        value = loader()
+        with _read_cache_lock:
+            _read_cache[key] = (now + self.cache_ttl, value)
+        return value
+
+    def invalidate_cache(self) -> None:
+        """このシートの読み取りキャッシュを破棄します（書き込み後に呼び出します）。"""
+        scope = self._cache_key()
+        with _read_cache_lock:
+            for key in [k for k in _read_cache if k[:len(scope)] == scope]:
+                del _read_cache[key]
+
+    def get_dimensions(self) -> Tuple[int, int]:
+        """
+        グリッドのメタデータからシートの行数・列数を取得します（セルの値はダウンロードしません）。
+
+        Returns:
+            Tuple[int, int]: (行数, 列数)
+        """
+        def load() -> Tuple[int, int]:
+            metadata = self.workbook.fetch_sheet_metadata(
+                params={'fields': 'sheets(properties(sheetId,gridProperties))'}
+            )
+            for sheet in metadata.get('sheets', []):
+                properties = sheet.get('properties', {})
+                if properties.get('sheetId') == self.sheet.id:
+                    grid = properties.get('gridProperties', {})
+                    return grid.get('rowCount', 0), grid.get('columnCount', 0)
+            raise ValueError(f"シートのメタデータが見つかりません: {self.sheet.title}")
+
+        return self._cached(self._cache_key('dimensions'), load)
+
+    def batch_get(self, ranges: List[str], value_render_option: Optional[str] = None) -> List[List[List[Any]]]:
+        """
+        複数の範囲の値を1回のリクエストで取得します。
+
+        Args:
+            ranges (List[str]): A1形式の範囲のリスト
+            value_render_option (Optional[str]): 値の形式（例: UNFORMATTED_VALUE。Noneの場合は表示形式の文字列）
+
+        Returns:
+            List[List[List[Any]]]: 範囲ごとの値（行のリスト）
+        """
+        def load() -> List[List[List[Any]]]:
+            return [
+                list(value_range)
+                for value_range in self.sheet.batch_get(ranges, value_render_option=value_render_option)
+            ]
+
+        return self._cached(self._cache_key('batch_get', tuple(ranges), value_render_option), load)
+
+    def get_all_records(self) -> List[Dict[str, Any]]:
+        """
+        1行目をヘッダーとして全行を辞書のリストで取得します。
+
+        Returns:
+            List[Dict[str, Any]]: 行ごとの辞書
+        """
+        return self._cached(self._cache_key('records'), self.sheet.get_all_records)
+
     def get_last_row(self) -> Optional[int]:
         """
-        スプレッドシートの最終行を取得します。
+        スプレッドシートの最終行（A列の最後の値がある行）を取得します。
+        グリッドの行数を取得し、末尾から範囲を区切ってA列を読み取ります（A列全体はダウンロードしません）。
 
         Returns:
             Optional[int]: 最終行の番号。エラー時はNone
         """
+        def load() -> int:
+            row_count, _ = self.get_dimensions()
+            end, window = row_count, LAST_ROW_PROBE_ROWS
+            while end > 0:
+                start = max(1, end - window + 1)
+                values = self.sheet.batch_get([f'A{start}:A{end}'])[0]
+                filled = [i for i, row in enumerate(values) if row and row[0] != '']
+                if filled:
+                    return start + filled[-1]
+                end, window = start - 1, window * 2
+            return 0
+
         try:
-            return len(self.sheet.col_values(1))
+            return self._cached(self._cache_key('last_row'), load)
         except Exception as e:
-            print(f"最終行の取得に失敗: {str(e)}")
-            return None 
\ No newline at end of file
+            logger.info(f"最終行の取得に失敗: {str(e)}")
+            return None
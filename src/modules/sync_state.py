@@ -0,0 +1,130 @@
+"""
+同期状態（前回アップロード時のフィンガープリント）を管理するモジュール
+
+データセットのスキーマ（header_info）と内容からフィンガープリントを作成し、
+前回アップロードに成功したときの値と比較することで、変更がない場合に
+CSV保存・スプレッドシート転記を省略できるようにします。
+APIレスポンスの ETag / Last-Modified も保存し、次回の条件付きリクエストに使用します。
+
+制限事項:
+    - 内容のハッシュは行の順序に依存します（同じデータでも取得順が変われば別の値になります）
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import pandas as pd
+from src.utils.environment import EnvironmentUtils as env
+from src.utils.file_lock import file_lock, write_json_atomic
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def schema_fingerprint(header_info: List[Dict[str, Any]]) -> str:
+    """
+    ヘッダー情報からスキーマのフィンガープリントを作成します。
+
+    Args:
+        header_info (List[Dict[str, Any]]): APIレスポンスのヘッダー情報
+
+    Returns:
+        str: SHA-256の16進文字列
+    """
+    payload = json.dumps(header_info, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ContentHasher:
+    """DataFrameの内容からハッシュ値をチャンク単位で計算するクラス"""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.row_count = 0
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        チャンクの内容をハッシュに加えます。
+
+        Args:
+            df (pd.DataFrame): 追加するチャンク
+        """
+        self._hash.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+        self._hash.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        self.row_count += len(df)
+
+    def hexdigest(self) -> str:
+        """
+        Returns:
+            str: これまでに追加した内容のSHA-256の16進文字列
+        """
+        return self._hash.hexdigest()
+
+    @staticmethod
+    def combine(digests: List[str]) -> str:
+        """
+        ページごとのハッシュ値を1つにまとめます（チェックポイントから再開しても同じ値になります）。
+
+        Args:
+            digests (List[str]): 取得順に並んだページごとのハッシュ値
+
+        Returns:
+            str: SHA-256の16進文字列
+        """
+        return hashlib.sha256('\n'.join(digests).encode('utf-8')).hexdigest()
+
+
+class SyncStateStore:
+    """データファイルごとの同期状態をJSONファイルで保存するクラス"""
+
+    def __init__(self, state_file: Optional[Path] = None):
+        """
+        Args:
+            state_file (Optional[Path]): 状態ファイルのパス（Noneの場合は設定値から決定）
+        """
+        if state_file is None:
+            state_dir = env.get_config_value('SYNC_SETTINGS', 'STATE_DIR', 'data/state')
+            state_file = env.get_project_root() / state_dir / 'sync_state.json'
+        self.state_file = Path(state_file)
+
+    def _load_all(self) -> Dict[str, Any]:
+        """状態ファイルを読み込む（file_lock の中で呼び出す）"""
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 同期状態ファイルの読み込みに失敗したため無視します: {e}")
+            return {}
+
+    def get(self, datafile_id: str) -> Dict[str, Any]:
+        """
+        データファイルの前回の同期状態を取得します。
+
+        Args:
+            datafile_id (str): データファイルID
+
+        Returns:
+            Dict[str, Any]: 同期状態（未登録の場合は空の辞書）
+        """
+        with file_lock(self.state_file):
+            return self._load_all().get(str(datafile_id), {})
+
+    def save(self, datafile_id: str, state: Dict[str, Any]) -> None:
+        """
+        データファイルの同期状態を保存します。
+
+        複数のワーカーが同じファイルを更新するため、ロックを取得してから読み込み直し、
+        このデータファイルの状態だけを置き換えて保存します。
+
+        Args:
+            datafile_id (str): データファイルID
+            state (Dict[str, Any]): 保存する同期状態
+        """
+        with file_lock(self.state_file):
+            all_states = self._load_all()
+            all_states[str(datafile_id)] = {**state, 'updated_at': datetime.now().isoformat()}
+            write_json_atomic(self.state_file, all_states)
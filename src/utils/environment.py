@@ -91,6 +91,31 @@ class EnvironmentUtils:
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
         return config_path
 
+    # 読み込み済みの設定ファイル（パス → (更新日時, ConfigParser)）
+    _config_cache = {}
+
+    @staticmethod
+    def _load_config(config_path: Path) -> configparser.ConfigParser:
+        """
+        設定ファイルを読み込みます。更新されていなければ前回読み込んだ内容を再利用します。
+
+        Args:
+            config_path (Path): 設定ファイルのパス
+
+        Returns:
+            configparser.ConfigParser: 読み込んだ設定
+        """
+        mtime = config_path.stat().st_mtime_ns
+        cached = EnvironmentUtils._config_cache.get(config_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        config = configparser.ConfigParser()
+        # utf-8 エンコーディングで読み込む
+        config.read(config_path, encoding='utf-8')
+        EnvironmentUtils._config_cache[config_path] = (mtime, config)
+        return config
+
     @staticmethod
     def get_config_value(section: str, key: str, default: Optional[Any] = None) -> Any:
         """
@@ -104,11 +129,7 @@ class EnvironmentUtils:
         Returns:
             Any: 設定値
         """
-        config_path = EnvironmentUtils.get_config_file()
-        config = configparser.ConfigParser()
-
-        # utf-8 エンコーディングで読み込む
-        config.read(config_path, encoding='utf-8')
+        config = EnvironmentUtils._load_config(EnvironmentUtils.get_config_file())
 
         if not config.has_section(section):
             return default
@@ -126,6 +147,26 @@ class EnvironmentUtils:
             return value.lower() == 'true'
         return value
 
+    @staticmethod
+    def get_datafile_config_value(datafile_id: Any, key: str, fallback_section: str, default: Optional[Any] = None) -> Any:
+        """
+        データファイル別の設定値を取得します。
+        [DATAFILE_{datafile_id}] セクションに値がなければ fallback_section の値を返します。
+
+        Args:
+            datafile_id (Any): データファイルID
+            key (str): キー名
+            fallback_section (str): データファイル別の設定がない場合に参照するセクション名
+            default (Optional[Any]): デフォルト値
+
+        Returns:
+            Any: 設定値
+        """
+        value = EnvironmentUtils.get_config_value(f"DATAFILE_{datafile_id}", key)
+        if value is not None:
+            return value
+        return EnvironmentUtils.get_config_value(fallback_section, key, default)
+
     @staticmethod
     def resolve_path(path: str) -> Path:
         """
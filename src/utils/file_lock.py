@@ -0,0 +1,92 @@
+"""
+複数のプロセス（--worker）・スレッドで共有する状態ファイルを安全に更新するためのユーティリティ
+
+状態ファイルの読み込み・更新は、ファイルごとのロックファイル（<ファイル名>.lock）の排他ロックを
+取得してから行い、書き込みは一意な一時ファイルに書いてから置き換えます。
+ロックの取得中に読み込み直してから更新するため、別のプロセスが保存した他のデータファイルの状態は失われません。
+
+制限事項:
+    - ロックはOSのファイルロック（Windows: msvcrt / それ以外: fcntl）を使用します。
+      ネットワーク共有上のファイルでは、共有がファイルロックに対応している必要があります
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+def _try_lock(handle: Any) -> bool:
+    """ロックファイルの排他ロックを取得する（取得できない場合はFalse）"""
+    try:
+        if os.name == 'nt':
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(handle: Any) -> None:
+    if os.name == 'nt':
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_lock(path: Path, timeout_sec: float = 30.0) -> Iterator[None]:
+    """
+    ファイルの排他ロックを取得します（with ブロックの終了時に解放）。
+
+    Args:
+        path (Path): ロックするファイルのパス（<ファイル名>.lock をロックファイルとして使用）
+        timeout_sec (float): ロックの取得を待つ秒数
+
+    Raises:
+        TimeoutError: timeout_sec 以内にロックを取得できなかった場合
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout_sec
+    with open(path.with_name(path.name + '.lock'), 'a+b') as handle:
+        while not _try_lock(handle):
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"ファイルのロックを取得できませんでした: {path}")
+            time.sleep(0.02)
+        try:
+            yield
+        finally:
+            _unlock(handle)
+
+
+def write_json_atomic(path: Path, data: Any) -> None:
+    """
+    JSONを一意な一時ファイルに書き込んでから置き換えます（file_lock の中で呼び出します）。
+
+    Args:
+        path (Path): 保存先のファイルのパス
+        data (Any): 保存する値
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
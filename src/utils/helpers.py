@@ -1,30 +1,32 @@
 # utils\helpers.py
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from typing import List
 from .environment import EnvironmentUtils as env
+from src.modules.spreadsheet import SpreadSheet
 
 def get_selected_tables_from_sheets() -> List[str]:
     """
     Googleスプレッドシートから「実行対象」がTRUEの物理テーブル名を取得します。
+    シートの内容は [SPREADSHEET] READ_CACHE_TTL_SEC の間キャッシュされます。
 
     Returns:
         List[str]: 実行対象の物理テーブル名リスト
     """
     try:
-        # サービスアカウントのキーで認証
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+        # サービスアカウントのキーとスプレッドシート・シート名を取得
         service_account_file = env.get_env_var("GCS_KEY_PATH")
-        credentials = ServiceAccountCredentials.from_json_keyfile_name(service_account_file, scope)
-        client = gspread.authorize(credentials)
-
-        # スプレッドシートとシート名を取得
         spreadsheet_id = env.get_config_value("SPREADSHEET", "SSID")
         sheet_name = env.get_config_value("SPREADSHEET", "SHEETNAME")
-        sheet = client.open_by_key(spreadsheet_id).worksheet(sheet_name)
+        sheet = SpreadSheet(
+            service_account_file,
+            spreadsheet_id,
+            sheet_name,
+            cache_ttl=env.get_config_value("SPREADSHEET", "READ_CACHE_TTL_SEC", 60)
+        )
+        if not sheet.connect():
+            raise Exception("スプレッドシートへの接続に失敗しました")
 
-        # シートのデータを取得
+        # シートのデータを取得（キャッシュが有効ならリクエストしない）
         data = sheet.get_all_records()
         
         # 「実行対象」が TRUE の物理テーブル名を抽出
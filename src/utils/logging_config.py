@@ -1,33 +1,36 @@
 # utils\logging_config.py
+import atexit
 import logging
-import logging.handlers
-from datetime import datetime
+import queue
+import threading
 from pathlib import Path
 from typing import Optional, Dict
 from .environment import EnvironmentUtils as env
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime, timedelta
 
+LOG_FORMAT = "%(asctime)s - %(name)s - [%(levelname)s] - %(message)s"
+
+# ログ出力スレッドのリスナー（setup_logging で1度だけ作成）
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+# get_logger で取得したプロジェクトのロガー（環境に応じたログレベルを設定する対象）
+_project_loggers: Dict[str, logging.Logger] = {}
+_log_level = logging.INFO
+
 class LoggingConfig:
     _initialized = False
 
     def __init__(self):
         """
         ログ設定を初期化します。
+        実際の設定は setup_logging() に一本化されています。
         """
         if LoggingConfig._initialized:
             return  # 再初期化を防止
 
-        # 環境ユーティリティを使用して現在の環境を取得
-        envutils = env.get_environment()
-        
-        # 環境に応じたログレベルを設定
-        self.log_level = self.get_log_level(envutils)
-        
-        self.log_dir = Path("logs")
-        self.log_format = "%(asctime)s - %(name)s - [%(levelname)s] - %(message)s"
-
-        self.setup_logging()
+        setup_logging()
 
         LoggingConfig._initialized = True  # 初期化済みフラグを設定
 
@@ -41,34 +44,40 @@ class LoggingConfig:
         Returns:
             int: ログレベル
         """
-        # settings.ini から LOG_LEVEL を取得
-        log_level_str = env.get_config_value(section=envutils, key="LOG_LEVEL", default="INFO")
-        log_level = getattr(logging, log_level_str.upper(), logging.INFO)
-        return log_level
+        return get_log_level(envutils)
 
-    def setup_logging(self) -> None:
-        """
-        ロギング設定をセットアップします。
-        """
-        if not self.log_dir.exists():
-            self.log_dir.mkdir(parents=True, exist_ok=True)
-
-        log_file = self.log_dir / f"app_{datetime.now().strftime('%Y%m%d')}.log"
-
-        handlers = [
-            logging.handlers.TimedRotatingFileHandler(
-                log_file, when="midnight", interval=1, backupCount=30, encoding="utf-8"
-            ),
-            logging.StreamHandler(),
-        ]
-
-        logging.basicConfig(
-            level=self.log_level,
-            format=self.log_format,
-            handlers=handlers,
-        )
+def get_log_level(envutils: str) -> int:
+    """
+    環境に応じたログレベルを取得します。
+
+    Args:
+        envutils (str): 現在の環境 ('development' または 'production')
 
-        logging.getLogger().info("Logging setup complete.")
+    Returns:
+        int: ログレベル
+    """
+    # settings.ini から LOG_LEVEL を取得
+    log_level_str = env.get_config_value(section=envutils, key="LOG_LEVEL", default="INFO")
+    return getattr(logging, str(log_level_str).upper(), logging.INFO)
+
+def _resolve_log_level() -> int:
+    """現在の環境（APP_ENV）のログレベルを取得します（設定ファイルが読めない場合はINFO）。"""
+    try:
+        return get_log_level(env.get_environment())
+    except Exception:
+        return logging.INFO
+
+def apply_log_level() -> None:
+    """
+    現在の環境（APP_ENV）のログレベルをプロジェクトのロガーに設定し直します。
+    secrets.env の APP_ENV を反映するため、env.load_env() の後に呼び出します。
+    """
+    global _log_level
+
+    with _setup_lock:
+        _log_level = _resolve_log_level()
+        for logger in _project_loggers.values():
+            logger.setLevel(_log_level)
 
 def load_log_settings() -> Dict:
     """設定ファイルからログ設定を読み込む"""
@@ -80,40 +89,77 @@ def load_log_settings() -> Dict:
         'log_dir': env.get_config_value('log_settings', 'log_dir', 'logs')
     }
 
-def get_logger(name: str) -> logging.Logger:
-    """ロガーの設定"""
-    logger = logging.getLogger(name)
-    
-    if not logger.handlers:
-        settings = load_log_settings()
-        logger.setLevel(logging.DEBUG)
-        
+def setup_logging() -> None:
+    """
+    ロギングをセットアップします（プロセス内で1度だけ実行されます）。
+
+    ルートロガーには QueueHandler のみを設定し、ファイル・コンソールへの書き込みは
+    QueueListener のスレッドで行います。ログ出力が処理中のスレッドを待たせません。
+    環境に応じたログレベルは get_logger で取得したプロジェクトのロガーに設定し、
+    ルートロガーは WARNING のままにします（ライブラリのデバッグログを出力しない）。
+    """
+    global _listener, _log_level
+
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        try:
+            settings = load_log_settings()
+        except Exception:
+            # 設定ファイルが読めない場合もログは出力できるようにする
+            settings = {'max_file_size_mb': 10, 'backup_count': 30, 'log_dir': 'logs'}
+        _log_level = _resolve_log_level()
+
         # ログディレクトリの作成
         log_dir = Path(settings['log_dir'])
-        log_dir.mkdir(exist_ok=True)
-        
-        # ファイル名の設定
-        log_file = log_dir / f"app.log"
-        
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        formatter = logging.Formatter(LOG_FORMAT)
+
         # RotatingFileHandlerの設定
         file_handler = RotatingFileHandler(
-            filename=log_file,
+            filename=log_dir / "app.log",
             maxBytes=settings['max_file_size_mb'] * 1024 * 1024,
             backupCount=settings['backup_count'],
             encoding='utf-8'
         )
-        
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - [%(levelname)s] - %(message)s'
-        )
         file_handler.setFormatter(formatter)
-        
+
         console_handler = logging.StreamHandler()
         console_handler.setFormatter(formatter)
-        
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    
+
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        _listener.start()
+
+        root_logger = logging.getLogger()
+        for handler in list(root_logger.handlers):
+            root_logger.removeHandler(handler)
+        root_logger.addHandler(QueueHandler(log_queue))
+        root_logger.setLevel(logging.WARNING)
+
+        atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    """キューに残ったログを書き出してリスナーを停止します。"""
+    global _listener
+
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def get_logger(name: str) -> logging.Logger:
+    """ロガーの取得（初回呼び出し時にロギングをセットアップ）"""
+    setup_logging()
+    logger = logging.getLogger(name)
+    with _setup_lock:
+        _project_loggers[name] = logger
+        logger.setLevel(_log_level)
     return logger
 
 def cleanup_old_logs() -> None:
@@ -124,7 +170,7 @@ def cleanup_old_logs() -> None:
     if not log_path.exists():
         return
         
-    logger = logging.getLogger(__name__)
+    logger = get_logger(__name__)
     
     try:
         # 合計サイズの確認
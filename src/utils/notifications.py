@@ -1,20 +1,27 @@
 # src/utils/notifications.py
 
-import logging
+import queue
+import threading
+import time
 import requests
-from typing import Optional
+from typing import Optional, List
 
 from .environment import EnvironmentUtils as env
+from .logging_config import get_logger
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 class Notifier:
-    def __init__(self, webhook_url: str):
+    def __init__(self, webhook_url: str, username: str = '採用確認Bot', timeout: float = 10.0):
         """
         Args:
             webhook_url (str): SlackのWebhook URL
+            username (str): 通知の送信者名
+            timeout (float): 送信のタイムアウト（秒）
         """
         self.webhook_url = webhook_url
+        self.username = username
+        self.timeout = timeout
 
     def send_slack_notification(self, message: str, spreadsheet_key: Optional[str] = None) -> bool:
         """
@@ -32,15 +39,115 @@ class Notifier:
 
         payload = {
             'text': message,
-            'username': '採用確認Bot',
+            'username': self.username,
             'link_names': 1,
         }
 
         try:
-            response = requests.post(self.webhook_url, json=payload)
+            response = requests.post(self.webhook_url, json=payload, timeout=self.timeout)
             response.raise_for_status()
             logger.info("Slack通知を送信しました。")
             return True
         except requests.exceptions.RequestException as e:
             logger.error(f"Slack通知の送信に失敗しました: {e}")
             return False
+
+
+class NotificationDispatcher:
+    """
+    通知をキューに積み、バックグラウンドのワーカーから送信するクラス
+
+    post() は即座に戻るため、Webhookの応答が遅くても同期処理を待たせません。
+    coalesce_seconds の間に積まれたメッセージは1件にまとめて送信します。
+    """
+
+    def __init__(self, notifier: Notifier, coalesce_seconds: float = 2.0):
+        """
+        Args:
+            notifier (Notifier): 実際に送信を行う Notifier
+            coalesce_seconds (float): メッセージをまとめる待ち時間（秒）
+        """
+        self.notifier = notifier
+        self.coalesce_seconds = coalesce_seconds
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._worker.start()
+
+    def post(self, message: str) -> None:
+        """
+        通知をキューに積みます（送信完了を待ちません）。
+
+        Args:
+            message (str): 送信するメッセージ
+        """
+        self._queue.put(message)
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+
+            # 少し待って後続のメッセージをまとめる
+            messages: List[str] = [message]
+            deadline = time.monotonic() + self.coalesce_seconds
+            stop = False
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    next_message = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if next_message is None:
+                    stop = True
+                    break
+                messages.append(next_message)
+
+            try:
+                self.notifier.send_slack_notification("\n\n".join(messages))
+            except Exception as e:
+                logger.error(f"Slack通知の送信中にエラーが発生しました: {e}")
+
+            if stop:
+                return
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        キューに残った通知を送信してワーカーを終了します。
+        timeout 秒を超えた場合は待たずに戻ります（ワーカーはデーモンスレッドのため終了を妨げません）。
+
+        Args:
+            timeout (float): 送信完了を待つ最大時間（秒）
+        """
+        self._queue.put(None)
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.warning(f"Slack通知の送信が{timeout}秒以内に完了しませんでした")
+
+
+def create_dispatcher() -> Optional[NotificationDispatcher]:
+    """
+    設定に従って通知ディスパッチャーを作成します。
+    Webhook URL（環境変数 SLACK_WEBHOOK_URL）が未設定、または通知が無効な場合はNoneを返します。
+
+    Returns:
+        Optional[NotificationDispatcher]: 通知ディスパッチャー
+    """
+    if not env.get_config_value('NOTIFICATION', 'enabled', False):
+        return None
+    webhook_url = env.get_env_var('SLACK_WEBHOOK_URL', '')
+    if not webhook_url:
+        logger.warning("SLACK_WEBHOOK_URL が設定されていないため通知は送信しません")
+        return None
+
+    notifier = Notifier(
+        webhook_url,
+        username=env.get_config_value('NOTIFICATION', 'username', 'b→dash同期Bot'),
+        timeout=env.get_config_value('NOTIFICATION', 'timeout_sec', 10)
+    )
+    return NotificationDispatcher(
+        notifier,
+        coalesce_seconds=env.get_config_value('NOTIFICATION', 'coalesce_sec', 2)
+    )
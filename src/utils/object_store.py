@@ -0,0 +1,92 @@
+# utils\object_store.py
+"""
+オブジェクトストレージへの書き込みを抽象化するモジュール
+
+バックエンドは ObjectStore を継承して実装します。現在はローカルファイルシステムを
+ルートとする LocalObjectStore のみを提供しており、クラウドストレージ（GCSなど）は
+同じインターフェースで追加できます。
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from .environment import EnvironmentUtils as env
+
+
+class ObjectStore:
+    """オブジェクトストレージの基底クラス"""
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """
+        オブジェクトを書き込みます。
+
+        Args:
+            key (str): オブジェクトキー（/区切りのパス）
+            data (bytes): 書き込むデータ
+
+        Returns:
+            str: 書き込んだオブジェクトのURI
+        """
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        """
+        オブジェクトが存在するかどうかを返します。
+
+        Args:
+            key (str): オブジェクトキー
+
+        Returns:
+            bool: 存在する場合はTrue
+        """
+        raise NotImplementedError
+
+
+class LocalObjectStore(ObjectStore):
+    """ローカルファイルシステムをルートとするオブジェクトストレージ"""
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root (Path): オブジェクトを格納するルートディレクトリ
+        """
+        self.root = Path(root)
+
+    def _resolve(self, key: str) -> Path:
+        return self.root.joinpath(*key.split('/'))
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        path = self._resolve(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 一意な一時ファイルに書き込んでから置き換え、読み手に書きかけのファイルを見せない
+        fd, tmp_name = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return path.as_uri()
+
+    def exists(self, key: str) -> bool:
+        return self._resolve(key).exists()
+
+
+def get_object_store() -> ObjectStore:
+    """
+    settings.ini の [OBJECT_STORE] 設定からバックエンドを作成します。
+
+    Returns:
+        ObjectStore: 設定されたオブジェクトストレージ
+
+    Raises:
+        ValueError: 未対応のバックエンドが指定された場合
+    """
+    backend = env.get_config_value('OBJECT_STORE', 'backend', 'local')
+    if backend == 'local':
+        root = env.get_config_value('OBJECT_STORE', 'root', 'data/object_store')
+        return LocalObjectStore(env.get_project_root() / root)
+    raise ValueError(f"未対応のオブジェクトストレージです: {backend}")
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 import pytz
 
 JST = pytz.timezone('Asia/Tokyo')
@@ -8,7 +9,9 @@ class PathGenerator:
         self.service_name = service_name
         self.environment = environment
         
-    def generate_gcs_path(self, table_name: str, chunk_num: int, load_type: str = "full_load") -> str:
+    def generate_gcs_path(
+        self, table_name: str, chunk_num: int, load_type: str = "full_load", now: Optional[datetime] = None
+    ) -> str:
         """
         GCSのファイルパスを生成
         
@@ -16,12 +19,14 @@ class PathGenerator:
             table_name: テーブル名
             chunk_num: チャンク番号
             load_type: ロードタイプ（"full_load" or "incremental"）
+            now: パスの日付・タイムスタンプに使う時刻（Noneの場合は現在時刻。1回の出力のパーツで同じ値を渡す）
             
         Returns:
             str: GCS上のファイルパス
         """
-        current_date = datetime.now(JST).strftime('%Y%m%d')
-        timestamp = datetime.now(JST).strftime('%H%M%S')
+        now = now or datetime.now(JST)
+        current_date = now.strftime('%Y%m%d')
+        timestamp = now.strftime('%H%M%S')
         
         # パス構成
         path_components = {
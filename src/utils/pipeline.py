@@ -0,0 +1,133 @@
+# utils\pipeline.py
+"""
+ジェネレータをスレッドと上限付きキューでつなぎ、工程を並行に実行するユーティリティ
+
+background() は上流のイテラブルを別スレッドで先読みし、map_stage() は各要素への処理を
+別スレッドで行います。キューの上限に達すると上流は待機するため（バックプレッシャー）、
+メモリ使用量を抑えたまま「取得 → 変換 → 書き込み」を重ねて実行できます。
+
+    pages = background(iter_pages(), maxsize=2)
+    frames = map_stage(convert, pages, maxsize=2)
+    for frame in frames:
+        write(frame)
+
+上流で発生した例外は下流の反復時に再送出され、下流が途中で反復をやめた場合は上流も停止します。
+反復の終了時（close() を含む）は工程のスレッドの終了を待つため、その後は上流の処理が残りません。
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+_DONE = object()
+
+
+def _put(q: queue.Queue, item: object, stop: threading.Event) -> bool:
+    """停止が指示されるまでキューへの追加を試みる"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def background(
+    iterable: Iterable[T],
+    maxsize: int = 2,
+    name: str = 'pipeline',
+    timings: Optional[Dict[str, float]] = None
+) -> Iterator[T]:
+    """
+    イテラブルを別スレッドで反復し、上限付きキューを通して要素を返します。
+
+    Args:
+        iterable (Iterable[T]): 上流のイテラブル
+        maxsize (int): 先読みする要素数の上限
+        name (str): 工程名（スレッド名・処理時間の集計に使用）
+        timings (Optional[Dict[str, float]]): 指定した場合、上流の要素の取得にかかった時間を name に加算
+
+    Yields:
+        T: 上流の要素
+    """
+    q: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+    stop = threading.Event()
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                if timings is not None:
+                    timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+                if not _put(q, (True, item), stop):
+                    return
+            _put(q, (True, _DONE), stop)
+        except BaseException as e:
+            _put(q, (False, e), stop)
+        finally:
+            # 下流が反復をやめた場合に上流の工程も停止させる
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name=f"{name}-stage", daemon=True)
+    thread.start()
+    try:
+        while True:
+            ok, item = q.get()
+            if not ok:
+                raise item
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        stop.set()
+        # 上流の処理中の要素が終わるまで待ち、呼び出し元が後片付けをしても上流が動いていないようにする
+        thread.join()
+
+
+def map_stage(
+    fn: Callable[[T], R],
+    iterable: Iterable[T],
+    maxsize: int = 2,
+    name: str = 'map',
+    timings: Optional[Dict[str, float]] = None
+) -> Iterator[R]:
+    """
+    上流の各要素に fn を別スレッドで適用し、結果を上限付きキューを通して返します。
+
+    Args:
+        fn (Callable[[T], R]): 各要素に適用する処理
+        iterable (Iterable[T]): 上流のイテラブル
+        maxsize (int): 処理済みで待機させる要素数の上限
+        name (str): 工程名（スレッド名・処理時間の集計に使用）
+        timings (Optional[Dict[str, float]]): 指定した場合、fn の処理時間を name に加算
+
+    Yields:
+        R: fn の結果
+    """
+    def apply() -> Iterator[R]:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                started = time.perf_counter()
+                result = fn(item)
+                if timings is not None:
+                    timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+                yield result
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+
+    return background(apply(), maxsize, name)
@@ -0,0 +1,198 @@
+# utils\profiler.py
+"""
+同期処理の工程ごとのCPU・メモリ使用状況を計測するユーティリティ（main.py --profile）
+
+JobReport.stage_listeners に登録し、工程（fetch, convert, deliver など）の開始・終了に合わせて
+次の3種類を計測します。
+
+    - cProfile: 工程を実行したスレッドの関数ごとの呼び出し回数・処理時間
+    - tracemalloc: 工程中のメモリ使用量のピークと、増加量の多い割り当て箇所
+    - サンプリング: 全スレッドのスタックを一定間隔で記録（フレームグラフ用の collapsed 形式）
+
+計測結果は logs/profile/<実行日時>/ に report.txt（工程ごとの要約）、stacks.folded
+（flamegraph.pl / speedscope で表示可能）、工程ごとの .prof（pstats / snakeviz で表示可能）として保存します。
+
+制限事項:
+    - cProfile は工程を開始したスレッドのみを計測します（別スレッドの処理はサンプリングで確認してください）
+    - プロセスプール（DECODE_WORKERS）のワーカープロセスは計測の対象外です
+    - tracemalloc により処理が数倍遅くなるため、通常の実行では使用しないでください
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from .environment import EnvironmentUtils as env
+from .logging_config import get_logger
+from .run_report import JobReport
+
+logger = get_logger(__name__)
+
+# 工程の外でサンプリングしたスタックに付ける名前
+_NO_STAGE = '(no stage)'
+
+
+class StageProfile:
+    """1つの工程（データファイルID:工程名）の計測結果"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.profile = cProfile.Profile()
+        self.duration = 0.0
+        self.peak_bytes = 0
+        self.growth_bytes = 0
+        self.top_allocations: List[str] = []
+        self._started_at = 0.0
+        self._before: Optional[tracemalloc.Snapshot] = None
+        self._traced_at_start = 0
+
+
+class StageProfiler:
+    """工程ごとに cProfile・tracemalloc・スタックのサンプリングで計測するクラス"""
+
+    def __init__(self, output_dir: Optional[Path] = None, interval: float = 0.005, top: int = 20):
+        """
+        Args:
+            output_dir (Optional[Path]): 計測結果の保存先（Noneの場合は <log_dir>/profile/<実行日時>）
+            interval (float): スタックをサンプリングする間隔（秒）
+            top (int): レポートに記載する関数・割り当て箇所の件数
+        """
+        if output_dir is None:
+            log_dir = env.get_config_value('log_settings', 'log_dir', 'logs')
+            output_dir = Path(log_dir) / 'profile' / datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.top = top
+        self.stages: Dict[str, StageProfile] = {}
+        self.stacks: Counter = Counter()
+        self._current: Optional[StageProfile] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """メモリの追跡とスタックのサンプリングを開始します。"""
+        tracemalloc.start()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample, name='profiler-sampler', daemon=True)
+        self._sampler.start()
+        logger.info(f"🔬 プロファイリングを開始しました（保存先: {self.output_dir}）")
+
+    def attach(self, job: JobReport) -> None:
+        """
+        データファイルの処理結果に工程のリスナーを登録します。
+
+        Args:
+            job (JobReport): 計測するデータファイルの処理結果
+        """
+        def listener(event: str, stage: str) -> None:
+            if event == 'begin':
+                self._begin(f"{job.datafile_id}:{stage}")
+            else:
+                profile = self._end(f"{job.datafile_id}:{stage}")
+                if profile is not None:
+                    job.extra.setdefault('profile', {})[stage] = {
+                        'peak_mb': round(profile.peak_bytes / 1024 / 1024, 1),
+                        'growth_mb': round(profile.growth_bytes / 1024 / 1024, 1),
+                    }
+        job.stage_listeners.append(listener)
+
+    def _begin(self, label: str) -> None:
+        stage = self.stages.setdefault(label, StageProfile(label))
+        stage._traced_at_start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        stage._before = tracemalloc.take_snapshot()
+        stage._started_at = time.perf_counter()
+        self._current = stage
+        stage.profile.enable()
+
+    def _end(self, label: str) -> Optional[StageProfile]:
+        stage = self.stages.get(label)
+        if stage is None or self._current is not stage:
+            return None
+        stage.profile.disable()
+        self._current = None
+        stage.duration += time.perf_counter() - stage._started_at
+
+        current, peak = tracemalloc.get_traced_memory()
+        stage.peak_bytes = max(stage.peak_bytes, peak - stage._traced_at_start)
+        stage.growth_bytes += current - stage._traced_at_start
+        after = tracemalloc.take_snapshot()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diffs = after.filter_traces(ignore).compare_to(stage._before.filter_traces(ignore), 'lineno')
+        stage.top_allocations = [str(diff) for diff in diffs[:self.top] if diff.size_diff > 0]
+        stage._before = None
+        return stage
+
+    def _sample(self) -> None:
+        """全スレッドのスタックを一定間隔で記録する（collapsed 形式: 工程;スレッド;外側;...;内側）"""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            label = self._current.label if self._current is not None else _NO_STAGE
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                frames.reverse()
+                self.stacks[';'.join([label, names.get(thread_id, str(thread_id))] + frames)] += 1
+
+    def stop(self) -> Optional[Path]:
+        """
+        計測を終了し、計測結果を保存します。
+
+        Returns:
+            Optional[Path]: report.txt のパス（保存に失敗した場合はNone）
+        """
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._current is not None:
+            self._end(self._current.label)
+        tracemalloc.stop()
+        try:
+            return self._write()
+        except OSError as e:
+            logger.warning(f"⚠️ プロファイリング結果の保存に失敗しました: {e}")
+            return None
+
+    def _write(self) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.output_dir / 'stacks.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        lines = [f"プロファイリング結果（{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}）", '']
+        for stage in self.stages.values():
+            stage.profile.dump_stats(self.output_dir / f"{stage.label.replace(':', '_')}.prof")
+            lines.append('=' * 80)
+            lines.append(
+                f"[{stage.label}] 処理時間 {stage.duration:.2f}秒 / メモリのピーク +{stage.peak_bytes / 1024 / 1024:.1f}MB"
+                f" / 工程終了時の増加 {stage.growth_bytes / 1024 / 1024:+.1f}MB"
+            )
+            lines.append('')
+            lines.append(f"--- 処理時間の多い関数（累積時間順、上位{self.top}件）---")
+            buffer = io.StringIO()
+            stats = pstats.Stats(stage.profile, stream=buffer)
+            stats.sort_stats('cumulative').print_stats(self.top)
+            lines.append(buffer.getvalue().strip())
+            lines.append('')
+            lines.append(f"--- 増加量の多いメモリ割り当て箇所（上位{self.top}件）---")
+            lines.extend(stage.top_allocations or ['（なし）'])
+            lines.append('')
+
+        report_path = self.output_dir / 'report.txt'
+        report_path.write_text('\n'.join(lines), encoding='utf-8')
+        logger.info(f"🔬 プロファイリング結果を保存しました: {report_path}")
+        return report_path
@@ -0,0 +1,171 @@
+# utils\run_report.py
+"""
+同期処理の実行結果（件数・処理時間・スループット）を集計するモジュール
+
+1回の実行（複数データファイル）を RunReport、データファイルごとの処理を JobReport で表します。
+JobReport.begin_stage() で工程を切り替えると、直前の工程の処理時間が記録されます。
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+class JobReport:
+    """データファイル1件分の同期結果"""
+
+    def __init__(self, datafile_id: str):
+        """
+        Args:
+            datafile_id (str): データファイルID
+        """
+        self.datafile_id = str(datafile_id)
+        self.success = False
+        self.skipped = False
+        self.rows = 0
+        self.columns = 0
+        self.error: Optional[str] = None
+        self.stage_durations: Dict[str, float] = {}
+        self.extra: Dict[str, Any] = {}
+        # 通知に含める補足事項（スキーマドリフトなど）
+        self.notes: List[str] = []
+        # 工程の開始・終了時に呼び出されるリスナー (event, stage_name)
+        self.stage_listeners: List[Callable[[str, str], None]] = []
+
+        self._started_at = time.perf_counter()
+        self._finished_at: Optional[float] = None
+        self._current_stage: Optional[str] = None
+        self._stage_started_at = 0.0
+
+    def begin_stage(self, name: str) -> None:
+        """
+        工程を開始します。実行中の工程があれば終了させます。
+
+        Args:
+            name (str): 工程名（fetch, convert, save, upload など）
+        """
+        self.end_stage()
+        self._current_stage = name
+        self._stage_started_at = time.perf_counter()
+        for listener in self.stage_listeners:
+            listener('begin', name)
+
+    def end_stage(self) -> None:
+        """実行中の工程を終了し、処理時間を記録します。"""
+        if self._current_stage is None:
+            return
+        name = self._current_stage
+        elapsed = time.perf_counter() - self._stage_started_at
+        self.stage_durations[name] = self.stage_durations.get(name, 0.0) + elapsed
+        self._current_stage = None
+        for listener in self.stage_listeners:
+            listener('end', name)
+
+    def finish(self, success: bool, error: Optional[str] = None) -> None:
+        """
+        処理を終了します。
+
+        Args:
+            success (bool): 成功したかどうか
+            error (Optional[str]): エラー内容
+        """
+        self.end_stage()
+        self.success = success
+        self.error = error
+        self._finished_at = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        """処理時間（秒）"""
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        return end - self._started_at
+
+    @property
+    def throughput(self) -> float:
+        """スループット（行/秒）"""
+        return self.rows / self.duration if self.duration > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: レポートの内容
+        """
+        return {
+            'datafile_id': self.datafile_id,
+            'success': self.success,
+            'skipped': self.skipped,
+            'rows': self.rows,
+            'columns': self.columns,
+            'duration_sec': round(self.duration, 3),
+            'throughput_rows_per_sec': round(self.throughput, 1),
+            'stages': {name: round(sec, 3) for name, sec in self.stage_durations.items()},
+            'error': self.error,
+            'notes': self.notes,
+            **self.extra,
+        }
+
+
+class RunReport:
+    """1回の実行（複数データファイル）の同期結果"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.jobs: List[JobReport] = []
+        self._started = time.perf_counter()
+
+    def new_job(self, datafile_id: str) -> JobReport:
+        """
+        データファイルの処理結果を追加します。
+
+        Args:
+            datafile_id (str): データファイルID
+
+        Returns:
+            JobReport: 追加した処理結果
+        """
+        job = JobReport(datafile_id)
+        self.jobs.append(job)
+        return job
+
+    @property
+    def success(self) -> bool:
+        """すべてのデータファイルが成功したかどうか"""
+        return all(job.success for job in self.jobs)
+
+    @property
+    def duration(self) -> float:
+        """実行全体の処理時間（秒）"""
+        return time.perf_counter() - self._started
+
+    def summary_text(self) -> str:
+        """
+        通知用のサマリー文字列を作成します。
+
+        Returns:
+            str: サマリー
+        """
+        total_rows = sum(job.rows for job in self.jobs)
+        status = "✅ 成功" if self.success else "❌ 失敗あり"
+        lines = [
+            f"b→dash APIデータ同期 {status} ({self.started_at:%Y-%m-%d %H:%M})",
+            f"データファイル: {len(self.jobs)}件 / 合計 {total_rows:,}行 / {self.duration:.1f}秒",
+        ]
+        for job in self.jobs:
+            if job.skipped:
+                result = "⏭️ 変更なし"
+            elif job.success:
+                result = "✅"
+            else:
+                result = "❌"
+            stages = ", ".join(f"{name} {sec:.1f}s" for name, sec in job.stage_durations.items())
+            line = (
+                f"{result} datafile {job.datafile_id}: {job.rows:,}行 × {job.columns}列, "
+                f"{job.duration:.1f}秒 ({job.throughput:,.0f}行/秒)"
+            )
+            if stages:
+                line += f" [{stages}]"
+            if job.error:
+                line += f" エラー: {job.error}"
+            lines.append(line)
+            lines.extend(f"    ⚠️ {note}" for note in job.notes)
+        return "\n".join(lines)
@@ -0,0 +1,47 @@
+"""
+テスト共通のフィクスチャ
+
+設定ファイル（config/settings.ini）を一時ディレクトリにコピーしてプロジェクトルートとし、
+状態ファイル・退避したチャンクなどがリポジトリ内に作られないようにします。
+"""
+
+import configparser
+import shutil
+from pathlib import Path
+from typing import Any, Callable
+import pytest
+from src.utils.environment import EnvironmentUtils
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Callable[..., Path]:
+    """
+    一時ディレクトリをプロジェクトルートにし、設定値を上書きする関数を返します。
+
+    使い方: project(RECONCILE={'enabled': 'true'}, BDASH={'primary_key': 'ID'})
+    """
+    config_dir = tmp_path / 'config'
+    config_dir.mkdir()
+    settings_file = config_dir / 'settings.ini'
+    shutil.copy(REPO_ROOT / 'config' / 'settings.ini', settings_file)
+    monkeypatch.setattr(EnvironmentUtils, 'BASE_DIR', tmp_path)
+
+    def configure(**sections: Any) -> Path:
+        config = configparser.ConfigParser()
+        config.optionxform = str
+        config.read(settings_file, encoding='utf-8')
+        for section, values in sections.items():
+            if not config.has_section(section):
+                config.add_section(section)
+            for key, value in values.items():
+                config.set(section, key, str(value))
+        with open(settings_file, 'w', encoding='utf-8') as f:
+            config.write(f)
+        # 更新日時が同じでも読み込み直されるように、読み込み済みの設定を破棄する
+        EnvironmentUtils._config_cache.pop(settings_file, None)
+        return tmp_path
+
+    configure()
+    return configure
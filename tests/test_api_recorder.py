@@ -0,0 +1,68 @@
+import gzip
+import json
+import pytest
+import requests
+from src.modules import api_recorder
+from src.modules.api_recorder import RecordingTransport, ReplayTransport, create_transport, get_recordings_root
+
+URL = 'https://api.bdash-marketing.com/v1/dataFile/export'
+
+
+def make_response(params):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = json.dumps({'offset': params['offset'], 'records': [{'c_id': params['offset']}]}).encode('utf-8')
+    return response
+
+
+@pytest.fixture
+def recorded(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_recorder.requests, 'get', lambda url, headers=None, params=None, **kwargs: make_response(params))
+    transport = RecordingTransport(tmp_path / 'recording')
+    for offset in (0, 100):
+        transport.get(URL, headers={'Authorization': 'secret'}, params={'limit': 100, 'offset': offset})
+    return tmp_path / 'recording'
+
+
+def test_recording_does_not_store_request_headers(recorded):
+    index = json.loads((recorded / 'index.json').read_text(encoding='utf-8'))
+    assert [entry['key'] for entry in index['entries']] == ['100:0', '100:100']
+    for entry in index['entries']:
+        with gzip.open(recorded / entry['file'], 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        assert 'secret' not in json.dumps(payload)
+        assert payload['status_code'] == 200
+
+
+def test_replay_returns_recorded_pages_by_offset(recorded):
+    transport = ReplayTransport(recorded)
+    response = transport.get(URL, params={'limit': 100, 'offset': 100})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json()['records'] == [{'c_id': 100}]
+    assert transport.get(URL, params={'limit': 100, 'offset': 0}).json()['offset'] == 0
+    # 記録範囲外のoffsetはデータの終端
+    assert transport.get(URL, params={'limit': 100, 'offset': 200}).status_code == 416
+
+
+def test_replay_falls_back_to_recorded_order_for_other_page_sizes(recorded):
+    transport = ReplayTransport(recorded)
+    assert transport.get(URL, params={'limit': 50, 'offset': 0}).json()['offset'] == 0
+    assert transport.get(URL, params={'limit': 50, 'offset': 50}).json()['offset'] == 100
+    with pytest.raises(RuntimeError):
+        transport.get(URL, params={'limit': 50, 'offset': 100})
+
+
+def test_create_transport_replays_the_latest_recording(project):
+    assert create_transport('503') is requests
+    with pytest.raises(FileNotFoundError):
+        create_transport('503', replay='latest')
+
+    root = get_recordings_root('503')
+    for name in ('20240101_000000', '20240201_000000'):
+        (root / name).mkdir(parents=True)
+        (root / name / 'index.json').write_text(json.dumps({'entries': []}), encoding='utf-8')
+    transport = create_transport('503', replay='latest')
+    assert isinstance(transport, ReplayTransport)
+    assert transport.recording_dir.name == '20240201_000000'
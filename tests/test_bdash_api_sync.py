@@ -0,0 +1,198 @@
+import json
+import pandas as pd
+import pytest
+from src.modules.bdash_api_sync import BDashAPISync
+from src.modules.row_filter import RowFilter, parse_predicates
+from src.modules.schema_registry import SchemaRegistry
+from src.utils.environment import EnvironmentUtils
+from src.utils.run_report import JobReport
+
+HEADER_INFO = [
+    {'column_id': 'c_id', 'column_name': 'ID', 'data_type': 'int'},
+    {'column_id': 'c_month', 'column_name': '配信年月', 'data_type': 'str'},
+    {'column_id': 'c_sent', 'column_name': '配信数', 'data_type': 'int'},
+    {'column_id': 'c_mail', 'column_name': 'メール', 'data_type': 'str'},
+]
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode()
+        self.headers = {}
+        self.text = ''
+
+
+class FakeTransport:
+    """fields パラメータによるカラムの指定・1ページあたりの件数の上限（page_cap）・スロットリング（throttle_at 番目のリクエスト）を再現するAPI"""
+
+    offline = False
+
+    def __init__(self, records, page_cap=None, throttle_at=()):
+        self.records = records
+        self.page_cap = page_cap
+        self.throttle_at = set(throttle_at)
+        self.requests = []
+
+    def get(self, url, headers=None, params=None):
+        self.requests.append(dict(params))
+        if len(self.requests) - 1 in self.throttle_at:
+            return FakeResponse({}, status_code=429)
+        fields = params['fields'].split(',') if params.get('fields') else None
+        limit = min(params['limit'], self.page_cap or params['limit'])
+        offset = params.get('offset', 0)
+        header_info = [col for col in HEADER_INFO if fields is None or col['column_id'] in fields]
+        records = [
+            {key: value for key, value in record.items() if fields is None or key in fields}
+            for record in self.records[offset:offset + limit]
+        ]
+        return FakeResponse({'result': {'header_info': header_info, 'records': records}})
+
+
+def make_records(count):
+    return [
+        {'c_id': i, 'c_month': f'2024/{1 + i % 12:02d}', 'c_sent': i * 10, 'c_mail': f'user{i}@example.com'}
+        for i in range(count)
+    ]
+
+
+def fetch_all(sync, limit):
+    header_info, frames = None, []
+    for result in sync.iter_pages(limit):
+        if header_info is None:
+            header_info = result['header_info']
+            sync.resolve_schema(header_info)
+        frames.append(sync.convert_page(result, header_info))
+    return frames
+
+
+@pytest.mark.parametrize('run', [1, 2])
+def test_field_selection_requests_row_filter_columns(project, run):
+    project(BDASH={'field_selection_param': 'fields'})
+    transport = FakeTransport(make_records(30))
+    for _ in range(run):
+        report = JobReport('503')
+        sync = BDashAPISync('503', report=report, transport=transport)
+        sync.api_key = 'key'
+        sync.columns = ['配信数', 'ID']
+        sync.row_filter = RowFilter(parse_predicates('配信年月 >= 2024/06'))
+        frames = fetch_all(sync, 10)
+
+    rows = sum(len(df) for df in frames)
+    assert rows == sum(1 for i in range(30) if 1 + i % 12 >= 6)
+    assert list(frames[0].columns) == ['配信数', 'ID']
+    assert not report.notes
+    if run == 2:
+        # 2回目は前回のヘッダー情報からフィールドを指定し、絞り込みに使う配信年月も要求する
+        assert set(transport.requests[-1]['fields'].split(',')) == {'c_id', 'c_sent', 'c_month'}
+    # フィールドを指定して取得したヘッダーでスキーマを上書きしない
+    assert len(SchemaRegistry().get_header_info('503')) == len(HEADER_INFO)
+
+
+def test_registered_header_info_is_read_once_per_sync(project, monkeypatch):
+    project(BDASH={'field_selection_param': 'fields'})
+    SchemaRegistry().resolve('503', HEADER_INFO)
+    reads = []
+    get_header_info = SchemaRegistry.get_header_info
+    monkeypatch.setattr(SchemaRegistry, 'get_header_info', lambda self, datafile_id: reads.append(datafile_id) or get_header_info(self, datafile_id))
+
+    transport = FakeTransport(make_records(45))
+    sync = BDashAPISync('503', transport=transport)
+    sync.api_key = 'key'
+    sync.columns = ['ID']
+    assert sum(len(df) for df in fetch_all(sync, 10)) == 45
+    assert len(transport.requests) == 5
+    assert all(request['fields'] == 'c_id' for request in transport.requests)
+    assert reads == ['503']
+
+
+def test_iter_pages_detects_server_page_cap(project):
+    project(SYNC_SETTINGS={'ADAPTIVE_PAGE_SIZE': 'true', 'PAGE_SIZE_MIN': '1000', 'PAGE_SIZE_MAX': '20000'})
+    records = make_records(12345)
+    transport = FakeTransport(records, page_cap=3000)
+    sync = BDashAPISync('503', transport=transport)
+    sync.api_key = 'key'
+
+    assert sum(len(result['records']) for result in sync.iter_pages(10000)) == len(records)
+    assert [request['limit'] for request in transport.requests[:3]] == [10000, 10000, 3000]
+
+    # 判明した上限は次の実行のページサイズに使う
+    transport.requests.clear()
+    assert sum(len(result['records']) for result in sync.iter_pages(10000)) == len(records)
+    assert {request['limit'] for request in transport.requests} == {3000}
+
+
+def test_iter_pages_stops_after_an_empty_page(project):
+    project(SYNC_SETTINGS={'ADAPTIVE_PAGE_SIZE': 'true'})
+    transport = FakeTransport(make_records(2500))
+    sync = BDashAPISync('503', transport=transport)
+    sync.api_key = 'key'
+    assert sum(len(result['records']) for result in sync.iter_pages(5000)) == 2500
+    assert [request['offset'] for request in transport.requests] == [0, 2500]
+
+
+def test_iter_pages_without_adaptive_size_stops_on_short_page(project):
+    project(SYNC_SETTINGS={'ADAPTIVE_PAGE_SIZE': 'false'})
+    transport = FakeTransport(make_records(2500))
+    sync = BDashAPISync('503', transport=transport)
+    sync.api_key = 'key'
+    assert sum(len(result['records']) for result in sync.iter_pages(1000)) == 2500
+    assert [request['offset'] for request in transport.requests] == [0, 1000, 2000]
+
+
+def test_throttle_retries_are_counted_per_page(project, monkeypatch):
+    project(SYNC_SETTINGS={'ADAPTIVE_PAGE_SIZE': 'true', 'PAGE_SIZE_MIN': '100', 'PAGE_THROTTLE_RETRIES': '1'})
+    monkeypatch.setattr('time.sleep', lambda sec: None)
+    transport = FakeTransport(make_records(2500), throttle_at={0, 2, 4})
+    sync = BDashAPISync('503', transport=transport)
+    sync.api_key = 'key'
+    # ページごとに1回までの再試行で、3回スロットリングされても全件を取得できる
+    assert sum(len(result['records']) for result in sync.iter_pages(1000)) == 2500
+
+    transport = FakeTransport(make_records(2500), throttle_at={0, 1})
+    sync = BDashAPISync('503', transport=transport)
+    sync.api_key = 'key'
+    with pytest.raises(RuntimeError):
+        list(sync.iter_pages(1000))
+
+
+class Fanout:
+    primary_succeeded = True
+    results = []
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('decode_workers', [0, 2])
+def test_in_memory_sync_fetches_every_page(project, monkeypatch, decode_workers):
+    project(SYNC_SETTINGS={'DECODE_WORKERS': decode_workers, 'SKIP_UNCHANGED': 'false'})
+    delivered = []
+
+    def deliver(self, dataset, checkpoint=None):
+        delivered.append(pd.concat(list(dataset.iter_chunks()), ignore_index=True))
+        return Fanout()
+
+    monkeypatch.setattr(BDashAPISync, 'deliver', deliver)
+    monkeypatch.setattr(BDashAPISync, 'setup_api_credentials', lambda self: True)
+    transport = FakeTransport(make_records(2345))
+    report = JobReport('503')
+    assert BDashAPISync('503', report=report, transport=transport).sync_data_to_spreadsheet(1000)
+
+    df = delivered[0]
+    assert len(df) == 2345
+    assert sorted(df['ID'].astype(int)) == list(range(2345))
+    assert df['配信年月'].is_monotonic_increasing
+
+
+def test_pipelined_sync_without_shadow_sheet_streams_instead(project, monkeypatch):
+    project(SPREADSHEET={'STAGED_UPLOAD': 'false'}, DATAFILE_503={'ssid': 'sheet-id'})
+    streamed = []
+    monkeypatch.setattr(EnvironmentUtils, 'get_service_account_file', staticmethod(lambda: 'credentials.json'))
+    monkeypatch.setattr(BDashAPISync, 'setup_api_credentials', lambda self: True)
+    monkeypatch.setattr(BDashAPISync, 'sync_data_streaming', lambda self, limit: streamed.append(limit) or True)
+    transport = FakeTransport(make_records(10))
+    assert BDashAPISync('503', transport=transport).sync_data_pipelined(1000)
+    # 転記先のシートを空にする前に取得を始めない
+    assert streamed == [1000]
+    assert not transport.requests
@@ -0,0 +1,73 @@
+import json
+from src.modules.checkpoint import SyncCheckpoint
+
+
+def record_pages(checkpoint: SyncCheckpoint, pages: int) -> None:
+    for page_no in range(1, pages + 1):
+        checkpoint.append_page(
+            f'hash{page_no}', next_offset=page_no * 100, page_no=page_no, row_count=page_no * 100, chunk_count=page_no
+        )
+
+
+def test_resume_from_journal(tmp_path):
+    checkpoint = SyncCheckpoint('1', tmp_path)
+    checkpoint.start('key', limit=100)
+    checkpoint.update(header_info=[{'column_id': 'c1'}], columns=['ID'])
+    record_pages(checkpoint, 3)
+    checkpoint.update(phase='write', rows_written=150)
+
+    resumed = SyncCheckpoint('1', tmp_path)
+    assert resumed.load('key')
+    assert resumed.state['page_hashes'] == ['hash1', 'hash2', 'hash3']
+    assert resumed.state['next_offset'] == 300
+    assert resumed.state['chunk_count'] == 3
+    assert resumed.state['phase'] == 'write'
+    assert resumed.state['rows_written'] == 150
+    assert resumed.state['header_info'] == [{'column_id': 'c1'}]
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+def test_page_progress_is_not_written_to_the_json_file(tmp_path):
+    checkpoint = SyncCheckpoint('1', tmp_path)
+    checkpoint.start('key')
+    record_pages(checkpoint, 5)
+    with open(checkpoint.path, encoding='utf-8') as f:
+        saved = json.load(f)
+    assert 'page_hashes' not in saved and 'next_offset' not in saved
+    assert len(checkpoint.journal_path.read_text(encoding='utf-8').splitlines()) == 5
+
+
+def test_torn_journal_line_is_truncated(tmp_path):
+    checkpoint = SyncCheckpoint('1', tmp_path)
+    checkpoint.start('key')
+    record_pages(checkpoint, 2)
+    with open(checkpoint.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"page_hash": "hash3", "next_')
+
+    resumed = SyncCheckpoint('1', tmp_path)
+    assert resumed.load('key')
+    assert resumed.state['page_hashes'] == ['hash1', 'hash2']
+    resumed.append_page('hash3', next_offset=300, page_no=3)
+
+    again = SyncCheckpoint('1', tmp_path)
+    assert again.load('key')
+    assert again.state['page_hashes'] == ['hash1', 'hash2', 'hash3']
+
+
+def test_different_config_discards_checkpoint(tmp_path):
+    checkpoint = SyncCheckpoint('1', tmp_path)
+    checkpoint.start('key')
+    record_pages(checkpoint, 1)
+    assert not SyncCheckpoint('1', tmp_path).load('other')
+    assert not checkpoint.path.exists() and not checkpoint.journal_path.exists()
+
+
+def test_start_resets_previous_journal(tmp_path):
+    checkpoint = SyncCheckpoint('1', tmp_path)
+    checkpoint.start('key')
+    record_pages(checkpoint, 2)
+    checkpoint.start('key')
+    resumed = SyncCheckpoint('1', tmp_path)
+    assert resumed.load('key')
+    assert resumed.state['page_hashes'] == []
+    assert resumed.state['next_offset'] == 0
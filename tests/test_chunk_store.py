@@ -0,0 +1,43 @@
+import pandas as pd
+from src.modules.chunk_store import UNKNOWN_PARTITION, ChunkStore, find_date_column, month_partition_keys
+
+
+def test_find_date_column():
+    assert find_date_column(['ID', '配信年月', '配信数']) == '配信年月'
+    assert find_date_column(['ID', '配信数']) is None
+
+
+def test_month_partition_keys():
+    keys = month_partition_keys(pd.Series(['2024/01', '2023/12', None, '不明']))
+    assert keys.tolist() == ['202401', '202312', UNKNOWN_PARTITION, UNKNOWN_PARTITION]
+
+
+def test_chunks_are_read_back_in_month_order(tmp_path):
+    store = ChunkStore(tmp_path / 'spill')
+    store.append(pd.DataFrame({'ID': [1, 2], '配信年月': ['2024/02', '2024/01']}))
+    store.append(pd.DataFrame({'ID': [3], '配信年月': ['2023/12'], '追加': ['x']}))
+    store.append(pd.DataFrame({'ID': [], '配信年月': []}))
+
+    assert (store.row_count, store.chunk_count) == (3, 2)
+    assert store.columns == ['ID', '配信年月', '追加']
+    df = pd.concat(list(store.iter_sorted_chunks()), ignore_index=True)
+    assert df['ID'].tolist() == [3, 2, 1]
+    assert df.columns.tolist() == ['ID', '配信年月', '追加']
+
+
+def test_restore_drops_chunks_written_after_the_checkpoint(tmp_path):
+    store = ChunkStore(tmp_path / 'spill')
+    for month in ('2024/01', '2024/02', '2024/03'):
+        store.append(pd.DataFrame({'ID': [1], '配信年月': [month]}))
+
+    resumed = ChunkStore(tmp_path / 'spill', resume=True)
+    resumed.restore(store.columns, 2, 2)
+    assert [df['配信年月'].iloc[0] for df in resumed.iter_sorted_chunks()] == ['2024/01', '2024/02']
+
+
+def test_new_store_removes_previous_chunks_and_cleanup(tmp_path):
+    ChunkStore(tmp_path / 'spill').append(pd.DataFrame({'ID': [1]}))
+    store = ChunkStore(tmp_path / 'spill')
+    assert list(store.iter_sorted_chunks()) == []
+    store.cleanup()
+    assert not (tmp_path / 'spill').exists()
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from src.modules.data_profile import DataProfileCheck, parse_null_rate_limits, profile_chunks
+
+
+def test_profile_chunks_counts_nulls_distinct_values_and_ranges():
+    chunks = [
+        pd.DataFrame({'ID': [1, 2, 3], '名前': ['a', '', None]}),
+        pd.DataFrame({'ID': [3, 4], '名前': ['a', 'b']}),
+    ]
+    profile = profile_chunks(chunks)
+    assert profile['rows'] == 5
+    assert profile['columns']['ID'] == {
+        'null_rate': 0.0, 'nulls': 0, 'distinct': 4, 'distinct_exact': True, 'min': 1, 'max': 4,
+    }
+    assert profile['columns']['名前']['nulls'] == 2
+    assert profile['columns']['名前']['distinct'] == 2
+
+
+def test_distinct_count_across_many_chunks():
+    chunks = [pd.DataFrame({'ID': range(start, start + 100)}) for start in range(0, 50000, 50)]
+    assert profile_chunks(chunks)['columns']['ID']['distinct'] == 50050
+
+
+def test_parse_null_rate_limits():
+    assert parse_null_rate_limits('メール:0.1, 配信年月:0') == {'メール': 0.1, '配信年月': 0.0}
+    with pytest.raises(ValueError):
+        parse_null_rate_limits('メール')
+
+
+def test_check_reports_row_drop_and_null_rates():
+    check = DataProfileCheck(
+        min_rows=100, max_row_drop_pct=10, max_null_rate=0.5,
+        null_rate_limits={'メール': 0.1, '電話': 0.1}, max_null_rate_increase=0.05,
+    )
+    profile = {'rows': 80, 'columns': {'メール': {'null_rate': 0.2}, 'ID': {'null_rate': 0.0}}}
+    previous = {'rows': 100, 'columns': {'メール': {'null_rate': 0.1}}}
+    violations = check.compare(profile, previous)
+    assert profile['row_delta'] == -20 and profile['row_delta_pct'] == -20.0
+    assert len(violations) == 5
+    assert any("'電話'" in violation for violation in violations)
+
+
+def test_check_without_previous_profile():
+    check = DataProfileCheck(max_row_drop_pct=10, max_null_rate_increase=0.05)
+    profile = {'rows': 10, 'columns': {'ID': {'null_rate': 0.0}}}
+    assert check.compare(profile, {}) == []
+    assert 'row_delta' not in profile
@@ -0,0 +1,48 @@
+import time
+import pytest
+from src.modules.job_queue import FAIL_FINAL, FAIL_LEASE_LOST, FAIL_RETRIED, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path) -> JobQueue:
+    return JobQueue(tmp_path / 'jobs.sqlite3')
+
+
+def test_enqueue_skips_datafiles_already_queued(queue):
+    job_id = queue.enqueue('503')
+    assert queue.enqueue('503') == job_id
+    assert queue.enqueue('504') != job_id
+    assert queue.pending_count() == 2
+
+
+def test_lease_and_complete(queue):
+    queue.enqueue('503')
+    job = queue.lease('worker-1', lease_sec=60)
+    assert job is not None and job.datafile_id == '503' and job.attempts == 1
+    assert queue.lease('worker-2', lease_sec=60) is None
+    assert queue.heartbeat(job.id, 'worker-1', lease_sec=60)
+    assert not queue.complete(job.id, 'worker-2')
+    assert queue.complete(job.id, 'worker-1', {'rows': 10})
+    assert queue.stats() == {'done': 1}
+
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    queue.enqueue('503', max_attempts=2)
+    job = queue.lease('worker-1', lease_sec=60)
+    assert queue.fail(job.id, 'worker-1', 'error', retry_delay_sec=0) == FAIL_RETRIED
+    job = queue.lease('worker-1', lease_sec=60)
+    assert job.attempts == 2
+    assert queue.fail(job.id, 'worker-1', 'error', retry_delay_sec=0) == FAIL_FINAL
+    assert queue.stats() == {'failed': 1}
+
+
+def test_expired_lease_is_taken_over(queue):
+    queue.enqueue('503')
+    job = queue.lease('worker-1', lease_sec=0.01)
+    time.sleep(0.05)
+    taken = queue.lease('worker-2', lease_sec=60)
+    assert taken.id == job.id and taken.attempts == 2
+    assert not queue.heartbeat(job.id, 'worker-1', lease_sec=60)
+    # リースを失ったワーカーの失敗は、引き継いだジョブに影響しない
+    assert queue.fail(job.id, 'worker-1', 'error', retry_delay_sec=0) == FAIL_LEASE_LOST
+    assert queue.stats() == {'leased': 1}
@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from src.modules.key_index import KeyIndex, parse_key_columns
+
+
+def page(ids, values=None, months=None):
+    return pd.DataFrame({
+        'ID': ids,
+        '値': values if values is not None else [f'v{i}' for i in ids],
+        '配信年月': months if months is not None else ['2024/01'] * len(ids),
+    })
+
+
+def test_parse_key_columns():
+    assert parse_key_columns(' ID, 配信年月 ,') == ['ID', '配信年月']
+    assert parse_key_columns('') == []
+
+
+def test_filter_drops_duplicates_within_and_across_pages(tmp_path):
+    index = KeyIndex('1', ['ID'], tmp_path)
+    first = index.filter(page([1, 2, 2, 3]))
+    second = index.filter(page([3, 4]))
+    assert first['ID'].tolist() == [1, 2, 3]
+    assert second['ID'].tolist() == [4]
+    assert index.duplicates == 2
+    assert len(index) == 4
+
+
+def test_filter_keeps_first_row_for_duplicate_key(tmp_path):
+    index = KeyIndex('1', ['ID'], tmp_path)
+    index.filter(page([1], ['first']))
+    assert index.filter(page([1], ['second'])).empty
+    assert index.to_frame()['bucket'].tolist() == ['202401']
+
+
+def test_diff_counts_added_removed_and_changed_rows(tmp_path):
+    previous = KeyIndex('1', ['ID'], tmp_path)
+    previous.filter(page([1, 2, 3]))
+    previous.save()
+
+    current = KeyIndex('1', ['ID'], tmp_path)
+    current.filter(page([2, 3, 4], ['v2', 'changed', 'v4']))
+    assert current.diff() == {
+        'keys': 3,
+        'duplicates_dropped': 0,
+        'added': 1,
+        'removed': 1,
+        'changed': 1,
+        'unchanged': 1,
+    }
+
+
+def test_diff_without_previous_index(tmp_path):
+    index = KeyIndex('1', ['ID'], tmp_path)
+    index.filter(page([1, 2]))
+    assert index.diff() == {'keys': 2, 'duplicates_dropped': 0}
+
+
+def test_concurrent_saves_do_not_share_a_temp_file(tmp_path):
+    indexes = []
+    for n in range(4):
+        index = KeyIndex('1', ['ID'], tmp_path)
+        index.filter(page(list(range(n * 1000, n * 1000 + 1000))))
+        indexes.append(index)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for future in [executor.submit(index.save) for index in indexes for _ in range(5)]:
+            future.result()
+
+    assert len(pd.read_parquet(indexes[0].path)) == 1000
+    assert not list(tmp_path.rglob('*.tmp'))
@@ -0,0 +1,31 @@
+import logging
+from src.utils import logging_config
+from src.utils.logging_config import apply_log_level, get_logger
+
+
+def test_project_loggers_follow_app_env(project, monkeypatch):
+    logger = get_logger('src.test_logging_config')
+    monkeypatch.setenv('APP_ENV', 'production')
+    apply_log_level()
+    assert logger.getEffectiveLevel() == logging.INFO
+    assert not logger.isEnabledFor(logging.DEBUG)
+
+    monkeypatch.setenv('APP_ENV', 'development')
+    apply_log_level()
+    assert logger.isEnabledFor(logging.DEBUG)
+    assert get_logger('src.test_logging_config_new').isEnabledFor(logging.DEBUG)
+
+
+def test_root_logger_stays_at_warning(project):
+    get_logger('src.test_logging_config')
+    assert logging.getLogger().level == logging.WARNING
+    assert not logging.getLogger('urllib3').isEnabledFor(logging.INFO)
+
+
+def test_notifications_logs_info(project, monkeypatch):
+    from src.utils import notifications
+
+    monkeypatch.setenv('APP_ENV', 'production')
+    apply_log_level()
+    assert notifications.logger.name in logging_config._project_loggers
+    assert notifications.logger.isEnabledFor(logging.INFO)
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+from src.modules.monthly_summary import MonthlyAggregator, month_blocks, parse_metrics, plan_updates
+
+DATA = pd.DataFrame({
+    'チャネル': ['mail', 'line', 'mail', 'line', 'mail'],
+    '配信年月': ['2024/02', '2024/01', '2024/01', '2024/02', '2024/10'],
+    '配信数': [100, 50, 200, 0, 10],
+    '開封数': [10, 5, 40, 0, 'n/a'],
+})
+
+
+def aggregate(group_by, metrics, chunk_rows=2):
+    aggregator = MonthlyAggregator(group_by, parse_metrics(metrics))
+    return aggregator.aggregate(DATA.iloc[start:start + chunk_rows] for start in range(0, len(DATA), chunk_rows))
+
+
+def test_aggregate_combines_partials_from_chunks():
+    summary = aggregate([], '配信数 = sum(配信数); 件数 = count(); 開封率 = ratio(開封数, 配信数); 平均開封 = mean(開封数)')
+    assert summary['配信年月'].tolist() == ['2024/01', '2024/02', '2024/10']
+    assert summary['配信数'].tolist() == [250, 100, 10]
+    assert summary['件数'].tolist() == [2, 2, 1]
+    assert summary['開封率'].tolist()[:2] == [0.18, 0.1]
+    assert summary['平均開封'].tolist()[:2] == [22.5, 5.0]
+    assert pd.isna(summary['平均開封'].iloc[2])
+
+
+@pytest.mark.parametrize('group_by', [['チャネル', '配信年月'], ['チャネル']])
+def test_date_column_is_always_the_first_axis(group_by):
+    summary = aggregate(group_by, '件数 = count()')
+    assert summary.columns.tolist() == ['配信年月', 'チャネル', '件数']
+    assert summary[['配信年月', 'チャネル']].values.tolist() == [
+        ['2024/01', 'line'], ['2024/01', 'mail'], ['2024/02', 'line'], ['2024/02', 'mail'], ['2024/10', 'mail'],
+    ]
+    assert [(block['month'], block['rows']) for block in month_blocks(summary)] == [('2024/01', 2), ('2024/02', 2), ('2024/10', 1)]
+
+
+def test_plan_updates_rewrites_only_changed_months():
+    previous = month_blocks(aggregate(['チャネル'], '配信数 = sum(配信数)'))
+    changed = [dict(block) for block in previous]
+    changed[1]['digest'] = 'changed'
+    assert plan_updates(previous, changed) == [(2, 2)]
+
+    # 月の行数が変わった場合はその月以降をまとめて書き直す
+    changed[0]['rows'] = 3
+    assert plan_updates(previous, changed) == [(0, 6)]
+
+
+def test_parse_metrics_rejects_invalid_specs():
+    with pytest.raises(ValueError):
+        parse_metrics('配信数 = median(配信数)')
+    with pytest.raises(ValueError):
+        parse_metrics('開封率 = ratio(開封数)')
@@ -0,0 +1,80 @@
+import json
+from src.modules.page_decoder import (
+    RecordColumns, decode_page, decode_response, ipc_to_dataframe, records_to_dataframe, select_record_keys,
+)
+from src.modules.row_filter import RowFilter, parse_predicates
+
+HEADER_INFO = [
+    {'column_id': 'c_id', 'column_name': 'ID', 'data_type': 'int', 'description': None},
+    {'column_id': 'c_month', 'column_name': '配信年月', 'data_type': 'str'},
+    {'column_id': 'c_sent', 'column_name': '配信数', 'data_type': 'int', 'length': 10},
+]
+RECORDS = [
+    {'c_id': 1, 'c_month': '2024/01', 'c_sent': 100},
+    {'c_id': 2, 'c_month': '2024/02', 'c_sent': None},
+    {'c_id': 3, 'c_month': '2024/03', 'c_sent': 300},
+]
+
+
+def make_body(records=RECORDS, **extra):
+    return json.dumps({'result': {'header_info': HEADER_INFO, 'records': records}, **extra}, ensure_ascii=False).encode('utf-8')
+
+
+def test_non_record_fields_are_returned_as_is():
+    body = make_body(status='ok', paging={'next': None, 'items': [1, 2]})
+    data = decode_response(body)
+    assert isinstance(data['result']['records'], RecordColumns)
+    # Arrowの構造体で補われるキー・null の値に影響されない
+    assert data['result']['header_info'] == HEADER_INFO
+    assert data['status'] == 'ok'
+    assert data['paging'] == {'next': None, 'items': [1, 2]}
+    assert len(data['result']['records']) == 3
+
+
+def test_records_after_other_result_fields_and_brackets_in_strings():
+    body = json.dumps({'result': {'records': RECORDS, 'header_info': HEADER_INFO, 'note': 'a]b'}}).encode('utf-8')
+    data = decode_response(body)
+    assert data['result']['header_info'] == HEADER_INFO
+    assert data['result']['note'] == 'a]b'
+    assert data['result']['records'].keys() == ['c_id', 'c_month', 'c_sent']
+
+
+def test_mixed_types_fall_back_to_plain_json():
+    records = RECORDS + [{'c_id': 'x', 'c_month': '2024/04', 'c_sent': 1}]
+    data = decode_response(make_body(records))
+    assert data['result']['records'] == records
+
+
+def test_nullable_integer_columns_stay_integers():
+    data = decode_response(make_body())
+    df = records_to_dataframe(data['result']['records'], HEADER_INFO)
+    assert str(df['配信数'].dtype) == 'Int64'
+    assert df['配信数'].tolist()[0] == 100 and df['配信数'].isna().tolist() == [False, True, False]
+
+    count, ipc, header_info = decode_page(make_body())
+    restored = ipc_to_dataframe(ipc)
+    assert count == 3 and header_info == HEADER_INFO
+    assert str(restored['配信数'].dtype) == 'Int64'
+    assert restored.equals(df)
+
+
+def test_columns_and_row_filter_are_applied_per_page():
+    records = decode_response(make_body())['result']['records']
+    row_filter = RowFilter(parse_predicates('配信年月 >= 2024/02'))
+    df = records_to_dataframe(records, HEADER_INFO, columns=['ID'], row_filter=row_filter)
+    assert df.columns.tolist() == ['ID']
+    assert df['ID'].tolist() == [2, 3]
+
+    plain = records_to_dataframe(RECORDS, HEADER_INFO, columns=['ID'], row_filter=row_filter)
+    assert plain['ID'].tolist() == [2, 3]
+
+
+def test_select_record_keys_accepts_ids_and_names():
+    keys = ['C_ID', 'c_month', 'c_sent']
+    assert select_record_keys(keys, HEADER_INFO, ['配信数', 'c_id', 'unknown']) == ['c_sent', 'C_ID']
+
+
+def test_empty_page():
+    count, ipc, header_info = decode_page(make_body([]))
+    assert (count, ipc, header_info) == (0, None, HEADER_INFO)
+    assert isinstance(decode_response(make_body([]))['result']['records'], (RecordColumns, list))
@@ -0,0 +1,64 @@
+import pytest
+from src.modules.page_sizer import AdaptivePageSizer
+from src.modules.sync_state import SyncStateStore
+
+
+@pytest.fixture
+def store(tmp_path) -> SyncStateStore:
+    return SyncStateStore(tmp_path / 'page_size_state.json')
+
+
+def sizer(store, **kwargs) -> AdaptivePageSizer:
+    options = {'initial': 5000, 'min_size': 1000, 'max_size': 20000, 'target_sec': 5.0, 'step': 500}
+    options.update(kwargs)
+    return AdaptivePageSizer('1', state_store=store, **options)
+
+
+def test_fast_pages_grow_at_most_twice_per_page(store):
+    page_sizer = sizer(store)
+    page_sizer.observe(5000, 0.5, 5000 * 100)
+    assert page_sizer.size == 10000
+    page_sizer.observe(10000, 1.0, 10000 * 100)
+    assert page_sizer.size == 20000
+
+
+def test_slow_pages_shrink_to_the_estimate(store):
+    page_sizer = sizer(store)
+    page_sizer.observe(5000, 10.0, 5000 * 100)
+    assert page_sizer.size == 2500
+
+
+def test_estimate_close_to_current_size_is_kept(store):
+    page_sizer = sizer(store)
+    page_sizer.observe(5000, 4.0, 5000 * 100)
+    assert page_sizer.size == 5000
+    assert page_sizer.changes == 0
+
+
+def test_throttling_halves_the_size_and_sets_a_ceiling(store):
+    page_sizer = sizer(store)
+    assert page_sizer.throttled(429, '3') == 3.0
+    assert page_sizer.size == 2500
+    assert page_sizer.ceiling == 4500
+    page_sizer.observe(2500, 0.1, 2500 * 100)
+    assert page_sizer.size == 4500
+
+
+def test_learned_size_is_used_on_the_next_run(store):
+    page_sizer = sizer(store)
+    page_sizer.observe(5000, 0.5, 5000 * 100)
+    page_sizer.save()
+    assert sizer(store).size == 10000
+
+
+def test_server_cap_limits_this_and_later_runs(store):
+    page_sizer = sizer(store, initial=10000)
+    page_sizer.cap(3000)
+    assert page_sizer.size == 3000
+    page_sizer.observe(3000, 0.1, 3000 * 100)
+    assert page_sizer.size == 3000
+    page_sizer.save()
+
+    next_run = sizer(store, initial=10000)
+    assert next_run.size == 3000
+    assert next_run.server_max == 3000
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+import pandas as pd
+from src.modules import parquet_export
+from src.modules.parquet_export import ParquetExporter
+from src.utils.object_store import LocalObjectStore
+from src.utils.path_generator import JST, PathGenerator
+
+
+def chunks(count, rows=100):
+    return [pd.DataFrame({'ID': range(i * rows, (i + 1) * rows), '名前': [f'名前{n}' for n in range(rows)]}) for i in range(count)]
+
+
+def test_export_splits_parts_and_writes_manifest(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    exporter = ParquetExporter(store, PathGenerator('bdash', 'test'), max_part_bytes=5_000, max_workers=2)
+    manifest = exporter.export(chunks(5), 'datafile_503')
+
+    assert manifest['total_rows'] == 500
+    assert len(manifest['parts']) > 1
+    frames = [pd.read_parquet(Path(tmp_path, *part['key'].split('/'))) for part in manifest['parts']]
+    assert pd.concat(frames, ignore_index=True)['ID'].tolist() == list(range(500))
+    manifest_path = Path(tmp_path, *manifest['manifest_uri'].split(str(tmp_path.as_uri()) + '/')[1].split('/'))
+    assert json.loads(manifest_path.read_text(encoding='utf-8'))['total_rows'] == 500
+    assert not list(tmp_path.rglob('*.tmp'))
+
+
+def test_parts_of_one_export_share_the_date_and_timestamp(tmp_path):
+    times = iter([
+        JST.localize(datetime(2024, 5, 1, 23, 59, 59)),
+        JST.localize(datetime(2024, 5, 2, 0, 0, 1)),
+        JST.localize(datetime(2024, 5, 2, 0, 0, 2)),
+    ])
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(times)
+
+    exporter = ParquetExporter(LocalObjectStore(tmp_path), PathGenerator('bdash', 'test'), max_part_bytes=5_000)
+    with mock.patch.object(parquet_export, 'datetime', Clock):
+        manifest = exporter.export(chunks(5), 'datafile_503')
+
+    keys = [part['key'] for part in manifest['parts']]
+    assert len(keys) > 1
+    assert {key.rsplit('/', 2)[1] for key in keys} == {'20240501'}
+    assert {key.rsplit('_', 1)[1] for key in keys} == {'235959.parquet'}
+    assert manifest['manifest_uri'].endswith('datafile_503_manifest_235959.json')
+
+
+def test_local_object_store_overwrites_atomically(tmp_path):
+    store = LocalObjectStore(tmp_path)
+    store.put_bytes('a/b/object.bin', b'first')
+    uri = store.put_bytes('a/b/object.bin', b'second')
+    assert store.exists('a/b/object.bin')
+    assert (tmp_path / 'a' / 'b' / 'object.bin').read_bytes() == b'second'
+    assert uri == (tmp_path / 'a' / 'b' / 'object.bin').as_uri()
+    assert [p.name for p in (tmp_path / 'a' / 'b').iterdir()] == ['object.bin']
@@ -0,0 +1,54 @@
+import threading
+import time
+import pytest
+from src.utils.pipeline import background, map_stage
+
+
+def stage_threads():
+    return [t for t in threading.enumerate() if t.name.endswith('-stage')]
+
+
+def test_stages_keep_order_and_record_timings():
+    timings = {}
+    pages = background(range(20), 2, 'fetch', timings)
+    assert list(map_stage(lambda n: n * 2, pages, 2, 'convert', timings)) == [n * 2 for n in range(20)]
+    assert set(timings) == {'fetch', 'convert'}
+    assert not stage_threads()
+
+
+def test_upstream_errors_are_raised_downstream():
+    def pages():
+        yield 1
+        raise ValueError('fetch failed')
+
+    frames = map_stage(lambda n: n, background(pages()), 2)
+    assert next(frames) == 1
+    with pytest.raises(ValueError, match='fetch failed'):
+        next(frames)
+
+
+def test_close_stops_and_joins_upstream_threads():
+    produced, closed = [], threading.Event()
+
+    def pages():
+        try:
+            for n in range(1000):
+                produced.append(n)
+                yield n
+        finally:
+            closed.set()
+
+    def convert(n):
+        time.sleep(0.01)
+        return n
+
+    frames = map_stage(convert, background(pages(), 2, 'fetch'), 2, 'convert')
+    assert [next(frames) for _ in range(3)] == [0, 1, 2]
+    frames.close()
+
+    # close() が戻った時点で上流は停止しており、スレッドも残っていない
+    assert closed.is_set()
+    assert not stage_threads()
+    count = len(produced)
+    time.sleep(0.05)
+    assert len(produced) == count < 1000
@@ -0,0 +1,42 @@
+from src.utils.profiler import StageProfiler
+from src.utils.run_report import JobReport
+
+
+def allocate(rows):
+    return [list(range(100)) for _ in range(rows)]
+
+
+def test_stages_are_profiled_and_saved(tmp_path):
+    profiler = StageProfiler(tmp_path / 'profile', interval=0.001, top=5)
+    job = JobReport('503')
+    profiler.start()
+    profiler.attach(job)
+    try:
+        job.begin_stage('fetch')
+        kept = allocate(2000)
+        job.begin_stage('convert')
+        allocate(100)
+        job.end_stage()
+    finally:
+        report_path = profiler.stop()
+
+    assert set(profiler.stages) == {'503:fetch', '503:convert'}
+    assert job.extra['profile']['fetch']['peak_mb'] > 0
+    assert profiler.stages['503:fetch'].growth_bytes > 0
+    assert len(kept) == 2000
+
+    report = report_path.read_text(encoding='utf-8')
+    assert '[503:fetch]' in report and '[503:convert]' in report
+    assert (tmp_path / 'profile' / '503_fetch.prof').exists()
+    assert (tmp_path / 'profile' / 'stacks.folded').exists()
+
+
+def test_stop_ends_a_running_stage(tmp_path):
+    profiler = StageProfiler(tmp_path / 'profile', interval=0.001)
+    job = JobReport('503')
+    profiler.start()
+    profiler.attach(job)
+    job.begin_stage('deliver')
+    profiler.stop()
+    assert profiler.stages['503:deliver'].duration > 0
+    assert profiler._current is None
@@ -0,0 +1,241 @@
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+import src.modules.bdash_api_sync as bdash_api_sync
+from src.modules.reconcile import SheetReconciler, _bucket_digests, _unmatched, mark_reconciled, reconcile_due
+from src.modules.sheet_serializer import iter_row_blocks
+from src.modules.sinks import Dataset
+from src.modules.sync_state import SyncStateStore
+from src.utils.run_report import JobReport
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+class FakeWorksheet:
+    """batch_get の範囲指定（A1:C1 / B2:B）と行の削除・挿入・書き込みだけを再現するワークシート"""
+
+    id = 0
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def batch_get(self, ranges, value_render_option=None):
+        value_ranges = []
+        for value_range in ranges:
+            match = re.match(r'([A-Z]+)(\d+):([A-Z]+)(\d*)', value_range)
+            first, last = _column_index(match[1]), _column_index(match[3])
+            end = int(match[4]) if match[4] else len(self.grid)
+            rows = []
+            for row in self.grid[int(match[2]) - 1:end]:
+                values = [row[i] if i < len(row) else '' for i in range(first, last + 1)]
+                while values and values[-1] == '':
+                    values.pop()
+                rows.append(values)
+            while rows and not rows[-1]:
+                rows.pop()
+            value_ranges.append(rows)
+        return value_ranges
+
+
+class FakeWorkbook:
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.batch_updates = 0
+
+    def batch_update(self, body):
+        self.batch_updates += 1
+        grid = self.worksheet.grid
+        for request in body['requests']:
+            if 'deleteDimension' in request:
+                target = request['deleteDimension']['range']
+                del grid[target['startIndex']:target['endIndex']]
+            elif 'insertDimension' in request:
+                target = request['insertDimension']['range']
+                grid[target['startIndex']:target['startIndex']] = [[] for _ in range(target['endIndex'] - target['startIndex'])]
+            elif 'updateCells' in request:
+                update = request['updateCells']
+                for i, row in enumerate(update['rows']):
+                    grid[update['start']['rowIndex'] + i] = [
+                        next(iter(cell['userEnteredValue'].values())) if cell else '' for cell in row['values']
+                    ]
+
+
+class FakeSpreadSheet:
+    def __init__(self, grid=None):
+        self.sheet = FakeWorksheet(grid if grid is not None else [])
+        self.workbook = FakeWorkbook(self.sheet)
+
+    def connect(self):
+        return True
+
+    def batch_get(self, ranges, value_render_option=None):
+        return self.sheet.batch_get(ranges, value_render_option)
+
+    def invalidate_cache(self):
+        pass
+
+    def write(self, df):
+        self.sheet.grid[:] = [list(df.columns)] + [row for block in iter_row_blocks(df) for row in block]
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        'ID': np.arange(rows),
+        '配信年月': [f'2024/{1 + i * 3 // rows:02d}' for i in range(rows)],
+        '配信数': np.arange(rows) * 10,
+    })
+
+
+def test_bucket_digests_ignore_row_order():
+    hashes = np.array([3, 1, 2], dtype=np.uint64)
+    buckets = np.array(['202401', '202402', '202401'], dtype=object)
+    digests = _bucket_digests(buckets, hashes)
+    reordered = _bucket_digests(buckets[::-1].copy(), hashes[::-1].copy())
+    assert digests == reordered
+    assert digests['202401'][0] == 2 and digests['202402'][0] == 1
+
+
+def test_unmatched_treats_duplicate_rows_as_a_multiset():
+    left = np.array([1, 1, 2, 3], dtype=np.uint64)
+    right = np.array([1, 2, 2, 4], dtype=np.uint64)
+    extra, missing = _unmatched(left, right)
+    assert extra.tolist() == [1, 3]
+    assert missing.tolist() == [2, 3]
+
+
+def test_consistent_sheet_is_not_modified():
+    df = frame(30)
+    sheet = FakeSpreadSheet()
+    sheet.write(df)
+    result = SheetReconciler(sheet).run(Dataset.from_frame(df))
+    assert result['status'] == 'consistent'
+    assert sheet.workbook.batch_updates == 0
+
+
+def test_missing_and_extra_rows_are_repaired_in_one_batch_update():
+    df = frame(30)
+    sheet = FakeSpreadSheet()
+    sheet.write(df)
+    del sheet.sheet.grid[5]
+    sheet.sheet.grid.insert(25, [999, '2024/03', 9990])
+
+    result = SheetReconciler(sheet, key_columns=['ID']).run(Dataset.from_frame(df))
+    assert result['status'] == 'repaired'
+    assert (result['missing_rows'], result['extra_rows']) == (1, 1)
+    assert sheet.workbook.batch_updates == 1
+    assert sorted(row[0] for row in sheet.sheet.grid[1:]) == list(range(30))
+    assert SheetReconciler(sheet).run(Dataset.from_frame(df))['status'] == 'consistent'
+
+
+def test_dry_run_and_repair_limit():
+    df = frame(30)
+    sheet = FakeSpreadSheet()
+    sheet.write(df)
+    del sheet.sheet.grid[1:11]
+    assert SheetReconciler(sheet, dry_run=True).run(Dataset.from_frame(df))['status'] == 'mismatch'
+    result = SheetReconciler(sheet, max_repair_ratio=0.2).run(Dataset.from_frame(df))
+    assert result['status'] == 'full_rewrite'
+    assert len(sheet.sheet.grid) == 21
+
+
+def test_unsorted_sheet_requires_full_rewrite():
+    df = frame(30)
+    sheet = FakeSpreadSheet()
+    sheet.write(df.iloc[::-1])
+    assert SheetReconciler(sheet).run(Dataset.from_frame(df))['status'] == 'full_rewrite'
+
+
+def test_reconcile_schedule(project, tmp_path):
+    project(RECONCILE={'enabled': 'true'}, SYNC_SETTINGS={'MISSING_RECORDS_SYNC_HOUR': '20', 'CHECK_INTERVAL_DAYS': '1'})
+    store = SyncStateStore(tmp_path / 'reconcile_state.json')
+    evening = datetime(2024, 5, 1, 21)
+    assert not reconcile_due('503', datetime(2024, 5, 1, 19), store)
+    assert reconcile_due('503', evening, store)
+    mark_reconciled('503', {'status': 'consistent'}, evening, store)
+    assert not reconcile_due('503', evening, store)
+    assert reconcile_due('503', datetime(2024, 5, 2, 20), store)
+
+
+def test_reconcile_is_disabled_by_default(project, tmp_path):
+    assert not reconcile_due('503', datetime(2024, 5, 1, 23), SyncStateStore(tmp_path / 'reconcile_state.json'))
+
+
+class RecordsTransport:
+    """records を offset・limit でページ分けして返すAPI"""
+
+    offline = False
+
+    def __init__(self, header_info, records):
+        self.header_info = header_info
+        self.records = records
+
+    def get(self, url, headers=None, params=None):
+        offset = params.get('offset', 0)
+        body = {'result': {'header_info': self.header_info, 'records': self.records[offset:offset + params['limit']]}}
+        return SimpleNamespace(status_code=200, content=json.dumps(body).encode(), headers={}, text='')
+
+
+@pytest.fixture
+def paged_sync(project, monkeypatch):
+    """全ページを取得する同期を、偽のAPIから取得して偽のスプレッドシートに転記するように置き換える"""
+    project(SYNC_SETTINGS={'SKIP_UNCHANGED': 'true', 'DECODE_WORKERS': '0'})
+    sheet = FakeSpreadSheet()
+    header_info = [
+        {'column_id': 'c_id', 'column_name': 'ID'},
+        {'column_id': 'c_month', 'column_name': '配信年月'},
+    ]
+    records = [{'c_id': str(i), 'c_month': f'2024/{1 + i * 3 // 12000:02d}'} for i in range(12000)]
+    transport = RecordsTransport(header_info, records)
+
+    class Fanout:
+        primary_succeeded = True
+        results = []
+
+        def close(self):
+            pass
+
+    def deliver(self, dataset, checkpoint=None):
+        sheet.write(pd.concat(list(dataset.iter_chunks()), ignore_index=True))
+        return Fanout()
+
+    monkeypatch.setattr(bdash_api_sync.BDashAPISync, 'deliver', deliver)
+    monkeypatch.setattr(bdash_api_sync.BDashAPISync, 'setup_api_credentials', lambda self: True)
+    monkeypatch.setattr(bdash_api_sync, 'SpreadSheet', lambda *args, **kwargs: sheet)
+    monkeypatch.setattr(bdash_api_sync.env, 'get_service_account_file', lambda: Path('credentials.json'))
+
+    def run(reconcile: bool) -> JobReport:
+        report = JobReport('503')
+        sync = bdash_api_sync.BDashAPISync('503', report=report, transport=transport)
+        sync.reconcile_requested = reconcile
+        assert sync.sync_data_to_spreadsheet(5000)
+        return report
+
+    return sheet, run
+
+
+def test_reconcile_compares_against_every_fetched_page(paged_sync):
+    sheet, run = paged_sync
+    run(reconcile=False)
+    assert len(sheet.sheet.grid) == 12001
+
+    # limit は1ページあたりの件数のため、全ページ（12000行）と比較する
+    report = run(reconcile=True)
+    assert report.skipped
+    assert report.extra['reconcile']['status'] == 'consistent'
+    assert report.extra['reconcile']['source_rows'] == 12000
+    assert sheet.workbook.batch_updates == 0
+
+    del sheet.sheet.grid[100]
+    report = run(reconcile=True)
+    assert report.extra['reconcile']['status'] == 'repaired'
+    assert len(sheet.sheet.grid) == 12001
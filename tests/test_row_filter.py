@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from src.modules.row_filter import RowFilter, parse_predicates
+
+HEADER_INFO = [
+    {'column_id': 'c_id', 'column_name': 'ID'},
+    {'column_id': 'c_month', 'column_name': '配信年月'},
+    {'column_id': 'c_type', 'column_name': '配信種別'},
+]
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'ID': ['1', '2', '3', '4', '5'],
+        '配信年月': ['2023/12', '2024/01', '2024/02', None, '2024/03'],
+        '配信種別': ['メール', 'LINE', 'メール', 'メール', 'SMS'],
+    })
+
+
+def test_parse_predicates():
+    predicates = parse_predicates('配信年月 >= 2024/01; 配信種別 in (メール, "LINE"); ID not in (3); ステータス != 停止')
+    assert [(p.column, p.op, p.values) for p in predicates] == [
+        ('配信年月', '>=', ['2024/01']),
+        ('配信種別', 'in', ['メール', 'LINE']),
+        ('ID', 'not in', ['3']),
+        ('ステータス', '!=', ['停止']),
+    ]
+    assert parse_predicates('') == []
+
+
+def test_parse_predicates_rejects_invalid_condition():
+    with pytest.raises(ValueError):
+        parse_predicates('配信年月')
+
+
+def test_apply_compares_months_and_drops_missing(frame):
+    result = RowFilter(parse_predicates('配信年月 >= 2024/01')).apply(frame, HEADER_INFO)
+    assert result['ID'].tolist() == ['2', '3', '5']
+
+
+def test_apply_combines_conditions_by_column_id(frame):
+    row_filter = RowFilter(parse_predicates('c_type in (メール, LINE); ID > 1'))
+    assert row_filter.apply(frame, HEADER_INFO)['ID'].tolist() == ['2', '3', '4']
+
+
+def test_apply_raises_when_column_is_missing(frame):
+    with pytest.raises(KeyError):
+        RowFilter(parse_predicates('ステータス = 停止')).apply(frame, HEADER_INFO)
+
+
+def test_required_columns_include_date_column_for_recent_months():
+    row_filter = RowFilter(parse_predicates('配信種別 = メール'), recent_months=3)
+    assert row_filter.required_columns(HEADER_INFO) == ['配信種別', '配信年月']
+    assert RowFilter(parse_predicates('配信種別 = メール')).required_columns(HEADER_INFO) == ['配信種別']
+
+
+def test_to_api_filters_uses_column_ids():
+    row_filter = RowFilter(parse_predicates('配信種別 = メール; 不明なカラム = 1'))
+    assert row_filter.to_api_filters(HEADER_INFO) == [{'column': 'c_type', 'op': '=', 'values': ['メール']}]
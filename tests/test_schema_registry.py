@@ -0,0 +1,69 @@
+import json
+import multiprocessing
+from pathlib import Path
+import pandas as pd
+from src.modules.schema_registry import SchemaPlan, SchemaRegistry, detect_drift, format_drift
+
+WORKERS = 4
+RESOLVES = 25
+
+HEADER_INFO = [
+    {'column_id': 'c_id', 'column_name': 'ID', 'data_type': 'int'},
+    {'column_id': 'c_rate', 'column_name': '開封率', 'data_type': 'decimal'},
+    {'column_id': 'c_mail', 'column_name': 'メール', 'data_type': 'varchar'},
+]
+
+
+def _resolve_repeatedly(args):
+    directory, worker = args
+    for n in range(RESOLVES):
+        SchemaRegistry(Path(directory) / 'schema_registry.json').resolve(
+            str(worker), [{'column_id': f'c{n}', 'column_name': f'カラム{n}'}]
+        )
+
+
+def test_plan_maps_columns_and_converts_numeric_types():
+    plan = SchemaPlan.compile(HEADER_INFO)
+    assert plan.column_mapping(['C_ID', 'c_mail', 'unknown']) == {'C_ID': 'ID', 'c_mail': 'メール'}
+
+    df = plan.apply_dtypes(pd.DataFrame({'ID': ['1', '2'], '開封率': ['0.5', 'n/a'], 'メール': ['a', 'b']}))
+    assert str(df['ID'].dtype) == 'Int64'
+    # 変換できない値を含むカラムはそのまま
+    assert df['開封率'].tolist() == ['0.5', 'n/a']
+
+
+def test_resolve_reuses_plan_and_reports_drift(tmp_path):
+    registry = SchemaRegistry(tmp_path / 'schema_registry.json')
+    plan, drift = registry.resolve('503', HEADER_INFO)
+    assert drift is None
+    assert SchemaRegistry(tmp_path / 'schema_registry.json').resolve('503', HEADER_INFO)[1] is None
+
+    changed = [
+        {'column_id': 'c_id', 'column_name': 'ID', 'data_type': 'bigint'},
+        {'column_id': 'c_mail', 'column_name': 'メールアドレス', 'data_type': 'varchar'},
+        {'column_id': 'c_new', 'column_name': '新規', 'data_type': 'varchar'},
+    ]
+    _, drift = SchemaRegistry(tmp_path / 'schema_registry.json').resolve('503', changed)
+    assert drift['added'] == ['新規']
+    assert drift['removed'] == ['開封率']
+    assert drift['renamed'] == [['メール', 'メールアドレス']]
+    assert drift['type_changed'] == [['ID', 'int', 'bigint']]
+    assert SchemaRegistry(tmp_path / 'schema_registry.json').get_header_info('503') == changed
+
+
+def test_detect_drift_reports_reordered_columns():
+    drift = detect_drift(HEADER_INFO, list(reversed(HEADER_INFO)))
+    assert drift['reordered'] == ['メール', '開封率', 'ID']
+    assert format_drift(drift) == '列順変更'
+    assert format_drift(detect_drift(HEADER_INFO, HEADER_INFO)) == '変更なし'
+
+
+def test_concurrent_resolves_from_processes_keep_every_datafile(tmp_path):
+    with multiprocessing.get_context('spawn').Pool(WORKERS) as pool:
+        pool.map(_resolve_repeatedly, [(str(tmp_path), worker) for worker in range(WORKERS)])
+
+    with open(tmp_path / 'schema_registry.json', encoding='utf-8') as f:
+        entries = json.load(f)
+    assert set(entries) == {str(worker) for worker in range(WORKERS)}
+    assert all(entry['header_info'][0]['column_id'] == f'c{RESOLVES - 1}' for entry in entries.values())
+    assert not list(tmp_path.glob('*.tmp'))
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from src.modules.sheet_serializer import header_values, iter_row_blocks
+
+
+def test_missing_values_become_empty_strings():
+    df = pd.DataFrame({
+        'float': [1.5, np.nan, np.inf],
+        'object': ['a', None, pd.NA],
+        'nullable': pd.array([1, None, 3], dtype='Int64'),
+    })
+    rows = [row for block in iter_row_blocks(df) for row in block]
+    assert rows == [[1.5, 'a', 1], ['', '', ''], ['', '', 3]]
+
+
+def test_numpy_values_are_converted_to_python_values():
+    df = pd.DataFrame({'int': np.array([1, 2], dtype=np.int64), 'bool': [True, False]})
+    rows = [row for block in iter_row_blocks(df) for row in block]
+    assert rows == [[1, True], [2, False]]
+    assert all(type(value) in (int, bool) for row in rows for value in row)
+
+
+def test_datetimes_are_formatted_as_dates_when_times_are_midnight():
+    dates = pd.DataFrame({'date': pd.to_datetime(['2024-01-01', None])})
+    times = pd.DataFrame({'time': pd.to_datetime(['2024-01-01 12:30:00'])})
+    assert [row for block in iter_row_blocks(dates) for row in block] == [['2024-01-01'], ['']]
+    assert [row for block in iter_row_blocks(times) for row in block] == [['2024-01-01 12:30:00']]
+
+
+def test_rows_are_split_into_blocks():
+    df = pd.DataFrame({'a': range(7)})
+    blocks = list(iter_row_blocks(df, block_rows=3))
+    assert [len(block) for block in blocks] == [3, 3, 1]
+    assert [row[0] for block in blocks for row in block] == list(range(7))
+    assert header_values(df) == ['a']
@@ -0,0 +1,113 @@
+import re
+import pandas as pd
+import pytest
+from src.modules import sheet_sharding
+from src.modules.sheet_sharding import ShardedSheetWriter, create_shard_writer, iter_shards
+
+
+class FakeWorksheet:
+    def __init__(self, book, title):
+        self.book = book
+        self.title = title
+        self.rows = []
+
+    def clear(self):
+        self.rows = []
+
+    def resize(self, rows, cols):
+        pass
+
+    def update(self, values, range_name):
+        start = int(re.match(r'A(\d+):', range_name).group(1))
+        self.rows[start - 1:start - 1 + len(values)] = [list(map(str, row)) for row in values]
+
+    def get_all_values(self):
+        return self.rows
+
+
+class FakeWorkbook:
+    def __init__(self):
+        self.worksheets = {}
+
+    def del_worksheet(self, worksheet):
+        del self.worksheets[worksheet.title]
+
+
+class FakeSpreadSheet:
+    """スプレッドシートIDごとのワークシートをメモリ上に保持する SpreadSheet"""
+
+    books = {}
+
+    def __init__(self, credentials_path, spreadsheet_key, sheet_name=None, create_if_missing=False, **kwargs):
+        self.workbook = self.books.setdefault(spreadsheet_key, FakeWorkbook())
+        self.sheet_name = sheet_name
+        self.create_if_missing = create_if_missing
+        self.sheet = None
+
+    def connect(self):
+        if self.sheet_name not in self.workbook.worksheets:
+            if not self.create_if_missing:
+                return False
+            self.workbook.worksheets[self.sheet_name] = FakeWorksheet(self.workbook, self.sheet_name)
+        self.sheet = self.workbook.worksheets[self.sheet_name]
+        return True
+
+    def invalidate_cache(self):
+        pass
+
+
+@pytest.fixture
+def books(monkeypatch):
+    monkeypatch.setattr(FakeSpreadSheet, 'books', {})
+    monkeypatch.setattr(sheet_sharding, 'SpreadSheet', FakeSpreadSheet)
+    return FakeSpreadSheet.books
+
+
+def make_chunks(months, rows_per_month, chunk_rows=7):
+    df = pd.DataFrame({
+        '配信年月': [month for month in months for _ in range(rows_per_month)],
+        '配信数': range(len(months) * rows_per_month),
+    })
+    return [df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows)]
+
+
+def test_iter_shards_splits_by_year_and_max_rows():
+    chunks = make_chunks(['2023/11', '2023/12', '2024/01', '2024/02'], 5)
+    shards = [(name, sum(len(part) for part in parts)) for name, parts in iter_shards(chunks, 'year', 8)]
+    assert shards == [('2023', 8), ('2023_2', 2), ('2024', 8), ('2024_2', 2)]
+
+    shards = [(name, sum(len(part) for part in parts)) for name, parts in iter_shards(chunks, 'rows', 8)]
+    assert shards == [('001', 8), ('002', 8), ('003', 4)]
+
+
+def test_iter_shards_requires_a_date_column_for_year():
+    with pytest.raises(ValueError):
+        list(iter_shards([pd.DataFrame({'ID': [1]})], 'year', 10))
+
+
+def test_write_distributes_shards_and_removes_stale_ones(books):
+    writer = ShardedSheetWriter('credentials.json', 'main', shard_spreadsheet_ids=['main', 'extra'], max_rows=100, chunk_rows=3)
+    headers = ['配信年月', '配信数']
+    writer.write(make_chunks(['2022/12', '2023/01', '2024/01'], 4), headers)
+
+    shards = writer.write(make_chunks(['2023/01', '2024/01'], 4), headers)
+    assert [(s['sheet'], s['spreadsheet_id'], s['first'], s['last'], s['rows']) for s in shards] == [
+        ('data_2023', 'main', '2023/01', '2023/01', 4),
+        ('data_2024', 'extra', '2024/01', '2024/01', 4),
+    ]
+    assert books['extra'].worksheets['data_2024'].rows[0] == headers
+    assert len(books['extra'].worksheets['data_2024'].rows) == 5
+    # 前回のインデックスにあった data_2022 は削除される
+    assert set(books['main'].worksheets) == {'data_2023', 'shard_index'}
+    index = books['main'].worksheets['shard_index'].rows
+    assert [row[:5] for row in index[1:]] == [
+        ['data_2023', 'main', '2023/01', '2023/01', '4'],
+        ['data_2024', 'extra', '2024/01', '2024/01', '4'],
+    ]
+
+
+def test_create_shard_writer_reads_datafile_settings(project):
+    assert create_shard_writer('503', 'credentials.json', 'main') is None
+    project(DATAFILE_503={'shard_enabled': 'true', 'shard_by': 'rows', 'max_rows': '1000', 'spreadsheet_ids': 'a, b'})
+    writer = create_shard_writer('503', 'credentials.json', 'main')
+    assert (writer.shard_by, writer.max_rows, writer.shard_spreadsheet_ids) == ('rows', 1000, ['a', 'b'])
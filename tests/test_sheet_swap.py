@@ -0,0 +1,110 @@
+import pytest
+from src.modules import sheet_swap
+from src.modules.sheet_swap import SHADOW_MARKER, ShadowWorksheet, create_shadow_worksheet
+
+
+class FakeWorksheet:
+    def __init__(self, sheet_id, title, index=0):
+        self.id = sheet_id
+        self.title = title
+        self.index = index
+
+
+class FakeWorkbook:
+    def __init__(self):
+        self.sheets = [FakeWorksheet(1, 'data'), FakeWorksheet(2, f'data{SHADOW_MARKER}20240101000000', 1)]
+        self.batches = []
+
+    @property
+    def sheet1(self):
+        return self.sheets[0]
+
+    def worksheets(self):
+        return list(self.sheets)
+
+    def batch_update(self, body):
+        self.batches.append(body['requests'])
+        for request in body['requests']:
+            if 'addSheet' in request:
+                title = request['addSheet']['properties']['title']
+                self.sheets.append(FakeWorksheet(max(s.id for s in self.sheets) + 1, title, len(self.sheets)))
+            elif 'deleteSheet' in request:
+                self.sheets = [s for s in self.sheets if s.id != request['deleteSheet']['sheetId']]
+
+
+class FakeSpreadSheet:
+    workbook = None
+
+    def __init__(self, credentials_path, spreadsheet_key, sheet_name=None, **kwargs):
+        self.sheet_name = sheet_name
+        self.sheet = None
+        self.invalidated = False
+
+    def connect(self):
+        matches = [s for s in self.workbook.sheets if s.title == self.sheet_name] if self.sheet_name else [self.workbook.sheet1]
+        self.sheet = matches[0] if matches else None
+        return self.sheet is not None
+
+    def invalidate_cache(self):
+        self.invalidated = True
+
+
+@pytest.fixture
+def workbook(monkeypatch):
+    book = FakeWorkbook()
+    monkeypatch.setattr(FakeSpreadSheet, 'workbook', book)
+    monkeypatch.setattr(sheet_swap, 'SpreadSheet', FakeSpreadSheet)
+    return book
+
+
+def test_open_removes_stale_shadows_and_adds_a_hidden_sheet(workbook):
+    shadow = ShadowWorksheet('credentials.json', 'key')
+    sheet = shadow.open(10, 3)
+    assert workbook.batches[0] == [{'deleteSheet': {'sheetId': 2}}]
+    added = workbook.batches[1][0]['addSheet']['properties']
+    assert added['hidden'] and added['gridProperties'] == {'rowCount': 10, 'columnCount': 3}
+    assert sheet.sheet.title.startswith(f'data{SHADOW_MARKER}')
+    assert [s.title for s in workbook.sheets] == ['data', sheet.sheet.title]
+
+
+def test_copy_promote_pastes_values_into_the_live_sheet(workbook):
+    shadow = ShadowWorksheet('credentials.json', 'key')
+    staged = shadow.open(2, 2)
+    live = shadow.live
+    shadow.promote(5, 2)
+    requests = workbook.batches[-1]
+    assert requests[0]['updateSheetProperties']['properties'] == {'sheetId': 1, 'gridProperties': {'rowCount': 5, 'columnCount': 2}}
+    assert requests[1]['copyPaste']['destination']['sheetId'] == 1
+    assert requests[1]['copyPaste']['pasteType'] == 'PASTE_VALUES'
+    assert requests[2] == {'deleteSheet': {'sheetId': staged.sheet.id}}
+    assert [s.id for s in workbook.sheets] == [1]
+    assert live.invalidated and staged.invalidated
+    assert shadow.shadow is None
+
+
+def test_rename_promote_shows_the_shadow_before_deleting_the_live_sheet(workbook):
+    shadow = ShadowWorksheet('credentials.json', 'key', swap_method='rename')
+    staged = shadow.open(2, 2)
+    shadow.promote(5, 2)
+    requests = workbook.batches[-1]
+    assert requests[0]['updateSheetProperties']['properties'] == {'sheetId': staged.sheet.id, 'hidden': False, 'index': 0}
+    assert requests[1] == {'deleteSheet': {'sheetId': 1}}
+    assert requests[2]['updateSheetProperties']['properties'] == {'sheetId': staged.sheet.id, 'title': 'data'}
+
+
+def test_discard_deletes_only_the_shadow(workbook):
+    shadow = ShadowWorksheet('credentials.json', 'key')
+    shadow.discard()
+    assert not workbook.batches
+    shadow.open(2, 2)
+    shadow.discard()
+    assert [s.title for s in workbook.sheets] == ['data']
+    shadow.discard()
+
+
+def test_create_shadow_worksheet_reads_settings(project):
+    assert create_shadow_worksheet('503', 'credentials.json', 'key') is None
+    project(DATAFILE_503={'STAGED_UPLOAD': 'true', 'STAGED_SWAP_METHOD': 'rename'})
+    assert create_shadow_worksheet('503', 'credentials.json', 'key').swap_method == 'rename'
+    with pytest.raises(ValueError):
+        ShadowWorksheet('credentials.json', 'key', swap_method='move')
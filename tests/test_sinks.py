@@ -0,0 +1,77 @@
+import threading
+import pandas as pd
+import pytest
+from src.modules.sinks import CsvSink, Dataset, ParquetSink, Sink, SinkFanout, create_sink_fanout
+
+CHUNKS = [
+    pd.DataFrame({'ID': [1, 2], '名前': ['あ', 'い']}),
+    pd.DataFrame({'ID': [3], '名前': ['う']}),
+]
+
+
+def make_dataset():
+    return Dataset(lambda: iter(CHUNKS), ['ID', '名前'], 3)
+
+
+class FakeSink(Sink):
+    def __init__(self, name, primary=False, error=None, release=None):
+        super().__init__('503', primary)
+        self.name = name
+        self.error = error
+        self.release = release
+        self.rows = None
+
+    def write(self, dataset):
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error:
+            raise RuntimeError(self.error)
+        self.rows = sum(len(chunk) for chunk in dataset.iter_chunks())
+        return {'rows': self.rows}
+
+
+def test_file_sinks_write_every_chunk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv_path = CsvSink('503').write(make_dataset())['path']
+    with open(csv_path, 'rb') as f:
+        assert f.read(3) == b'\xef\xbb\xbf'
+    assert pd.read_csv(csv_path, encoding='utf-8-sig').equals(pd.concat(CHUNKS, ignore_index=True))
+
+    parquet_path = ParquetSink('503').write(make_dataset())['path']
+    assert pd.read_parquet(parquet_path).equals(pd.concat(CHUNKS, ignore_index=True))
+
+
+def test_fanout_waits_only_for_primary_sinks():
+    release = threading.Event()
+    primary, slow = FakeSink('sheet', primary=True), FakeSink('csv', release=release)
+    fanout = SinkFanout([primary, slow])
+    results = fanout.run(make_dataset())
+
+    assert fanout.primary_succeeded
+    assert [r.status for r in results] == ['success', 'running']
+    release.set()
+    fanout.close()
+    assert [r.to_dict()['status'] for r in fanout.results] == ['success', 'success']
+    assert slow.rows == 3
+
+
+def test_fanout_reports_failures_per_sink():
+    fanout = SinkFanout([FakeSink('sheet', primary=True), FakeSink('csv', error='disk full')])
+    fanout.run(make_dataset())
+    fanout.close()
+    assert fanout.primary_succeeded
+    assert fanout.results[1].error == 'disk full'
+
+    fanout = SinkFanout([FakeSink('sheet', primary=True, error='quota')])
+    fanout.run(make_dataset())
+    assert not fanout.primary_succeeded
+
+
+def test_create_sink_fanout_reads_datafile_settings(project):
+    project(DATAFILE_503={'sinks': 'sheet, csv, parquet', 'primary_sinks': 'sheet, parquet'}, OBJECT_STORE={'EXPORT_ENABLED': 'true'})
+    fanout = create_sink_fanout('503', exclude=['csv'])
+    assert [(sink.name, sink.primary) for sink in fanout.sinks] == [('sheet', True), ('parquet', True), ('object_store', False)]
+
+    project(DATAFILE_503={'sinks': 'sheet, ftp'})
+    with pytest.raises(ValueError):
+        create_sink_fanout('503')
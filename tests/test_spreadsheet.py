@@ -0,0 +1,96 @@
+import re
+import pytest
+from src.modules import spreadsheet
+from src.modules.spreadsheet import SpreadSheet
+
+
+class FakeWorksheet:
+    def __init__(self, sheet_id, title, column_a, row_count):
+        self.id = sheet_id
+        self.title = title
+        self.column_a = column_a
+        self.row_count = row_count
+        self.ranges = []
+
+    def batch_get(self, ranges, value_render_option=None):
+        result = []
+        for range_name in ranges:
+            self.ranges.append(range_name)
+            start, end = map(int, re.fullmatch(r'A(\d+):A(\d+)', range_name).groups())
+            rows = [[value] if value else [] for value in self.column_a[start - 1:end]]
+            while rows and not rows[-1]:
+                rows.pop()
+            result.append(rows)
+        return result
+
+    def col_values(self, col):
+        raise AssertionError('A列全体を読み取らない')
+
+
+class FakeWorkbook:
+    def __init__(self, *sheets):
+        self.sheets = sheets
+        self.metadata_calls = 0
+
+    def fetch_sheet_metadata(self, params=None):
+        self.metadata_calls += 1
+        return {'sheets': [
+            {'properties': {'sheetId': s.id, 'gridProperties': {'rowCount': s.row_count, 'columnCount': 5}}}
+            for s in self.sheets
+        ]}
+
+
+def make_sheet(worksheet, workbook, cache_ttl=60.0):
+    sheet = SpreadSheet('credentials.json', 'key', worksheet.title, cache_ttl=cache_ttl)
+    sheet.workbook, sheet.sheet = workbook, worksheet
+    return sheet
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    spreadsheet._read_cache.clear()
+    yield
+    spreadsheet._read_cache.clear()
+
+
+def test_get_last_row_reads_only_the_tail(monkeypatch):
+    monkeypatch.setattr(spreadsheet, 'LAST_ROW_PROBE_ROWS', 10)
+    worksheet = FakeWorksheet(1, 'data', ['ID'] + [str(n) for n in range(1, 95)] + [''] * 5, 100)
+    assert make_sheet(worksheet, FakeWorkbook(worksheet)).get_last_row() == 95
+    assert worksheet.ranges == ['A91:A100']
+
+
+def test_get_last_row_widens_the_probe_over_empty_rows(monkeypatch):
+    monkeypatch.setattr(spreadsheet, 'LAST_ROW_PROBE_ROWS', 10)
+    worksheet = FakeWorksheet(1, 'data', ['ID', '1', '', '3'] + [''] * 96, 100)
+    assert make_sheet(worksheet, FakeWorkbook(worksheet)).get_last_row() == 4
+    assert worksheet.ranges == ['A91:A100', 'A71:A90', 'A31:A70', 'A1:A30']
+
+    empty = FakeWorksheet(2, 'empty', [''] * 3, 3)
+    assert make_sheet(empty, FakeWorkbook(empty)).get_last_row() == 0
+
+
+def test_cache_ttl_zero_always_reads():
+    worksheet = FakeWorksheet(1, 'data', ['ID', '1'], 2)
+    workbook = FakeWorkbook(worksheet)
+    make_sheet(worksheet, workbook).get_dimensions()
+    uncached = make_sheet(worksheet, workbook, cache_ttl=0)
+    uncached.get_dimensions()
+    uncached.get_dimensions()
+    assert workbook.metadata_calls == 3
+
+
+def test_invalidate_cache_only_drops_the_written_worksheet():
+    first = FakeWorksheet(1, 'first', ['ID', '1'], 2)
+    second = FakeWorksheet(2, 'second', ['ID', '1', '2'], 3)
+    workbook = FakeWorkbook(first, second)
+    first_sheet, second_sheet = make_sheet(first, workbook), make_sheet(second, workbook)
+    first_sheet.get_last_row()
+    second_sheet.get_last_row()
+
+    first.column_a.append('2')
+    first.row_count = 3
+    first_sheet.invalidate_cache()
+    assert first_sheet.get_last_row() == 3
+    assert second_sheet.get_last_row() == 3
+    assert len(second.ranges) == 1
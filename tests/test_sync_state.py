@@ -0,0 +1,32 @@
+import json
+import multiprocessing
+from pathlib import Path
+from src.modules.sync_state import SyncStateStore
+
+WORKERS = 4
+SAVES = 25
+
+
+def _save_repeatedly(args):
+    directory, worker = args
+    for n in range(SAVES):
+        SyncStateStore(Path(directory) / 'sync_state.json').save(str(worker), {'n': n})
+
+
+def test_save_keeps_other_datafiles(tmp_path):
+    store = SyncStateStore(tmp_path / 'sync_state.json')
+    store.save('503', {'row_count': 1})
+    SyncStateStore(tmp_path / 'sync_state.json').save('504', {'row_count': 2})
+    store.save('503', {'row_count': 3})
+    assert SyncStateStore(tmp_path / 'sync_state.json').get('504')['row_count'] == 2
+    assert store.get('503')['row_count'] == 3
+
+
+def test_concurrent_saves_from_processes_keep_every_datafile(tmp_path):
+    with multiprocessing.get_context('spawn').Pool(WORKERS) as pool:
+        pool.map(_save_repeatedly, [(str(tmp_path), worker) for worker in range(WORKERS)])
+
+    with open(tmp_path / 'sync_state.json', encoding='utf-8') as f:
+        state = json.load(f)
+    assert {key: value['n'] for key, value in state.items()} == {str(worker): SAVES - 1 for worker in range(WORKERS)}
+    assert not list(tmp_path.glob('*.tmp'))